@@ -1,115 +1,232 @@
-from flask import Flask, request, make_response
-from slack_sdk import WebClient
-from slack_sdk.signature import SignatureVerifier
+from flask import Blueprint, Flask, current_app, request, make_response
 from dotenv import load_dotenv
+import json
 import logging
 import os
-from modules import slack_commands, trello_integration
+import sqlite3
+from modules import board_io, trello_sync, stats, query_plans, task_pages
+from modules.commands import CommandRequest, UsageError
+from modules.dispatcher import parse_timeouts, ACK_MESSAGE, BUSY_MESSAGE
+from modules.idempotency import DONE, DUPLICATE_REQUESTS, request_key
+from modules.log_pipeline import configure_logging
+from modules.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
+from modules.services import Services
+from modules.sqlite_profile import configure_sqlite, install_pragmas
+from modules.write_coalescer import WriteCoalescer
 from models import db
 from flask_migrate import Migrate
-from apscheduler.schedulers.background import BackgroundScheduler
 
-# Cargar variables de entorno
-load_dotenv()
+bp = Blueprint('slack_api_lab', __name__)
 
-# Configurar el logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Inicializar la aplicación Flask
-app = Flask(__name__)
+def create_app(config=None):
+    """ Crear la aplicación Flask. Los clientes de Slack y Trello, el scheduler y los workers se crean al usarse. """
+    # Cargar variables de entorno
+    load_dotenv()
 
-# Configuración de la base de datos
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+    # Configurar el logging: JSON escrito por un hilo de fondo, sin secretos (LOG_LEVEL, LOG_FORMAT, LOG_ASYNC)
+    configure_logging()
 
-# Inicializar Flask-Migrate
-migrate = Migrate(app, db)
+    # Inicializar la aplicación Flask
+    app = Flask(__name__)
 
-# Configuración de Slack
-slack_signing_secret = os.getenv("SLACK_SIGNING_SECRET")
-slack_bot_token = os.getenv("SLACK_BOT_TOKEN")
-signature_verifier = SignatureVerifier(signing_secret=slack_signing_secret)
-slack_client = WebClient(token=slack_bot_token)
+    # Configuración de la base de datos
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# Inicializar el scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
+    # Configuración del despacho asíncrono de comandos slash
+    app.config['SLASH_ASYNC_DISPATCH'] = os.getenv('SLASH_ASYNC_DISPATCH', 'true').lower() in ('1', 'true', 'yes')
+    app.config['SLASH_WORKERS'] = int(os.getenv('SLASH_WORKERS', '4'))
+    app.config['SLASH_QUEUE_SIZE'] = int(os.getenv('SLASH_QUEUE_SIZE', '100'))
+    app.config['SLASH_COMMAND_TIMEOUT'] = float(os.getenv('SLASH_COMMAND_TIMEOUT', '30'))
+    app.config['SLASH_COMMAND_TIMEOUTS'] = parse_timeouts(os.getenv('SLASH_COMMAND_TIMEOUTS'))
 
-@app.route('/', methods=['GET'])
+    # Configuración del webhook de Trello
+    app.config['TRELLO_API_SECRET'] = os.getenv('TRELLO_API_SECRET')
+    app.config['TRELLO_WEBHOOK_URL'] = os.getenv('TRELLO_WEBHOOK_URL')
+
+    if config:
+        app.config.update(config)
+
+    # Perfil de producción para SQLite (WAL, PRAGMA por conexión, pool) y agrupador de escrituras
+    configure_sqlite(app)
+    app.config.setdefault('SQLITE_WRITE_COALESCE',
+                          os.getenv('SQLITE_WRITE_COALESCE', 'true').lower() in ('1', 'true', 'yes'))
+
+    db.init_app(app)
+    install_pragmas(app)
+    if app.config['SQLITE_TUNING'] and app.config['SQLITE_WRITE_COALESCE']:
+        app.extensions['write_coalescer'] = WriteCoalescer.from_env(app)
+
+    # Inicializar Flask-Migrate
+    Migrate(app, db)
+
+    # Comandos de sincronización con Trello (flask --app app trello-backfill)
+    app.cli.add_command(trello_sync.backfill_command)
+    app.cli.add_command(trello_sync.register_webhook_command)
+    app.cli.add_command(stats.rebuild_rollups_command)
+    app.cli.add_command(query_plans.check_query_plans_command)
+    app.cli.add_command(board_io.import_board_command)
+    app.cli.add_command(board_io.export_command)
+
+    app.extensions['services'] = Services(app)
+    app.register_blueprint(bp)
+    return app
+
+
+def services():
+    return current_app.extensions['services']
+
+
+@bp.before_app_request
+def start_background():
+    # Con gunicorn los hilos se arrancan en post_worker_init; con `python app.py` o `flask run`, aquí
+    services().start_background()
+
+@bp.route('/', methods=['GET'])
 def index():
     return "La aplicación Flask está funcionando correctamente."
 
-@app.route('/slash/events', methods=['POST'])
+@bp.route('/internal/stats', methods=['GET'])
+def internal_stats():
+    return {
+        'slash_dispatch': {'queue_depth': services().dispatcher.queue_depth()},
+        'slack_outbound': services().slack_sender.stats(),
+        'trello_outbox': services().trello_outbox.stats(),
+    }
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    # Con PROMETHEUS_MULTIPROC_DIR, las series de todos los workers de gunicorn, no solo las de este
+    return make_response(metrics_registry.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE})
+
+@bp.route('/slash/events', methods=['POST'])
 def slash_events():
-    if not signature_verifier.is_valid_request(request.get_data(), request.headers):
+    if not services().signature_verifier.is_valid_request(request.get_data(), request.headers):
         logging.warning("Firma de solicitud inválida. Rechazando la solicitud.")
         return make_response("Invalid request signature.", 403)
 
-    logging.info("Solicitud recibida en /slash/events")
     try:
         data = request.form
-        command = data.get('command')
-        user_id = data.get('user_id')
-        text = data.get('text')
+        command_name = data.get('command')
         response_url = data.get('response_url')
+        logging.info("Comando recibido: %s", command_name)
 
-        logging.info(f"Datos recibidos: command={command}, user_id={user_id}, text={text}")
-
-        # Manejar los comandos
-        command_handlers = {
-            '/view_comments': lambda: trello_integration.view_comments(text),  # task_id en text
-            '/assign_task': lambda: process_assign_task(text),  # task_id y @usuario en text
-            '/my_tasks': lambda: trello_integration.my_tasks(user_id),
-            '/set_priority': lambda: process_set_priority(text),  # task_id y prioridad en text
-            '/priority_list': lambda: trello_integration.priority_list(user_id),
-            '/create_task': lambda: slack_commands.create_task(user_id, text, db),
-            '/start_timer': lambda: slack_commands.start_timer(user_id, text, db),
-            '/stop_timer': lambda: slack_commands.stop_timer(user_id, db),
-            '/get_tip': lambda: slack_commands.get_tip(),
-            '/break_reminder': lambda: slack_commands.break_reminder(user_id, slack_client, scheduler),
-            '/cancel_break_reminder': lambda: slack_commands.cancel_break_reminder(user_id, scheduler),
-            '/start_pomodoro': lambda: slack_commands.start_pomodoro(user_id, db, scheduler),
-            '/list_tasks': lambda: slack_commands.list_tasks(user_id, db),
-            '/delete_task': lambda: process_delete_task(text, user_id),  # task_id en text
-            '/stats': lambda: slack_commands.stats(user_id, db),
-            '/recent_tasks': lambda: slack_commands.recent_tasks(user_id, db),
-            '/timer_status': lambda: slack_commands.timer_status(user_id, db),
-        }
-
-        handler = command_handlers.get(command)
-        if handler:
-            response = handler()
-            logging.info(f"Respuesta enviada: {response}")
-            return response
-        else:
+        command = services().commands.get(command_name)
+        if command is None:
             logging.warning("Comando no reconocido.")
             return make_response("Comando no reconocido.", 200)
+
+        try:
+            handler = command.prepare(CommandRequest(command_name, data.get('user_id'), data.get('user_name'),
+                                                     data.get('text')))
+        except UsageError as e:
+            return str(e)
+
+        # Si Slack reintenta (X-Slack-Retry-Num) o repite la petición, se responde sin volver a ejecutar el comando
+        key = request_key(data, request.get_data())
+        previous = _claim(key)
+        if previous is not None:
+            state, result = previous
+            DUPLICATE_REQUESTS.inc(command_name, state)
+            logging.info("Petición repetida de %s (reintento %s, %s). No se vuelve a ejecutar.",
+                         command_name, request.headers.get('X-Slack-Retry-Num'), state)
+            return result if state == DONE else {'response_type': 'ephemeral', 'text': ACK_MESSAGE}
+
+        if current_app.config['SLASH_ASYNC_DISPATCH'] and response_url:
+            # Responder a Slack dentro del plazo de 3 segundos y terminar el trabajo en el pool
+            if not services().dispatcher.submit(command_name, handler, response_url):
+                _release(key)
+                return {'response_type': 'ephemeral', 'text': BUSY_MESSAGE}
+            result = {'response_type': 'ephemeral', 'text': ACK_MESSAGE}
+            _finish(key, result)
+            return result
+
+        try:
+            result = handler()
+        except Exception:
+            _release(key)
+            raise
+        if _finish(key, result) and response_url:
+            # Slack ya reintentó y descartó esta respuesta: el resultado se publica en response_url
+            services().dispatcher.post(response_url, result)
+        return result
+    except Exception as e:
+        logging.error("Error al manejar el comando: %s", e)
+        return make_response("Error interno del servidor.", 500)
+
+def _claim(key):
+    # Sin el registro de peticiones (fichero local no disponible) se ejecuta el comando igualmente
+    try:
+        return services().idempotency.claim(key)
+    except sqlite3.Error as e:
+        logging.error("Registro de peticiones de Slack no disponible: %s", e)
+        return None
+
+def _finish(key, result):
+    try:
+        return services().idempotency.finish(key, result)
+    except sqlite3.Error as e:
+        logging.error("No se pudo guardar la respuesta de la petición de Slack: %s", e)
+        return 0
+
+def _release(key):
+    try:
+        services().idempotency.release(key)
+    except sqlite3.Error as e:
+        logging.error("No se pudo liberar la petición de Slack: %s", e)
+
+@bp.route('/slack/interactions', methods=['POST'])
+def slack_interactions():
+    if not services().signature_verifier.is_valid_request(request.get_data(), request.headers):
+        logging.warning("Firma de solicitud inválida. Rechazando la solicitud.")
+        return make_response("Invalid request signature.", 403)
+
+    try:
+        payload = json.loads(request.form.get('payload', '{}'))
+    except ValueError:
+        return make_response("Payload inválido.", 400)
+    user = payload.get('user') or {}
+    response_url = payload.get('response_url')
+    actions = [action for action in payload.get('actions', [])
+               if action.get('action_id') in (task_pages.NEXT_ACTION, task_pages.PREV_ACTION)]
+    if payload.get('type') != 'block_actions' or not actions or not response_url:
+        return make_response("", 200)
+
+    # Solo se consultan las filas de la página pedida; el mensaje original se reemplaza por response_url
+    handler = lambda: task_pages.handle_page_action(actions[0], user.get('id'), user.get('username'))
+    if current_app.config['SLASH_ASYNC_DISPATCH']:
+        services().dispatcher.submit('/slack/interactions', handler, response_url)
+    else:
+        try:
+            services().dispatcher.post(response_url, handler())
+        except ValueError:
+            logging.warning("Cursor de paginación inválido.")
+    return make_response("", 200)
+
+@bp.route('/trello/webhook', methods=['HEAD', 'POST'])
+def trello_webhook():
+    # Trello comprueba la URL con un HEAD al registrar el webhook
+    if request.method == 'HEAD':
+        return make_response("", 200)
+
+    body = request.get_data()
+    if not trello_sync.verify_signature(body, request.headers.get('X-Trello-Webhook'),
+                                        current_app.config['TRELLO_WEBHOOK_URL'], current_app.config['TRELLO_API_SECRET']):
+        logging.warning("Firma de webhook de Trello inválida. Rechazando la solicitud.")
+        return make_response("Invalid webhook signature.", 403)
+
+    try:
+        trello_sync.handle_webhook(request.get_json(force=True))
     except Exception as e:
-        logging.error(f"Error al manejar el comando: {e}")
+        db.session.rollback()
+        logging.error("Error al procesar el webhook de Trello: %s", e)
         return make_response("Error interno del servidor.", 500)
+    return make_response("", 200)
+
 
-def process_assign_task(text):
-    """ Procesar /assign_task para manejar múltiples parámetros. """
-    parts = text.split()
-    if len(parts) != 2:
-        return "Por favor, proporciona un ID de tarea válido y un usuario. Uso: /assign_task [task_id] [@usuario]"
-    task_id, assigned_user = parts
-    return trello_integration.assign_task(task_id, assigned_user)
-
-def process_set_priority(text):
-    """ Procesar /set_priority para manejar múltiples parámetros. """
-    parts = text.split()
-    if len(parts) != 2:
-        return "Por favor, proporciona un ID de tarea válido y una prioridad. Uso: /set_priority [task_id] [high/medium/low]"
-    task_id, priority = parts
-    return trello_integration.set_priority(task_id, priority)
-
-def process_delete_task(text, user_id):
-    """ Procesar /delete_task para manejar el ID de tarea. """
-    if not text.isdigit():
-        return "Por favor, proporciona un ID de tarea válido. Uso: /delete_task [ID]"
-    return slack_commands.delete_task(user_id, text, db)
+app = create_app()
 
 if __name__ == "__main__":
+    app.extensions['services'].start_background()
     app.run(port=5000)
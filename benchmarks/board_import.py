@@ -0,0 +1,79 @@
+""" Importación de una exportación grande de Trello y exportación de las tareas resultantes.
+
+Genera una exportación JSON sintética con --cards tarjetas y --actions acciones (las acciones van antes
+que las tarjetas y los miembros al final, como en las exportaciones reales), la importa dos veces sobre
+una base de datos nueva (la segunda actualiza las tareas por su tarjeta) y exporta las tareas a CSV y JSONL.
+Muestra filas por segundo y la memoria máxima del proceso.
+
+Uso: python benchmarks/board_import.py [--cards 200000] [--actions 500000] [--batch-size 5000]
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+def write_export(path, cards, actions, members=50):
+    """ Escribir la exportación tarjeta a tarjeta, sin tenerla entera en memoria. """
+    labels = [{'id': f'label-{name}', 'name': name, 'color': 'red'} for name in ('Alta', 'media', 'low', 'bug')]
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write('{"id": "board-import", "name": "Tablero grande", "prefs": {"background": "blue"}, "actions": [')
+        for i in range(actions):
+            out.write((',' if i else '') + json.dumps({
+                'id': f'action-{i}', 'type': 'commentCard', 'date': '2026-01-01T00:00:00.000Z',
+                'data': {'text': 'comentario ' * 20, 'card': {'id': f'card-{i % max(cards, 1)}'}}}))
+        out.write('], "cards": [')
+        for i in range(cards):
+            out.write((',' if i else '') + json.dumps({
+                'id': f'card-{i}', 'name': f'Tarjeta {i}', 'desc': 'descripción ' * 30, 'closed': i % 20 == 0,
+                'due': '2026-03-01T12:00:00.000Z' if i % 3 else None, 'idMembers': [f'member-{i % members}'],
+                'labels': [labels[i % len(labels)]]}))
+        out.write('], "labels": ' + json.dumps(labels) + ', "members": [')
+        out.write(','.join(json.dumps({'id': f'member-{i}', 'username': f'user{i}'}) for i in range(members)))
+        out.write('], "checklists": []}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=200000)
+    parser.add_argument('--actions', type=int, default=500000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SLACK_SIGNING_SECRET', 'benchmark')
+    from app import create_app
+    from models import db
+    from modules.board_io import export_rows, import_board, iter_export
+
+    with tempfile.TemporaryDirectory() as directory:
+        export = os.path.join(directory, 'board.json')
+        write_export(export, args.cards, args.actions)
+        print(f"Exportación de {os.path.getsize(export) / 1e6:.0f} MB: {args.cards} tarjetas, {args.actions} acciones")
+
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'import.db')}"})
+        with app.app_context():
+            db.create_all()
+            for label in ('importación', 'reimportación'):
+                started = time.perf_counter()
+                with open(export, encoding='utf-8') as fp:
+                    count = import_board(iter_export(fp, ('cards', 'members')), 'U_IMPORT', args.batch_size)
+                elapsed = time.perf_counter() - started
+                print(f"{label}: {count} tareas en {elapsed:.1f} s ({count / elapsed:.0f} filas/s)")
+
+            for fmt in ('csv', 'jsonl'):
+                with open(os.path.join(directory, f'tasks.{fmt}'), 'w', encoding='utf-8', newline='') as out:
+                    started = time.perf_counter()
+                    count = export_rows('tasks', fmt, out, batch_size=args.batch_size)
+                    elapsed = time.perf_counter() - started
+                print(f"exportación {fmt}: {count} filas en {elapsed:.1f} s ({count / elapsed:.0f} filas/s)")
+    print(f"Memoria máxima del proceso: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+""" Servidor HTTP local que imita las rutas de la API de Trello que usa la aplicación.
+
+Permite inyectar latencia, errores 5xx y respuestas 429 para medir la aplicación sin tocar Trello.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BOARD_ID = 'fake-board'
+# Fecha del primer comentario de cada tarjeta; el comentario i se escribe i segundos después
+COMMENTS_START = datetime(2026, 1, 1)
+
+
+class FakeTrello:
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=0.5,
+                 host='127.0.0.1', port=0, seed=None, comments_per_card=3):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.comments_per_card = comments_per_card
+        self.board = {
+            'id': BOARD_ID, 'name': 'Tablero de pruebas',
+            'lists': [{'id': 'list-todo', 'name': 'Por hacer', 'pos': 1}],
+            'labels': [{'id': f'label-{name}', 'name': name, 'color': color}
+                       for name, color in (('high', 'red'), ('medium', 'yellow'), ('low', 'green'))],
+            'members': [{'id': f'member-{i}', 'username': f'user{i}', 'fullName': f'Usuario {i}'} for i in range(50)],
+        }
+        self.requests = 0
+        self.injected_errors = 0
+        self.injected_rate_limits = 0
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/1"
+
+    def env(self):
+        """ Variables de entorno que dirigen el cliente de Trello de la aplicación a este servidor. """
+        return {'TRELLO_API_URL': self.url, 'TRELLO_API_KEY': 'fake-key', 'TRELLO_TOKEN': 'fake-token',
+                'TRELLO_BOARD_ID': BOARD_ID}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-trello", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        return {'requests': self.requests, 'injected_errors': self.injected_errors,
+                'injected_rate_limits': self.injected_rate_limits}
+
+    def _fault(self):
+        """ Decidir si esta petición recibe un 429, un 500 o la respuesta normal. """
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            if roll < self.rate_limit_rate:
+                self.injected_rate_limits += 1
+                return delay, 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.injected_errors += 1
+                return delay, 500
+        return delay, None
+
+    def _route(self, method, path, query):
+        parts = path.strip('/').split('/')[1:]  # sin el prefijo '1'
+        if method == 'GET' and parts == ['boards', BOARD_ID]:
+            return 200, self.board
+        if method == 'GET' and parts[:1] == ['batch']:
+            urls = query.get('urls', [''])[0].split(',')
+            return 200, [{'200': []} for _ in urls if _]
+        if method == 'GET' and parts[:1] == ['boards']:
+            return 200, []
+        if method == 'GET' and parts[:1] == ['cards'] and parts[-1:] == ['actions']:
+            return 200, self._comments(parts[1], query)
+        if method == 'POST' and parts == ['cards']:
+            return 200, {'id': f'card-fake-{next(self._ids)}', 'name': query.get('name', [''])[0]}
+        if method == 'POST' and parts[:1] == ['lists']:
+            return 200, {'id': f'list-{next(self._ids)}', 'name': query.get('name', [''])[0]}
+        if method == 'POST' and parts[:1] == ['boards'] and parts[-1:] == ['labels']:
+            return 200, {'id': f'label-{next(self._ids)}', 'name': query.get('name', [''])[0]}
+        if method == 'POST' and parts[:1] == ['cards']:
+            return 200, {'id': f'action-{next(self._ids)}'}
+        if method in ('PUT', 'DELETE') and parts[:1] == ['cards']:
+            return 200, {'id': parts[1]}
+        return 404, {'message': 'not found'}
+
+    def _comments(self, card_id, query):
+        """ Acciones commentCard de la tarjeta, de la más reciente a la más antigua, con since/before/limit. """
+        def position(action_id):
+            return int(action_id.rsplit('-', 1)[1])
+
+        newest = self.comments_per_card - 1
+        oldest = 0
+        if 'since' in query:
+            oldest = max(oldest, position(query['since'][0]) + 1)
+        if 'before' in query:
+            newest = min(newest, position(query['before'][0]) - 1)
+        limit = int(query.get('limit', ['50'])[0])
+        return [{'id': f'{card_id}-action-{i}', 'type': 'commentCard', 'idMemberCreator': 'member-0',
+                 'date': (COMMENTS_START + timedelta(seconds=i)).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                 'data': {'text': f'Comentario {i}', 'card': {'id': card_id}}}
+                for i in range(newest, max(oldest, newest - limit + 1) - 1, -1)]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                delay, fault = fake._fault()
+                time.sleep(delay)
+                headers = {}
+                if fault == 429:
+                    status, body = 429, {'message': 'API_TOKEN_LIMIT_EXCEEDED'}
+                    headers['Retry-After'] = str(fake.retry_after)
+                elif fault == 500:
+                    status, body = 500, {'message': 'injected error'}
+                else:
+                    url = urlparse(self.path)
+                    status, body = fake._route(self.command, url.path, parse_qs(url.query))
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeTrello(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, port=args.port).start()
+    for name, value in server.env().items():
+        print(f"{name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
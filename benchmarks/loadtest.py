@@ -0,0 +1,344 @@
+""" Prueba de carga de extremo a extremo de /slash/events.
+
+Arranca la aplicación Flask contra un Trello local (benchmarks/fake_trello.py) y una base de datos
+SQLite temporal, envía comandos slash firmados con una mezcla de comandos a un ritmo fijo y mide,
+por comando, la latencia hasta la confirmación HTTP y hasta que el resultado llega al response_url.
+
+Uso:
+    python benchmarks/loadtest.py --rate 50 --duration 30 --trello-latency 0.1 --output base.json
+    python benchmarks/loadtest.py --rate 50 --duration 30 --trello-latency 0.1 --compare base.json
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_trello import FakeTrello  # noqa: E402
+
+SIGNING_SECRET = 'loadtest-signing-secret'
+
+# Peso de cada comando en la mezcla y el texto que envía (user_id, tareas del usuario, generador aleatorio)
+COMMAND_MIX = {
+    '/list_tasks': (20, lambda user, tasks, rng: ''),
+    '/create_task': (10, lambda user, tasks, rng: f"Tarea de carga {rng.randrange(10 ** 9)}"),
+    '/start_timer': (10, lambda user, tasks, rng: ''),
+    '/stop_timer': (10, lambda user, tasks, rng: ''),
+    '/timer_status': (10, lambda user, tasks, rng: ''),
+    '/stats': (10, lambda user, tasks, rng: rng.choice(['', 'today', 'week', 'month'])),
+    '/priority_list': (8, lambda user, tasks, rng: ''),
+    '/recent_tasks': (8, lambda user, tasks, rng: ''),
+    '/my_tasks': (5, lambda user, tasks, rng: ''),
+    '/set_priority': (5, lambda user, tasks, rng: f"{rng.choice(tasks)} {rng.choice(['high', 'medium', 'low'])}"),
+    '/view_comments': (2, lambda user, tasks, rng: str(rng.choice(tasks))),
+    '/get_tip': (2, lambda user, tasks, rng: ''),
+}
+
+# Respuestas que cuentan como error aunque el HTTP sea 200
+ERROR_PREFIXES = ("Error", "Hubo un error", "El comando tardó demasiado", "El servidor está ocupado")
+
+
+def sign(body, timestamp):
+    basestring = f"v0:{timestamp}:{body}".encode()
+    return 'v0=' + hmac.new(SIGNING_SECRET.encode(), basestring, hashlib.sha256).hexdigest()
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+class ResponseCollector:
+    """ Servidor que hace de response_url: anota cuándo llega el resultado de cada petición. """
+
+    def __init__(self):
+        self.results = {}
+        self._lock = threading.Lock()
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with collector._lock:
+                    collector.results[self.path.strip('/')] = (time.perf_counter(), body)
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="response-url", daemon=True).start()
+
+    def url(self, request_id):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{request_id}"
+
+    def get(self, request_id):
+        with self._lock:
+            return self.results.get(request_id)
+
+    def stop(self):
+        self._server.shutdown()
+
+
+def start_app(database_url):
+    """ Importar la aplicación con la configuración de la prueba, migrar la base de datos y servirla. """
+    os.environ.update(DATABASE_URL=database_url, SLACK_SIGNING_SECRET=SIGNING_SECRET, SLACK_BOT_TOKEN='xoxb-loadtest')
+    from flask_migrate import upgrade
+    from werkzeug.serving import make_server
+
+    os.chdir(ROOT)
+    import app as application
+    # Los logs por petición distorsionan la medida; solo se muestran avisos y errores
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    with application.app.app_context():
+        upgrade()
+    server = make_server('127.0.0.1', 0, application.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="flask-app", daemon=True).start()
+    return application, server
+
+
+def seed(application, users, tasks_per_user):
+    """ Tareas iniciales de cada usuario para que las lecturas devuelvan datos. """
+    from models import db, Task
+    task_ids = {}
+    with application.app.app_context():
+        for user in users:
+            tasks = [Task(name=f"Tarea {i} de {user}", user_id=user, trello_card_id=f"card-{user}-{i}",
+                          priority=('high', 'medium', 'low', None)[i % 4], assigned_to=user if i % 3 == 0 else None)
+                     for i in range(tasks_per_user)]
+            db.session.add_all(tasks)
+            db.session.flush()
+            task_ids[user] = [task.id for task in tasks]
+        db.session.commit()
+    return task_ids
+
+
+def is_error(text):
+    return any(text.startswith(prefix) for prefix in ERROR_PREFIXES)
+
+
+def result_text(body):
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body.decode(errors='replace')
+    return payload.get('text', '') if isinstance(payload, dict) else str(payload)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    trello = FakeTrello(latency=args.trello_latency, jitter=args.trello_jitter, error_rate=args.trello_error_rate,
+                        rate_limit_rate=args.trello_429_rate, retry_after=args.trello_retry_after, seed=args.seed).start()
+    os.environ.update(trello.env())
+    os.environ.setdefault('SLASH_WORKERS', str(args.workers))
+
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    application, server = start_app(f"sqlite:///{database.name}")
+    app_url = f"http://127.0.0.1:{server.server_port}/slash/events"
+
+    users = [f"ULOAD{i:04d}" for i in range(args.users)]
+    task_ids = seed(application, users, args.tasks_per_user)
+    collector = ResponseCollector()
+
+    commands = list(COMMAND_MIX)
+    weights = [COMMAND_MIX[name][0] for name in commands]
+    total = int(args.rate * args.duration)
+    plan = []
+    for i in range(total):
+        command = rng.choices(commands, weights)[0]
+        user = rng.choice(users)
+        plan.append((f"r{i}", command, user, COMMAND_MIX[command][1](user, task_ids[user], rng)))
+
+    sent = {}
+    local = threading.local()
+
+    def send(request_id, command, user, text, scheduled):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = urlencode({'command': command, 'user_id': user, 'user_name': user.lower(), 'text': text,
+                          'response_url': collector.url(request_id)})
+        timestamp = str(int(time.time()))
+        headers = {'Content-Type': 'application/x-www-form-urlencoded',
+                   'X-Slack-Request-Timestamp': timestamp, 'X-Slack-Signature': sign(body, timestamp)}
+        try:
+            response = session.post(app_url, data=body, headers=headers, timeout=args.http_timeout)
+            status, ack_text = response.status_code, result_text(response.content)
+        except requests.RequestException as e:
+            status, ack_text = None, str(e)
+        sent[request_id] = (command, scheduled, time.perf_counter(), status, ack_text)
+
+    # Ritmo abierto: la latencia se mide desde el instante programado, no desde el envío real
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for i, (request_id, command, user, text) in enumerate(plan):
+            scheduled = started + i / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, request_id, command, user, text, scheduled)
+    sending_time = time.perf_counter() - started
+
+    # Esperar los resultados que aún están en la cola de comandos
+    drain_until = time.perf_counter() + args.drain
+    while time.perf_counter() < drain_until:
+        pending = [request_id for request_id, (_, _, _, status, text) in sent.items()
+                   if status == 200 and not is_error(text) and collector.get(request_id) is None]
+        if not pending:
+            break
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - started
+
+    results = summarize(sent, collector, elapsed)
+    results['config'] = {name: value for name, value in vars(args).items() if name not in ('output', 'compare')}
+    results['config']['sending_seconds'] = sending_time
+    results['trello'] = trello.stats()
+    results['git_commit'] = git_commit()
+    collector.stop()
+    server.shutdown()
+    trello.stop()
+    os.unlink(database.name)
+    return results
+
+
+def summarize(sent, collector, elapsed):
+    by_command = {}
+    for request_id, (command, scheduled, acked, status, ack_text) in sent.items():
+        stats = by_command.setdefault(command, {'ack': [], 'end_to_end': [], 'requests': 0, 'errors': 0,
+                                                'lost': 0})
+        stats['requests'] += 1
+        stats['ack'].append(acked - scheduled)
+        if status != 200 or is_error(ack_text):
+            stats['errors'] += 1
+            continue
+        result = collector.get(request_id)
+        if result is None:
+            # Respuesta síncrona (sin despacho asíncrono) o resultado que no llegó a tiempo
+            if ack_text.startswith("Procesando"):
+                stats['lost'] += 1
+                stats['errors'] += 1
+            else:
+                stats['end_to_end'].append(acked - scheduled)
+            continue
+        finished, body = result
+        stats['end_to_end'].append(finished - scheduled)
+        if is_error(result_text(body)):
+            stats['errors'] += 1
+
+    report = {'elapsed_seconds': elapsed, 'commands': {}}
+    totals = {'requests': 0, 'errors': 0, 'end_to_end': []}
+    for command, stats in sorted(by_command.items()):
+        report['commands'][command] = {
+            'requests': stats['requests'],
+            'errors': stats['errors'],
+            'lost': stats['lost'],
+            'error_rate': stats['errors'] / stats['requests'],
+            'throughput': len(stats['end_to_end']) / elapsed,
+            'ack_p50': percentile(stats['ack'], 50),
+            'ack_p99': percentile(stats['ack'], 99),
+            'p50': percentile(stats['end_to_end'], 50),
+            'p95': percentile(stats['end_to_end'], 95),
+            'p99': percentile(stats['end_to_end'], 99),
+        }
+        totals['requests'] += stats['requests']
+        totals['errors'] += stats['errors']
+        totals['end_to_end'] += stats['end_to_end']
+    report['total'] = {
+        'requests': totals['requests'],
+        'errors': totals['errors'],
+        'error_rate': totals['errors'] / max(totals['requests'], 1),
+        'throughput': len(totals['end_to_end']) / elapsed,
+        'p50': percentile(totals['end_to_end'], 50),
+        'p95': percentile(totals['end_to_end'], 95),
+        'p99': percentile(totals['end_to_end'], 99),
+    }
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ms(value):
+    return f"{value * 1000:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def print_report(results, baseline=None):
+    print(f"{'comando':<16} {'peticiones':>10} {'errores':>8} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'Δp99 ms':>9}" if baseline else ""))
+    rows = list(results['commands'].items()) + [('TOTAL', results['total'])]
+    for command, stats in rows:
+        line = (f"{command:<16} {stats['requests']:>10} {stats['error_rate']:>7.1%} {stats['throughput']:>7.1f} "
+                f"{ms(stats['p50'])} {ms(stats['p95'])} {ms(stats['p99'])}")
+        if baseline:
+            previous = baseline['total'] if command == 'TOTAL' else baseline['commands'].get(command)
+            if previous and previous.get('p99') is not None and stats['p99'] is not None:
+                line += f" {(stats['p99'] - previous['p99']) * 1000:+9.1f}"
+        print(line)
+    print(f"Trello: {results['trello']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=20, help="peticiones por segundo")
+    parser.add_argument('--duration', type=float, default=15, help="segundos enviando peticiones")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks-per-user', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=8, help="SLASH_WORKERS de la aplicación")
+    parser.add_argument('--concurrency', type=int, default=64, help="conexiones simultáneas del generador")
+    parser.add_argument('--http-timeout', type=float, default=10)
+    parser.add_argument('--drain', type=float, default=30, help="segundos de espera para los resultados pendientes")
+    parser.add_argument('--trello-latency', type=float, default=0.05)
+    parser.add_argument('--trello-jitter', type=float, default=0.02)
+    parser.add_argument('--trello-error-rate', type=float, default=0.0)
+    parser.add_argument('--trello-429-rate', type=float, default=0.0)
+    parser.add_argument('--trello-retry-after', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="fichero JSON de resultados (por defecto loadtest-<commit>.json)")
+    parser.add_argument('--compare', help="resultados JSON anteriores con los que comparar el p99")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    output = args.output or f"loadtest-{results['git_commit'] or 'local'}.json"
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+""" Tiempo que los hilos de las peticiones pasan escribiendo logs, antes y después de la cola de logging.
+
+Cada hilo repite las líneas de log de un /create_task que falla una vez en Trello: comando recibido,
+intentos, error con el cuerpo de la respuesta (unos KB) y el tiempo del comando. Se compara:
+
+- antes: logging.basicConfig a INFO (formateo y escritura en el hilo de la petición), f-strings y el cuerpo
+  de la respuesta en la línea de error;
+- después: configure_logging() (JSON, cola y hilo de fondo), formateo diferido y el cuerpo en una línea
+  DEBUG marcada con PAYLOAD, con LOG_LEVEL=INFO y con LOG_LEVEL=DEBUG y muestreo al 10 %.
+
+Entre petición y petición cada hilo espera --io-ms (la base de datos y Trello), como en el servidor real.
+Los logs se escriben en un fichero temporal. Cada configuración se mide en un proceso nuevo.
+
+Uso: python benchmarks/logging_overhead.py [--threads 8] [--requests 2000] [--io-ms 1]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+BODY = json.dumps({'message': 'invalid value for idList', 'error': 'ERROR', 'details': ['x' * 64] * 60})
+
+MODES = {
+    'antes (basicConfig, f-strings)': ('before', {}),
+    'después (cola JSON, INFO)': ('after', {'LOG_LEVEL': 'INFO'}),
+    'después (cola JSON, DEBUG al 10 %)': ('after', {'LOG_LEVEL': 'DEBUG', 'LOG_PAYLOAD_SAMPLE_RATE': '0.1'}),
+}
+
+
+def before_request(logging, i):
+    logging.info(f"Comando recibido: /create_task")
+    logging.info(f"Intentando crear tarea: tarea {i}")
+    logging.info(f"Intentando crear tarjeta: tarea {i}")
+    logging.error(f"Error al crear la tarjeta: 400 - {BODY}")
+    logging.info(f"Comando /create_task ejecutado en {12.3456:.0f} ms (base de datos {1.234:.0f} ms, Trello {10.1:.0f} ms)")
+
+
+def after_request(logging, i, payload):
+    logging.info("Comando recibido: %s", '/create_task')
+    logging.info("Intentando crear tarea: %s", f"tarea {i}")
+    logging.info("Intentando crear tarjeta: %s", f"tarea {i}")
+    logging.error("Error al %s: Trello respondió %s", 'crear la tarjeta', 400)
+    logging.debug("Respuesta de Trello al %s: %s", 'crear la tarjeta', BODY, extra=payload)
+    logging.info("Comando %s ejecutado en %.0f ms (base de datos %.0f ms, Trello %.0f ms)",
+                 '/create_task', 12.3456, 1.234, 10.1)
+
+
+def run(mode, threads, requests, io_seconds, path):
+    import logging
+
+    stream = open(path, 'a', encoding='utf-8')
+    if mode == 'before':
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=stream)
+        request = lambda i: before_request(logging, i)
+    else:
+        from modules.log_pipeline import PAYLOAD, configure_logging
+        configure_logging(stream)
+        request = lambda i: after_request(logging, i, PAYLOAD)
+
+    samples = []
+    lock = threading.Lock()
+
+    def loop():
+        local = []
+        for i in range(requests):
+            started = time.perf_counter()
+            request(i)
+            local.append(time.perf_counter() - started)
+            time.sleep(io_seconds)
+        with lock:
+            samples.extend(local)
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    logging.shutdown()
+    samples.sort()
+    print(json.dumps({'mean': statistics.mean(samples), 'p99': samples[int(len(samples) * 0.99)],
+                      'elapsed': elapsed, 'bytes': os.path.getsize(path)}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help="peticiones por hilo")
+    parser.add_argument('--io-ms', type=float, default=1.0, help="espera simulada por petición")
+    parser.add_argument('--run', choices=('before', 'after'), help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        run(args.run, args.threads, args.requests, args.io_ms / 1000, args.output)
+        return
+
+    for label, (mode, env) in MODES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--run', mode, '--threads', str(args.threads),
+                 '--requests', str(args.requests), '--io-ms', str(args.io_ms), '--output', os.path.join(directory, 'app.log')],
+                env={**os.environ, **env}, text=True)
+        result = json.loads(output)
+        print(f"{label}: {result['mean'] * 1e6:.0f} µs por petición en el hilo (p99 {result['p99'] * 1e6:.0f} µs), "
+              f"{result['bytes'] / 1024:.0f} KB de log")
+
+
+if __name__ == '__main__':
+    main()
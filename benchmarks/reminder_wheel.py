@@ -0,0 +1,69 @@
+""" Coste de programar, reprogramar, cancelar y disparar recordatorios en ReminderWheel.
+
+Uso: python benchmarks/reminder_wheel.py [N ...]   (por defecto 10000 100000 1000000)
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.reminders import ReminderWheel  # noqa: E402
+
+# Los recordatorios se reparten en una hora, como los de descanso
+SPREAD_SECONDS = 3600
+SAMPLE = 10000
+
+
+def run(n, seed=0):
+    rng = random.Random(seed)
+    base = int(time.time())
+    keys = [('break', f"U{i:07d}") for i in range(n)]
+    dues = [base + rng.randrange(SPREAD_SECONDS) for _ in range(n)]
+    wheel = ReminderWheel()
+
+    started = time.perf_counter()
+    for key, due in zip(keys, dues):
+        wheel.schedule(key, due, (3600, None))
+    schedule = time.perf_counter() - started
+
+    sample = rng.sample(keys, min(SAMPLE, n // 10))
+    started = time.perf_counter()
+    for key in sample:
+        wheel.schedule(key, base + rng.randrange(SPREAD_SECONDS), (3600, None))
+    reschedule = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in sample:
+        wheel.cancel(key)
+    cancel = time.perf_counter() - started
+
+    pending = len(wheel)
+    buckets = 0
+    started = time.perf_counter()
+    for second in range(base, base + SPREAD_SECONDS):
+        buckets += len(wheel.pop_due(second))
+    fire = time.perf_counter() - started
+
+    return {
+        'pending': n,
+        'schedule_us': schedule / n * 1e6,
+        'reschedule_us': reschedule / len(sample) * 1e6,
+        'cancel_us': cancel / len(sample) * 1e6,
+        'fire_us': fire / max(pending, 1) * 1e6,
+        'fire_per_bucket_ms': fire / max(buckets, 1) * 1e3,
+    }
+
+
+def main(sizes):
+    print(f"{'pendientes':>11} {'programar':>10} {'reprogramar':>12} {'cancelar':>9} {'disparo':>8} {'por cubo':>9}")
+    print(f"{'':>11} {'µs/rec':>10} {'µs/rec':>12} {'µs/rec':>9} {'µs/rec':>8} {'ms':>9}")
+    for n in sizes:
+        result = run(n)
+        print(f"{result['pending']:>11} {result['schedule_us']:>10.2f} {result['reschedule_us']:>12.2f} "
+              f"{result['cancel_us']:>9.2f} {result['fire_us']:>8.2f} {result['fire_per_bucket_ms']:>9.3f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
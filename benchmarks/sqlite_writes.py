@@ -0,0 +1,106 @@
+""" Escrituras por segundo sostenidas en SQLite con varios workers y varios hilos por worker.
+
+Cada hilo repite lo que hacen /start_timer, /stop_timer y /create_task (abrir un temporizador, cerrarlo e
+insertar una tarea) durante unos segundos. Se comparan tres configuraciones sobre una base de datos nueva:
+sin perfil (journal por defecto, NullPool), con el perfil de SQLite y con el perfil más el agrupador de escrituras.
+
+Uso: python benchmarks/sqlite_writes.py [--workers 4] [--threads 8] [--seconds 10]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+MODES = {
+    'sin perfil': {'SQLITE_TUNING': False, 'SQLITE_WRITE_COALESCE': False},
+    'perfil SQLite': {'SQLITE_TUNING': True, 'SQLITE_WRITE_COALESCE': False},
+    'perfil + agrupador': {'SQLITE_TUNING': True, 'SQLITE_WRITE_COALESCE': True},
+}
+
+
+def _worker(database, config, worker, threads, seconds, results):
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app
+    from models import Task
+    from modules.slack_commands import _insert_tasks
+    from modules.timers import finish_timer, open_timer
+    from modules.write_coalescer import run_write
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{database}", **config})
+    counts = {'writes': 0, 'locked': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def loop(thread):
+        user_id = f"U{worker:02d}{thread:03d}"
+        done = locked = errors = 0
+        while time.monotonic() < stop_at:
+            with app.app_context():
+                for write in (lambda: open_timer(user_id),
+                              lambda: finish_timer(user_id),
+                              lambda: run_write(lambda: _insert_tasks([Task(name=f"tarea {done}", user_id=user_id)]))):
+                    try:
+                        write()
+                        done += 1
+                    except OperationalError as e:
+                        locked += 'locked' in str(e)
+                        errors += 'locked' not in str(e)
+        with lock:
+            counts['writes'] += done
+            counts['locked'] += locked
+            counts['errors'] += errors
+
+    pool = [threading.Thread(target=loop, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(counts)
+
+
+def run(config, workers, threads, seconds):
+    from app import create_app
+    from models import db
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, 'writes.db')
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{database}", **config})
+        with app.app_context():
+            db.create_all()
+            db.engine.dispose()
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=_worker, args=(database, config, i, threads, seconds, results))
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+        counts = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    return {name: sum(count[name] for count in counts) for name in ('writes', 'locked', 'errors')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SLACK_SIGNING_SECRET', 'benchmark')
+    for label, config in MODES.items():
+        result = run(config, args.workers, args.threads, args.seconds)
+        print(f"{label}: {result['writes'] / args.seconds:.0f} escrituras/s, "
+              f"{result['locked']} 'database is locked', {result['errors']} otros errores")
+
+
+if __name__ == '__main__':
+    main()
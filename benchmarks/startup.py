@@ -0,0 +1,129 @@
+""" Tiempo de arranque y memoria por worker de la aplicación.
+
+Mide el tiempo de `import app` en un proceso nuevo (mediana de varias ejecuciones) y, con gunicorn,
+la memoria RSS/PSS/privada y los hilos de cada worker con y sin --preload, después de una primera petición.
+
+Uso: python benchmarks/startup.py [--workers 4] [--runs 5]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+IMPORT_PROBE = """
+import threading, time, resource
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(elapsed, threading.active_count(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def environment(database):
+    env = dict(os.environ)
+    env.update(DATABASE_URL=f"sqlite:///{database}", SLACK_SIGNING_SECRET='startup', SLACK_BOT_TOKEN='xoxb-startup',
+               PYTHONPATH=ROOT)
+    return env
+
+
+def measure_import(env, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_PROBE], cwd=ROOT, env=env, text=True,
+                                         stderr=subprocess.DEVNULL)
+        elapsed, threads, maxrss = output.split()[-3:]
+        samples.append((float(elapsed), int(threads), int(maxrss)))
+    return {
+        'import_seconds': statistics.median(sample[0] for sample in samples),
+        'threads': samples[-1][1],
+        'max_rss_kb': statistics.median(sample[2] for sample in samples),
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _memory(pid):
+    """ Rss, Pss y memoria privada (kB) de un proceso según /proc/<pid>/smaps_rollup. """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                values[name] = int(rest.split()[0])
+    with open(f"/proc/{pid}/status") as f:
+        threads = next(int(line.split()[1]) for line in f if line.startswith('Threads:'))
+    return {'rss_kb': values['Rss'], 'pss_kb': values['Pss'],
+            'private_kb': values['Private_Clean'] + values['Private_Dirty'], 'threads': threads}
+
+
+def measure_gunicorn(env, workers, preload, empty_config):
+    port = _free_port()
+    # Con --preload se usa gunicorn.conf.py (arranca los hilos en post_worker_init); sin él, una configuración vacía
+    config = 'gunicorn.conf.py' if preload else empty_config
+    command = [sys.executable, '-m', 'gunicorn', '-c', config, '-w', str(workers), '-b', f"127.0.0.1:{port}",
+               'app:app']
+    if preload:
+        command.insert(3, '--preload')
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+                break
+            except requests.RequestException:
+                if process.poll() is not None or time.perf_counter() - started > 60:
+                    raise RuntimeError("gunicorn no arrancó")
+                time.sleep(0.05)
+        ready = time.perf_counter() - started
+        time.sleep(1)
+        children = subprocess.check_output(['pgrep', '-P', str(process.pid)], text=True).split()
+        memory = [_memory(pid) for pid in children]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        'ready_seconds': ready,
+        'workers': len(memory),
+        'worker_rss_kb': statistics.mean(item['rss_kb'] for item in memory),
+        'worker_pss_kb': statistics.mean(item['pss_kb'] for item in memory),
+        'worker_private_kb': statistics.mean(item['private_kb'] for item in memory),
+        'worker_threads': statistics.mean(item['threads'] for item in memory),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = environment(os.path.join(directory, 'startup.db'))
+        empty_config = os.path.join(directory, 'empty.conf.py')
+        open(empty_config, 'w').close()
+        result = measure_import(env, args.runs)
+        print(f"import app: {result['import_seconds'] * 1000:.0f} ms, {result['threads']} hilos, "
+              f"RSS máx {result['max_rss_kb'] / 1024:.1f} MB")
+        for preload in (False, True):
+            result = measure_gunicorn(env, args.workers, preload, empty_config)
+            label = "gunicorn --preload" if preload else "gunicorn"
+            print(f"{label}: listo en {result['ready_seconds']:.2f} s; por worker RSS "
+                  f"{result['worker_rss_kb'] / 1024:.1f} MB, PSS {result['worker_pss_kb'] / 1024:.1f} MB, "
+                  f"privada {result['worker_private_kb'] / 1024:.1f} MB, {result['worker_threads']:.0f} hilos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+""" Latencia de /search_tasks y de la búsqueda por nombre parecido de /start_timer con muchas tareas.
+
+Crea --tasks tareas en una base de datos SQLite nueva (--heavy-share de ellas de un mismo usuario, el resto
+repartidas entre --users usuarios) y mide, para el usuario con más tareas:
+
+- búsqueda con el índice FTS5 (search_tasks) frente a LIKE '%texto%' sobre task.name, la alternativa sin índice;
+- fuzzy_matches con nombres con erratas.
+
+Uso: python benchmarks/task_search.py [--tasks 300000] [--users 500] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+WORDS = ('diseño revisar pruebas integración despliegue api cliente factura informe reunión presupuesto '
+         'migración base datos servidor correo campaña contrato auditoría soporte documentación móvil web '
+         'seguridad rendimiento copia usuarios panel métricas pago inventario').split()
+# ID de Slack del usuario con más tareas
+HEAVY_USER = 'U04HEAVY7Q'
+SYLLABLES = [consonant + vowel for consonant in 'bcdfglmnprstv' for vowel in 'aeiou']
+
+
+def vocabulary(rng, size):
+    """ Las palabras de WORDS y `size` palabras inventadas de dos a cuatro sílabas (nombres de clientes, proyectos…). """
+    invented = {''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size)}
+    return WORDS + sorted(invented)
+
+
+def task_name(rng, vocabulary):
+    # Las palabras comunes aparecen en muchas tareas; las inventadas, en pocas
+    common = rng.sample(WORDS, rng.randint(1, 2))
+    return ' '.join(common + rng.sample(vocabulary, rng.randint(1, 3))) + f" {rng.randint(1, 999)}"
+
+
+def typo(rng, name):
+    """ Cambiar de sitio dos letras contiguas de una palabra, después de las tres primeras. """
+    words = name.split()
+    candidates = [i for i, word in enumerate(words) if len(word) > 4]
+    if not candidates:
+        return name
+    i = rng.choice(candidates)
+    j = rng.randint(3, len(words[i]) - 2)
+    words[i] = words[i][:j] + words[i][j + 1] + words[i][j] + words[i][j + 2:]
+    return ' '.join(words)
+
+
+def timed(function, inputs):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        function(value)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=300000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--heavy-share', type=float, default=0.2, help="fracción de las tareas del usuario con más tareas")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=5000, help="palabras distintas además de las comunes")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SLACK_SIGNING_SECRET', 'benchmark')
+    from app import create_app
+    from models import db, Task
+    from modules.task_search import fuzzy_matches, search_tasks, words
+
+    rng = random.Random(1)
+    words_pool = vocabulary(rng, args.vocabulary)
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'search.db')}"})
+        with app.app_context():
+            db.create_all()
+            heavy = int(args.tasks * args.heavy_share)
+            names = []
+            started = time.perf_counter()
+            for start in range(0, args.tasks, 10000):
+                rows = []
+                for i in range(start, min(start + 10000, args.tasks)):
+                    user_id = HEAVY_USER if i < heavy else f"U05{rng.randrange(args.users):07d}"
+                    rows.append({'name': task_name(rng, words_pool), 'user_id': user_id})
+                    if i < heavy:
+                        names.append(rows[-1]['name'])
+                db.session.execute(Task.__table__.insert(), rows)
+            db.session.commit()
+            print(f"{args.tasks} tareas ({heavy} de {HEAVY_USER}) insertadas e indexadas en {time.perf_counter() - started:.1f} s")
+
+            # Dos palabras del nombre, cortadas (prefijos de al menos tres letras)
+            queries = [' '.join(word[:rng.randint(3, len(word))] for word in rng.sample(name.split()[:-1], 2))
+                       for name in rng.sample(names, args.queries)]
+
+            def like(text):
+                query = db.session.query(Task).filter(Task.user_id == HEAVY_USER)
+                for term in words(text):
+                    query = query.filter(db.func.lower(Task.name).contains(term, autoescape=True))
+                return query.order_by(Task.id).limit(20).all()
+
+            for label, function, inputs in (
+                ("LIKE '%texto%' (sin índice)", like, queries),
+                ("search_tasks (FTS5, prefijos)", lambda text: search_tasks(HEAVY_USER, text), queries),
+                ("fuzzy_matches (nombre con erratas)", lambda name: fuzzy_matches(HEAVY_USER, name),
+                 [typo(rng, name) for name in rng.sample(names, args.queries)]),
+            ):
+                p50, p99 = timed(function, inputs)
+                print(f"{label}: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+""" Lecturas de muchas tarjetas de Trello: una tras otra con el cliente síncrono o a la vez con el asíncrono.
+
+Contra el servidor falso de Trello con latencia inyectada, lee los comentarios de N tarjetas de tres formas:
+GET por tarjeta en secuencia (como get_card_comments en un bucle), GET por tarjeta con gather() y las
+llamadas a /batch de 10 tarjetas de batch_get, lanzadas a la vez, que es como lee comment_cache.refresh.
+
+Uso: python benchmarks/trello_fanout.py [--cards 50] [--latency 0.1] [--concurrency 10] [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from fake_trello import FakeTrello  # noqa: E402
+
+
+def measure(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        results = fn()
+        samples.append(time.perf_counter() - started)
+        failed = sum(1 for result in results if result is None)
+        if failed:
+            print(f"  aviso: {failed} lecturas fallidas")
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.1)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    fake = FakeTrello(latency=args.latency, jitter=args.jitter, seed=1).start()
+    os.environ.update(fake.env())
+    os.environ['TRELLO_FANOUT_CONCURRENCY'] = str(args.concurrency)
+    os.environ.setdefault('TRELLO_POOL_SIZE', str(args.concurrency))
+
+    from modules.trello_async import close_async_client, get_async_client
+    from modules.trello_client import get_client
+    from modules.trello_integration import batch_get
+
+    client = get_client()
+    paths = [f"/cards/card-{i}/actions" for i in range(args.cards)]
+    params = {'filter': 'commentCard'}
+
+    def sequential():
+        return [client.get(path, params=params).json() for path in paths]
+
+    def fanout():
+        return get_async_client().get_many(paths, params)
+
+    def batched():
+        return batch_get([f"{path}?filter=commentCard" for path in paths])
+
+    fanout()  # abrir el bucle y las conexiones fuera de la medida
+    print(f"{args.cards} tarjetas, latencia {args.latency * 1000:.0f} ms, concurrencia {args.concurrency}")
+    for label, fn in (('secuencial', sequential), ('gather()', fanout), ('/batch a la vez', batched)):
+        elapsed = measure(fn, args.runs)
+        print(f"{label}: {elapsed * 1000:.0f} ms ({args.cards / elapsed:.0f} tarjetas/s)")
+    close_async_client()
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Configuración de gunicorn: gunicorn -c gunicorn.conf.py app:app
+import os
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+
+# La aplicación se importa una vez en el maestro y los workers comparten esa memoria (copy-on-write).
+# create_app() no arranca hilos ni abre conexiones, así que es seguro hacerlo antes del fork.
+preload_app = True
+
+# Con la caché en memoria, el commit de un worker solo borra las entradas de ese worker y los demás sirven
+# resultados viejos hasta READ_CACHE_TTL. Con varios workers la caché por defecto es la compartida (SQLite local).
+if workers > 1:
+    os.environ.setdefault('READ_CACHE_BACKEND', 'shared')
+
+# GET /metrics suma las series de todos los workers: cada uno escribe las suyas en este directorio
+# (prometheus_client en modo multiproceso). Tiene que fijarse antes de cargar la aplicación y empezar vacío.
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='slack_api_lab_metrics_')
+
+
+def when_ready(server):
+    # El maestro cargó la aplicación (--preload) pero no atiende peticiones: sus gauges no se exponen
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(os.getpid())
+
+
+def post_worker_init(worker):
+    # Hilos de fondo (scheduler) y conexiones propias de cada worker, ya después del fork
+    worker.wsgi.extensions['services'].start_background()
+
+
+def worker_exit(server, worker):
+    # Liberar la concesión del scheduler para que otro worker tome los recordatorios sin esperar
+    app = getattr(worker, 'wsgi', None)
+    if app is not None:
+        app.extensions['services'].shutdown()
+
+
+def child_exit(server, worker):
+    # Los gauges del worker que terminó dejan de sumarse; sus contadores e histogramas se conservan
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
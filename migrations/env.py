@@ -26,6 +26,16 @@ config.set_main_option(
         '%', '%%'))
 target_metadata = current_app.extensions['migrate'].db.metadata
 
+
+def include_name(name, type_, parent_names):
+    # El índice de búsqueda de tareas (la tabla FTS5 y sus tablas internas, o el índice GIN) no está en los
+    # modelos como tabla ni como índice: autogenerate no debe proponer borrarlo
+    if type_ == 'table':
+        return not name.startswith('task_fts')
+    if type_ == 'index':
+        return name != 'ix_task_name_search'
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -46,7 +56,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True
+        url=url, target_metadata=target_metadata, literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -78,6 +89,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_name=include_name,
             **current_app.extensions['migrate'].configure_args
         )
 
@@ -0,0 +1,42 @@
+"""Reminder table
+
+Revision ID: 0a6d4e92c1b7
+Revises: f39c7a15e8d4
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6d4e92c1b7'
+down_revision = 'f39c7a15e8d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reminder',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(length=50), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=True),
+    sa.Column('interval_seconds', sa.Integer(), nullable=True),
+    sa.Column('timer_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'kind', name='uq_reminder_user_id_kind')
+    )
+    with op.batch_alter_table('reminder', schema=None) as batch_op:
+        batch_op.create_index('ix_reminder_updated_at', ['updated_at'], unique=False)
+
+    # Los recordatorios ya no usan el job store de APScheduler
+    op.execute('DROP TABLE IF EXISTS apscheduler_jobs')
+
+
+def downgrade():
+    with op.batch_alter_table('reminder', schema=None) as batch_op:
+        batch_op.drop_index('ix_reminder_updated_at')
+
+    op.drop_table('reminder')
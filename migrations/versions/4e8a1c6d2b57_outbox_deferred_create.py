@@ -0,0 +1,27 @@
+"""Outbox rows for tasks created while Trello is down
+
+Revision ID: 4e8a1c6d2b57
+Revises: 9b3d7e2f4a61
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8a1c6d2b57'
+down_revision = '9b3d7e2f4a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('trello_outbox', schema=None) as batch_op:
+        batch_op.alter_column('card_id', existing_type=sa.String(length=50), nullable=True)
+
+
+def downgrade():
+    op.execute("DELETE FROM trello_outbox WHERE card_id IS NULL")
+    with op.batch_alter_table('trello_outbox', schema=None) as batch_op:
+        batch_op.alter_column('card_id', existing_type=sa.String(length=50), nullable=False)
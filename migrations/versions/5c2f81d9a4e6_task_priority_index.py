@@ -0,0 +1,24 @@
+"""Index for the paginated priority list
+
+Revision ID: 5c2f81d9a4e6
+Revises: 0a6d4e92c1b7
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2f81d9a4e6'
+down_revision = '0a6d4e92c1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_task_user_id_priority', 'task', ['user_id', 'priority'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_task_user_id_priority', table_name='task')
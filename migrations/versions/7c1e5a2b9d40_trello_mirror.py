@@ -0,0 +1,82 @@
+"""Trello mirror tables and missing task columns
+
+Revision ID: 7c1e5a2b9d40
+Revises: 3392afcc748d
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e5a2b9d40'
+down_revision = '3392afcc748d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('trello_card_id', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('assigned_to', sa.String(length=50), nullable=True))
+
+    op.create_table('trello_card',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.Text(), nullable=True),
+    sa.Column('list_id', sa.String(length=50), nullable=True),
+    sa.Column('due_date', sa.DateTime(), nullable=True),
+    sa.Column('closed', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('trello_member',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('username', sa.String(length=100), nullable=True),
+    sa.Column('full_name', sa.String(length=200), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('trello_label',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('color', sa.String(length=20), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('trello_card_member',
+    sa.Column('card_id', sa.String(length=50), nullable=False),
+    sa.Column('member_id', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['card_id'], ['trello_card.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['member_id'], ['trello_member.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('card_id', 'member_id')
+    )
+    op.create_table('trello_card_label',
+    sa.Column('card_id', sa.String(length=50), nullable=False),
+    sa.Column('label_id', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['card_id'], ['trello_card.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['label_id'], ['trello_label.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('card_id', 'label_id')
+    )
+    op.create_table('trello_comment',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('card_id', sa.String(length=50), nullable=False),
+    sa.Column('member_id', sa.String(length=50), nullable=True),
+    sa.Column('member_name', sa.String(length=200), nullable=True),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_trello_comment_card_id_created_at', 'trello_comment', ['card_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_trello_comment_card_id_created_at', table_name='trello_comment')
+    op.drop_table('trello_comment')
+    op.drop_table('trello_card_label')
+    op.drop_table('trello_card_member')
+    op.drop_table('trello_label')
+    op.drop_table('trello_member')
+    op.drop_table('trello_card')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_column('assigned_to')
+        batch_op.drop_column('trello_card_id')
@@ -0,0 +1,43 @@
+"""Trello outbox
+
+Revision ID: 9b3d7e2f4a61
+Revises: 5c2f81d9a4e6
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3d7e2f4a61'
+down_revision = '5c2f81d9a4e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trello_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('card_id', sa.String(length=50), nullable=False),
+    sa.Column('action', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('coalesce_key', sa.String(length=100), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('claimed_until', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('coalesce_key', name='uq_trello_outbox_coalesce_key')
+    )
+    with op.batch_alter_table('trello_outbox', schema=None) as batch_op:
+        batch_op.create_index('ix_trello_outbox_next_attempt_at', ['next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trello_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_trello_outbox_next_attempt_at')
+
+    op.drop_table('trello_outbox')
@@ -0,0 +1,55 @@
+"""Full-text search index on task names
+
+Revision ID: a4d9e6b2c815
+Revises: c6f2d8a41e93
+Create Date: 2026-10-18 23:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9e6b2c815'
+down_revision = 'c6f2d8a41e93'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE task_fts USING fts5(name, user_id, content='task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, name, user_id) VALUES (new.id, new.name, new.user_id); END",
+    "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, name, user_id) VALUES ('delete', old.id, old.name, old.user_id); END",
+    "CREATE TRIGGER task_fts_update AFTER UPDATE OF name, user_id ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, name, user_id) VALUES ('delete', old.id, old.name, old.user_id); "
+    "INSERT INTO task_fts(rowid, name, user_id) VALUES (new.id, new.name, new.user_id); END",
+    # Indexar las tareas que ya existen
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS task_fts_update",
+    "DROP TRIGGER IF EXISTS task_fts_delete",
+    "DROP TRIGGER IF EXISTS task_fts_insert",
+    "DROP TABLE IF EXISTS task_fts",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute("CREATE INDEX ix_task_name_search ON task USING gin (to_tsvector('simple', name))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_task_name_search")
@@ -0,0 +1,54 @@
+"""Timer daily rollup
+
+Revision ID: b54d0e6f1a27
+Revises: 7c1e5a2b9d40
+Create Date: 2026-10-18 11:45:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b54d0e6f1a27'
+down_revision = '7c1e5a2b9d40'
+branch_labels = None
+depends_on = None
+
+timer = sa.table('timer', sa.column('user_id', sa.String), sa.column('start_time', sa.DateTime),
+                 sa.column('end_time', sa.DateTime))
+
+
+def upgrade():
+    rollup = op.create_table('timer_daily_rollup',
+    sa.Column('user_id', sa.String(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('seconds', sa.Integer(), nullable=False),
+    sa.Column('sessions', sa.Integer(), nullable=False),
+    sa.Column('pomodoros', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+    # Llenar el rollup con el historial de timer, como stats-rebuild-rollups (sin Pomodoros: timer no los distingue)
+    totals = {}
+    rows = op.get_bind().execute(sa.select(timer.c.user_id, timer.c.start_time, timer.c.end_time).where(
+        timer.c.start_time.isnot(None), timer.c.end_time.isnot(None)))
+    for user_id, start_time, end_time in rows:
+        # La sesión cuenta en el día en que empezó; los segundos, en el día en que se trabajaron
+        totals.setdefault((user_id, start_time.date()), [0, 0])[1] += 1
+        current = start_time
+        while current < end_time:
+            chunk_end = min(datetime.combine(current.date() + timedelta(days=1), datetime.min.time()), end_time)
+            totals.setdefault((user_id, current.date()), [0, 0])[0] += int((chunk_end - current).total_seconds())
+            current = chunk_end
+    if totals:
+        op.bulk_insert(rollup, [
+            {'user_id': user_id, 'day': day, 'seconds': seconds, 'sessions': sessions, 'pomodoros': 0}
+            for (user_id, day), (seconds, sessions) in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('timer_daily_rollup')
@@ -0,0 +1,31 @@
+"""Per-card cursor for incremental comment sync
+
+Revision ID: c6f2d8a41e93
+Revises: 4e8a1c6d2b57
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f2d8a41e93'
+down_revision = '4e8a1c6d2b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trello_comment_cursor',
+    sa.Column('card_id', sa.String(length=50), nullable=False),
+    sa.Column('newest_action_id', sa.String(length=50), nullable=True),
+    sa.Column('oldest_action_id', sa.String(length=50), nullable=True),
+    sa.Column('complete', sa.Boolean(), nullable=False),
+    sa.Column('synced_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('card_id')
+    )
+
+
+def downgrade():
+    op.drop_table('trello_comment_cursor')
@@ -0,0 +1,32 @@
+"""Indexes for per-user task and timer queries
+
+Revision ID: d2a8f3c61b95
+Revises: b54d0e6f1a27
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8f3c61b95'
+down_revision = 'b54d0e6f1a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_task_user_id_created_at', 'task', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_task_user_id_due_date', 'task', ['user_id', 'due_date'], unique=False)
+    op.create_index('ix_task_assigned_to', 'task', ['assigned_to'], unique=False)
+    op.create_index('ix_task_trello_card_id', 'task', ['trello_card_id'], unique=True)
+    op.create_index('ix_timer_user_id_end_time', 'timer', ['user_id', 'end_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_timer_user_id_end_time', table_name='timer')
+    op.drop_index('ix_task_trello_card_id', table_name='task')
+    op.drop_index('ix_task_assigned_to', table_name='task')
+    op.drop_index('ix_task_user_id_due_date', table_name='task')
+    op.drop_index('ix_task_user_id_created_at', table_name='task')
@@ -0,0 +1,31 @@
+"""One open timer per user
+
+Revision ID: e81b4c07d3f2
+Revises: d2a8f3c61b95
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81b4c07d3f2'
+down_revision = 'd2a8f3c61b95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cerrar con duración cero los temporizadores abiertos duplicados; se conserva el más reciente de cada usuario
+    op.execute(
+        "UPDATE timer SET end_time = start_time "
+        "WHERE end_time IS NULL AND id NOT IN ("
+        "SELECT max_id FROM (SELECT MAX(id) AS max_id FROM timer WHERE end_time IS NULL GROUP BY user_id) AS latest)"
+    )
+    op.create_index('ix_timer_user_id_open', 'timer', ['user_id'], unique=True,
+                    sqlite_where=sa.text('end_time IS NULL'), postgresql_where=sa.text('end_time IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_timer_user_id_open', table_name='timer')
@@ -1,22 +1,65 @@
 # models.py
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import DDL, event
 
 db = SQLAlchemy()
 
 class Task(db.Model):
+  __table_args__ = (
+      db.Index('ix_task_user_id_created_at', 'user_id', 'created_at'),
+      db.Index('ix_task_user_id_due_date', 'user_id', 'due_date'),
+      db.Index('ix_task_user_id_priority', 'user_id', 'priority'),
+      db.Index('ix_task_assigned_to', 'assigned_to'),
+      db.Index('ix_task_trello_card_id', 'trello_card_id', unique=True),
+  )
+
   id = db.Column(db.Integer, primary_key=True)
   name = db.Column(db.String(100), nullable=False)
   user_id = db.Column(db.String(50), nullable=False)
   due_date = db.Column(db.DateTime, nullable=True)
   priority = db.Column(db.String(20), nullable=True)
+  trello_card_id = db.Column(db.String(50), nullable=True)
+  assigned_to = db.Column(db.String(50), nullable=True)
   created_at = db.Column(db.DateTime, default=datetime.utcnow)
   updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
   def __repr__(self):
       return f"<Task {self.name}>"
 
+# Índice de búsqueda de /search_tasks sobre task.name. En SQLite es una tabla FTS5 sobre task (external content)
+# que mantienen los triggers; en PostgreSQL, un índice GIN de tsvector. Los mismos en la migración a4d9e6b2c815.
+TASK_SEARCH_DDL = {
+  'sqlite': [
+      "CREATE VIRTUAL TABLE task_fts USING fts5(name, user_id, content='task', content_rowid='id', "
+      "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+      "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+      "INSERT INTO task_fts(rowid, name, user_id) VALUES (new.id, new.name, new.user_id); END",
+      "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+      "INSERT INTO task_fts(task_fts, rowid, name, user_id) VALUES ('delete', old.id, old.name, old.user_id); END",
+      "CREATE TRIGGER task_fts_update AFTER UPDATE OF name, user_id ON task BEGIN "
+      "INSERT INTO task_fts(task_fts, rowid, name, user_id) VALUES ('delete', old.id, old.name, old.user_id); "
+      "INSERT INTO task_fts(rowid, name, user_id) VALUES (new.id, new.name, new.user_id); END",
+  ],
+  'postgresql': [
+      "CREATE INDEX ix_task_name_search ON task USING gin (to_tsvector('simple', name))",
+  ],
+}
+
+for dialect, statements in TASK_SEARCH_DDL.items():
+  for statement in statements:
+      event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
+# Los triggers y el índice desaparecen con la tabla; la tabla FTS5 no
+event.listen(Task.__table__, 'after_drop', DDL("DROP TABLE IF EXISTS task_fts").execute_if(dialect='sqlite'))
+
 class Timer(db.Model):
+  __table_args__ = (
+      db.Index('ix_timer_user_id_end_time', 'user_id', 'end_time'),
+      # Como máximo un temporizador abierto por usuario
+      db.Index('ix_timer_user_id_open', 'user_id', unique=True,
+               sqlite_where=db.text('end_time IS NULL'), postgresql_where=db.text('end_time IS NULL')),
+  )
+
   id = db.Column(db.Integer, primary_key=True)
   user_id = db.Column(db.String(50), nullable=False)
   task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=True)
@@ -28,10 +71,138 @@ class Timer(db.Model):
   def __repr__(self):
       return f"<Timer User: {self.user_id}, Task: {self.task_id}>"
 
+class TimerDailyRollup(db.Model):
+  __tablename__ = 'timer_daily_rollup'
+
+  user_id = db.Column(db.String(50), primary_key=True)
+  day = db.Column(db.Date, primary_key=True)
+  seconds = db.Column(db.Integer, nullable=False, default=0)
+  sessions = db.Column(db.Integer, nullable=False, default=0)
+  pomodoros = db.Column(db.Integer, nullable=False, default=0)
+
+  def __repr__(self):
+      return f"<TimerDailyRollup User: {self.user_id}, Day: {self.day}>"
+
+class SchedulerLease(db.Model):
+  __tablename__ = 'scheduler_lease'
+
+  name = db.Column(db.String(50), primary_key=True)
+  holder = db.Column(db.String(200), nullable=False)
+  expires_at = db.Column(db.DateTime, nullable=False)
+
+  def __repr__(self):
+      return f"<SchedulerLease {self.name}: {self.holder}>"
+
+class Reminder(db.Model):
+  __table_args__ = (
+      # Un recordatorio de cada tipo por usuario: repetir el comando lo reprograma
+      db.UniqueConstraint('user_id', 'kind', name='uq_reminder_user_id_kind'),
+      db.Index('ix_reminder_updated_at', 'updated_at'),
+  )
+
+  id = db.Column(db.Integer, primary_key=True)
+  user_id = db.Column(db.String(50), nullable=False)
+  kind = db.Column(db.String(20), nullable=False)  # 'break' o 'pomodoro'
+  due_at = db.Column(db.DateTime, nullable=True)  # None: cancelado o ya enviado
+  interval_seconds = db.Column(db.Integer, nullable=True)  # None: se envía una sola vez
+  timer_id = db.Column(db.Integer, nullable=True)
+  updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+  def __repr__(self):
+      return f"<Reminder {self.kind} User: {self.user_id}>"
+
+class TrelloOutbox(db.Model):
+  __tablename__ = 'trello_outbox'
+  __table_args__ = (
+      # Los cambios pendientes del mismo campo de una tarjeta se fusionan en una fila (los comentarios no tienen clave)
+      db.UniqueConstraint('coalesce_key', name='uq_trello_outbox_coalesce_key'),
+      db.Index('ix_trello_outbox_next_attempt_at', 'next_attempt_at'),
+  )
+
+  id = db.Column(db.Integer, primary_key=True)
+  card_id = db.Column(db.String(50), nullable=True)  # None: 'create' de una tarea que aún no tiene tarjeta
+  action = db.Column(db.String(20), nullable=False)  # 'create', 'priority', 'due', 'member' o 'comment'
+  payload = db.Column(db.Text, nullable=False)  # valor en JSON
+  coalesce_key = db.Column(db.String(100), nullable=True)
+  version = db.Column(db.Integer, nullable=False, default=1)  # sube cada vez que se fusiona un cambio
+  attempts = db.Column(db.Integer, nullable=False, default=0)
+  next_attempt_at = db.Column(db.DateTime, nullable=True)  # None: agotó los reintentos
+  claimed_until = db.Column(db.DateTime, nullable=True)  # un worker la está enviando
+  last_error = db.Column(db.Text, nullable=True)
+  created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+  def __repr__(self):
+      return f"<TrelloOutbox {self.action} Card: {self.card_id}>"
+
 class UserPreference(db.Model):
   id = db.Column(db.Integer, primary_key=True)
   user_id = db.Column(db.String(50), unique=True, nullable=False)
   categories = db.Column(db.String(200), nullable=True)
 
   def __repr__(self):
-      return f"<UserPreference {self.user_id}>"
\ No newline at end of file
+      return f"<UserPreference {self.user_id}>"
+
+# Réplica local del tablero de Trello, mantenida por el webhook de Trello
+trello_card_member = db.Table('trello_card_member',
+  db.Column('card_id', db.String(50), db.ForeignKey('trello_card.id', ondelete='CASCADE'), primary_key=True),
+  db.Column('member_id', db.String(50), db.ForeignKey('trello_member.id', ondelete='CASCADE'), primary_key=True)
+)
+
+trello_card_label = db.Table('trello_card_label',
+  db.Column('card_id', db.String(50), db.ForeignKey('trello_card.id', ondelete='CASCADE'), primary_key=True),
+  db.Column('label_id', db.String(50), db.ForeignKey('trello_label.id', ondelete='CASCADE'), primary_key=True)
+)
+
+class TrelloMember(db.Model):
+  id = db.Column(db.String(50), primary_key=True)
+  username = db.Column(db.String(100), nullable=True)
+  full_name = db.Column(db.String(200), nullable=True)
+
+  def __repr__(self):
+      return f"<TrelloMember {self.username}>"
+
+class TrelloLabel(db.Model):
+  id = db.Column(db.String(50), primary_key=True)
+  name = db.Column(db.String(100), nullable=True)
+  color = db.Column(db.String(20), nullable=True)
+
+  def __repr__(self):
+      return f"<TrelloLabel {self.name}>"
+
+class TrelloCard(db.Model):
+  id = db.Column(db.String(50), primary_key=True)
+  name = db.Column(db.Text, nullable=True)
+  list_id = db.Column(db.String(50), nullable=True)
+  due_date = db.Column(db.DateTime, nullable=True)
+  closed = db.Column(db.Boolean, default=False)
+  updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+  members = db.relationship('TrelloMember', secondary=trello_card_member, lazy='selectin')
+  labels = db.relationship('TrelloLabel', secondary=trello_card_label, lazy='selectin')
+
+  def __repr__(self):
+      return f"<TrelloCard {self.id}>"
+
+class TrelloComment(db.Model):
+  __table_args__ = (db.Index('ix_trello_comment_card_id_created_at', 'card_id', 'created_at'),)
+
+  id = db.Column(db.String(50), primary_key=True)  # ID de la acción commentCard
+  card_id = db.Column(db.String(50), nullable=False)
+  member_id = db.Column(db.String(50), nullable=True)
+  member_name = db.Column(db.String(200), nullable=True)
+  text = db.Column(db.Text, nullable=False)
+  created_at = db.Column(db.DateTime, nullable=False)
+
+  def __repr__(self):
+      return f"<TrelloComment {self.id}>"
+
+class TrelloCommentCursor(db.Model):
+  # Hasta dónde se han copiado en trello_comment los comentarios de una tarjeta que no replica el webhook
+  card_id = db.Column(db.String(50), primary_key=True)
+  newest_action_id = db.Column(db.String(50), nullable=True)  # se piden los posteriores con since
+  oldest_action_id = db.Column(db.String(50), nullable=True)  # "ver más" pide los anteriores con before
+  complete = db.Column(db.Boolean, nullable=False, default=False)  # ya no quedan comentarios más antiguos
+  synced_at = db.Column(db.DateTime, nullable=True)
+
+  def __repr__(self):
+      return f"<TrelloCommentCursor {self.card_id}>"
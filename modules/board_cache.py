@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+import time
+
+from modules.trello_client import get_client
+
+# Prioridades canónicas y los nombres de etiqueta de Trello que las representan
+PRIORITY_LABELS = {
+    'high': {'names': ('high', 'alta'), 'color': 'red'},
+    'medium': {'names': ('medium', 'media'), 'color': 'yellow'},
+    'low': {'names': ('low', 'baja'), 'color': 'green'},
+}
+PRIORITY_ALIASES = {name: priority for priority, spec in PRIORITY_LABELS.items() for name in spec['names']}
+
+
+def normalize_priority(priority):
+    """ Convertir 'alta'/'High'/... en la prioridad canónica ('high', 'medium', 'low') o None. """
+    return PRIORITY_ALIASES.get((priority or '').strip().lower())
+
+
+class BoardMetadataCache:
+    """ Listas, etiquetas y miembros del tablero en memoria, recargados cada `ttl` segundos. """
+
+    def __init__(self, client, board_id, ttl=300.0):
+        self.client = client
+        self.board_id = board_id
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._loaded_at = None
+        self._lists = []
+        self._labels = []
+        self._members = []
+
+    def invalidate(self):
+        """ Forzar la recarga en el próximo acceso. """
+        with self._lock:
+            self._loaded_at = None
+
+    def refresh(self):
+        """ Cargar los metadatos del tablero con una sola llamada a Trello. """
+        response = self.client.get(f"/boards/{self.board_id}", params={
+            'fields': 'name',
+            'lists': 'open',
+            'list_fields': 'name,pos',
+            'labels': 'all',
+            'label_fields': 'name,color',
+            'members': 'all',
+            'member_fields': 'username,fullName',
+        })
+        response.raise_for_status()
+        board = response.json()
+        with self._lock:
+            self._lists = sorted(board.get('lists', []), key=lambda item: item.get('pos', 0))
+            self._labels = board.get('labels', [])
+            self._members = board.get('members', [])
+            self._loaded_at = time.monotonic()
+        logging.info("Metadatos del tablero %s cargados: %s listas, %s etiquetas, %s miembros",
+                     self.board_id, len(self._lists), len(self._labels), len(self._members))
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _ensure_loaded(self):
+        if self._is_stale():
+            # Un solo hilo recarga; el resto espera y reutiliza el resultado
+            with self._refresh_lock:
+                if self._is_stale():
+                    self.refresh()
+
+    def lists(self):
+        self._ensure_loaded()
+        return list(self._lists)
+
+    def labels(self):
+        self._ensure_loaded()
+        return list(self._labels)
+
+    def members(self):
+        self._ensure_loaded()
+        return list(self._members)
+
+    def default_list_id(self):
+        """ ID de la primera lista abierta del tablero, donde se crean las tarjetas nuevas. """
+        lists = self.lists()
+        return lists[0]['id'] if lists else None
+
+    def label_id(self, name):
+        wanted = name.lower()
+        for label in self.labels():
+            if (label.get('name') or '').lower() == wanted:
+                return label['id']
+        return None
+
+    def priority_label_ids(self):
+        """ IDs de todas las etiquetas de prioridad del tablero ('Alta', 'low', ...). """
+        return [label['id'] for label in self.labels() if normalize_priority(label.get('name'))]
+
+    def priority_label_id(self, priority):
+        """ ID de la etiqueta para una prioridad. Si el tablero no la tiene, se crea. """
+        canonical = normalize_priority(priority)
+        if not canonical:
+            return None
+        spec = PRIORITY_LABELS[canonical]
+
+        for refreshed in (False, True):
+            if refreshed:
+                self.refresh()
+            for name in spec['names']:
+                label_id = self.label_id(name)
+                if label_id:
+                    return label_id
+
+        response = self.client.post(f"/boards/{self.board_id}/labels",
+                                    params={'name': canonical, 'color': spec['color']})
+        response.raise_for_status()
+        label = response.json()
+        with self._lock:
+            self._labels = self._labels + [label]
+        logging.info("Etiqueta de prioridad '%s' creada en el tablero %s", canonical, self.board_id)
+        return label['id']
+
+    def member_id(self, user):
+        """ ID del miembro del tablero cuyo username, nombre o ID coincide con `user` (admite '@'). """
+        wanted = user.lstrip('@').lower()
+        if not wanted:
+            return None
+        for member in self.members():
+            # Trello devuelve null en fullName (y a veces en username) de algunos miembros
+            names = (member.get('username'), member.get('fullName'), member['id'])
+            if wanted in ((name or '').lower() for name in names):
+                return member['id']
+        return None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_board_cache():
+    """ Caché compartida del tablero configurado en TRELLO_BOARD_ID. """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                client = get_client()
+                ttl = float(os.getenv("TRELLO_BOARD_CACHE_TTL", "300"))
+                _cache = BoardMetadataCache(client, client.board_id, ttl=ttl)
+    return _cache
+
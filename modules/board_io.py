@@ -0,0 +1,297 @@
+import csv
+import json
+import re
+import sys
+import time
+from datetime import datetime
+
+import click
+import requests
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam
+
+from models import db, Task, Timer
+from modules.board_cache import normalize_priority
+from modules.read_cache import invalidate_user
+from modules.trello_client import get_client
+from modules.trello_sync import parse_trello_date
+from modules.write_coalescer import write_transaction
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Tamaño máximo (en caracteres) de un valor de la exportación: si no se cierra antes, el JSON no es válido
+MAX_VALUE_SIZE = 8 << 20
+# Columnas de Task que se actualizan si la tarjeta ya estaba importada (user_id y created_at se conservan)
+UPDATED_COLUMNS = ('name', 'due_date', 'priority', 'assigned_to', 'updated_at')
+# Tablas exportables y sus columnas, en orden
+EXPORTS = {
+    'tasks': (Task, ('id', 'name', 'user_id', 'due_date', 'priority', 'trello_card_id', 'assigned_to',
+                     'created_at', 'updated_at')),
+    'timers': (Timer, ('id', 'user_id', 'task_id', 'start_time', 'end_time')),
+}
+
+
+class JsonStream:
+    """ Lector de un fichero JSON por trozos: decodifica un valor cada vez, sin cargar el fichero entero. """
+
+    def __init__(self, fp, chunk_size=1 << 20, max_value_size=MAX_VALUE_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ Siguiente carácter que no es espacio, sin consumirlo ('' al final del fichero). """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON inesperado: se esperaba {char!r} y hay {found!r}")
+        self.pos += 1
+
+    def skip(self, char):
+        """ Consumir `char` si es lo siguiente. """
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # El valor sigue en el próximo trozo, salvo que ya ocupe más de lo que cabe en una exportación
+                if len(self.buffer) - self.pos > self.max_value_size:
+                    raise ValueError(f"exportación mal formada: un valor ocupa más de {self.max_value_size} caracteres")
+                if not self._fill():
+                    raise
+                continue
+            # Un número al final del trozo puede continuar en el siguiente
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_export(fp, arrays, chunk_size=1 << 20, max_value_size=MAX_VALUE_SIZE):
+    """ (clave, elemento) de cada elemento de los arrays de primer nivel `arrays` de una exportación de Trello.
+
+    Los arrays se recorren elemento a elemento (también los que se descartan, como actions), así que la
+    memoria depende del elemento más grande y no del tamaño del fichero. Lanza ValueError si el JSON no es válido
+    o si un elemento supera `max_value_size` caracteres.
+    """
+    stream = JsonStream(fp, chunk_size, max_value_size)
+    stream.expect('{')
+    if stream.skip('}'):
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if stream.skip('['):
+            if not stream.skip(']'):
+                while True:
+                    item = stream.value()
+                    if key in arrays:
+                        yield key, item
+                    if not stream.skip(','):
+                        stream.expect(']')
+                        break
+        else:
+            stream.value()
+        if not stream.skip(','):
+            stream.expect('}')
+            return
+
+
+def iter_api_cards(board_id, page_size=1000):
+    """ Tarjetas del tablero desde la API, por páginas de `page_size` (de la más reciente a la más antigua). """
+    client = get_client()
+    before = None
+    while True:
+        params = {'filter': 'all', 'fields': 'name,due,closed,labels,idMembers', 'members': 'true',
+                  'member_fields': 'username', 'limit': page_size}
+        if before:
+            params['before'] = before
+        response = client.get(f"/boards/{board_id}/cards", params=params)
+        response.raise_for_status()
+        cards = response.json()
+        for card in cards:
+            yield 'cards', card
+        if len(cards) < page_size:
+            return
+        before = cards[-1]['id']
+
+
+def _task_row(card, user_id, members, now):
+    priorities = [normalize_priority(label.get('name') or '') for label in card.get('labels') or ()]
+    member_ids = card.get('idMembers') or [member['id'] for member in card.get('members') or ()]
+    member = members.get(member_ids[0]) if member_ids else None
+    return {
+        'name': (card.get('name') or card['id'])[:100],
+        'user_id': user_id,
+        'due_date': parse_trello_date(card.get('due')),
+        'priority': next((p for p in ('high', 'medium', 'low') if p in priorities), None),
+        'trello_card_id': card['id'],
+        'assigned_to': f"@{member}" if member else None,
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def _upsert_tasks(rows):
+    """ Insertar las tareas de `rows` o, si su tarjeta ya estaba importada, actualizarlas. Un solo executemany. """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        existing = {card_id: task_id for task_id, card_id in db.session.query(Task.id, Task.trello_card_id)
+                    .filter(Task.trello_card_id.in_([row['trello_card_id'] for row in rows]))}
+        db.session.bulk_insert_mappings(Task, [row for row in rows if row['trello_card_id'] not in existing])
+        db.session.bulk_update_mappings(Task, [
+            {'id': existing[row['trello_card_id']], **{column: row[column] for column in UPDATED_COLUMNS}}
+            for row in rows if row['trello_card_id'] in existing])
+        return
+
+    stmt = insert(Task.__table__)
+    stmt = stmt.on_conflict_do_update(index_elements=['trello_card_id'],
+                                      set_={column: stmt.excluded[column] for column in UPDATED_COLUMNS})
+    db.session.execute(stmt, rows)
+
+
+def import_board(items, user_id, batch_size=5000, include_archived=False):
+    """ Importar como tareas de `user_id` las tarjetas de `items` ((clave, elemento) de iter_export o iter_api_cards).
+
+    Las tareas se insertan por lotes de `batch_size` con un commit por lote; reimportar el mismo tablero
+    actualiza las tareas por su trello_card_id en vez de duplicarlas. Devuelve cuántas tarjetas se importaron.
+    """
+    members = {}
+    unresolved = {}  # tarjeta -> miembro que aparece en la exportación después de la tarjeta
+    batch = []
+    count = 0
+    now = datetime.utcnow()
+    for key, item in items:
+        if key == 'members':
+            members[item['id']] = item.get('username')
+            continue
+        for member in item.get('members') or ():
+            members[member['id']] = member.get('username')
+        if item.get('closed') and not include_archived:
+            continue
+        row = _task_row(item, user_id, members, now)
+        if row['assigned_to'] is None and item.get('idMembers'):
+            unresolved[item['id']] = item['idMembers'][0]
+        batch.append(row)
+        if len(batch) >= batch_size:
+            # Cada lote en su transacción: la lectura del siguiente (fichero o API) no retiene el bloqueo
+            with write_transaction():
+                _upsert_tasks(batch)
+            count += len(batch)
+            batch = []
+
+    assigned = [{'card_id': card_id, 'member': f"@{members[member_id]}"}
+                for card_id, member_id in unresolved.items() if members.get(member_id)]
+    stmt = Task.__table__.update().where(Task.trello_card_id == bindparam('card_id')) \
+        .values(assigned_to=bindparam('member'))
+    with write_transaction():
+        if batch:
+            _upsert_tasks(batch)
+            count += len(batch)
+        for start in range(0, len(assigned), batch_size):
+            db.session.execute(stmt, assigned[start:start + batch_size])
+        invalidate_user(user_id)
+    return count
+
+
+def export_rows(table, fmt, out, user_id=None, batch_size=5000):
+    """ Escribir en `out` las filas de `table` (tasks o timers) en CSV o JSONL, por lotes ordenados por id. """
+    model, columns = EXPORTS[table]
+    fields = [getattr(model, column) for column in columns]
+    writer = csv.writer(out) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    count = 0
+    last_id = 0
+    while True:
+        query = db.session.query(*fields).filter(model.id > last_id)
+        if user_id:
+            query = query.filter(model.user_id == user_id)
+        rows = query.order_by(model.id).limit(batch_size).all()
+        if not rows:
+            return count
+        for row in rows:
+            values = [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            if writer:
+                writer.writerow(values)
+            else:
+                out.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False) + '\n')
+        count += len(rows)
+        last_id = rows[-1].id
+
+
+def _rate(count, started):
+    elapsed = time.perf_counter() - started
+    return f"{count} filas en {elapsed:.1f} s ({count / elapsed if elapsed else 0:.0f} filas/s)"
+
+
+@click.command('board-import')
+@click.option('--user', 'user_id', required=True, help="ID de Slack del usuario al que se asignan las tareas.")
+@click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False),
+              help="Exportación JSON del tablero (Menú > Imprimir y exportar > JSON). Sin --file se lee de la API.")
+@click.option('--board', 'board_id', help="Tablero a leer de la API (por defecto TRELLO_BOARD_ID).")
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option('--include-archived', is_flag=True, help="Importar también las tarjetas archivadas.")
+@with_appcontext
+def import_board_command(user_id, path, board_id, batch_size, include_archived):
+    """ Importar todas las tarjetas de un tablero de Trello como tareas. """
+    started = time.perf_counter()
+    try:
+        if path:
+            with open(path, encoding='utf-8') as fp:
+                count = import_board(iter_export(fp, ('cards', 'members')), user_id, batch_size, include_archived)
+        else:
+            board_id = board_id or get_client().board_id
+            count = import_board(iter_api_cards(board_id), user_id, batch_size, include_archived)
+    except requests.RequestException as e:
+        raise click.ClickException(f"Error al leer el tablero de Trello: {e}")
+    except ValueError as e:
+        raise click.ClickException(f"Exportación de Trello no válida: {e}")
+    click.echo(f"Tarjetas importadas: {_rate(count, started)}", err=True)
+
+
+@click.command('data-export')
+@click.argument('table', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), help="Fichero de salida (por defecto, stdout).")
+@click.option('--user', 'user_id', help="Exportar solo las filas de este usuario de Slack.")
+@click.option('--batch-size', default=5000, show_default=True)
+@with_appcontext
+def export_command(table, fmt, output, user_id, batch_size):
+    """ Exportar tareas o temporizadores a CSV o JSONL, por lotes. """
+    started = time.perf_counter()
+    if output:
+        with open(output, 'w', encoding='utf-8', newline='') as out:
+            count = export_rows(table, fmt, out, user_id, batch_size)
+    else:
+        count = export_rows(table, fmt, sys.stdout, user_id, batch_size)
+    click.echo(f"{table} exportadas: {_rate(count, started)}", err=True)
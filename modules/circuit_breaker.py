@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+
+from modules.metrics import registry as metrics_registry
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_TRIPS = metrics_registry.counter(
+    'trello_circuit_trips_total', "Veces que el circuito de Trello se abrió, por motivo (errors/slow/probe).",
+    labels=('reason',))
+CIRCUIT_REJECTED = metrics_registry.counter(
+    'trello_circuit_rejected_total', "Llamadas a Trello rechazadas sin enviarse porque el circuito estaba abierto.")
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """ Trello no se llama: el circuito está abierto. Es una RequestException, como cualquier fallo de red. """
+
+
+class CircuitBreaker:
+    """ Circuito sobre las llamadas a Trello.
+
+    Se abre cuando, en los últimos `window` segundos y con al menos `min_calls` llamadas, la proporción de
+    errores o de llamadas lentas supera su umbral. Abierto, rechaza todo durante `cooldown` segundos; luego
+    deja pasar una llamada de prueba (semiabierto) que lo cierra si va bien o lo vuelve a abrir si falla.
+    """
+
+    def __init__(self, window=30.0, min_calls=10, error_rate=0.5, slow_call=5.0, slow_rate=0.5, cooldown=30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._calls = deque()  # (instante, fallo, lenta)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """ Lanza CircuitOpenError si la llamada no debe hacerse. """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                logging.info("Circuito de Trello semiabierto: se permite una llamada de prueba")
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        CIRCUIT_REJECTED.inc()
+        raise CircuitOpenError("Circuito de Trello abierto: Trello no responde bien y no se llama")
+
+    def record(self, failed, seconds):
+        """ Anotar el resultado de una llamada hecha tras before_call(). """
+        slow = seconds >= self.slow_call
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed or slow:
+                    self._open(now, 'probe')
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    logging.info("Circuito de Trello cerrado: la llamada de prueba fue bien")
+                return
+            if self.state == OPEN:
+                return
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._calls.popleft()
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slow_calls = sum(1 for _, _, slow in self._calls if slow)
+            if failures / len(self._calls) >= self.error_rate:
+                self._open(now, 'errors')
+            elif slow_calls / len(self._calls) >= self.slow_rate:
+                self._open(now, 'slow')
+
+    def release(self):
+        """ La llamada permitida no llegó a Trello (p. ej. sin tiempo): no cuenta como resultado. """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def is_open(self):
+        """ True si ahora mismo las llamadas se rechazarían (abierto y sin llegar aún a la prueba). """
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.cooldown
+
+    def state_value(self):
+        return STATE_VALUES[self.state]
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        CIRCUIT_TRIPS.inc(reason)
+        logging.warning("Circuito de Trello abierto (%s) durante %.0fs: modo degradado", reason, self.cooldown)
@@ -0,0 +1,106 @@
+import logging
+import time
+from collections import namedtuple
+
+from modules.metrics import Timings, registry as metrics, set_timings
+
+# Datos del comando slash que recibe cada handler
+CommandRequest = namedtuple('CommandRequest', 'command user_id user_name text')
+
+COMMAND_SECONDS = metrics.histogram('slack_command_duration_seconds', "Tiempo total de ejecución del comando.",
+                                    ('command',))
+COMMAND_DB_SECONDS = metrics.histogram('slack_command_db_seconds', "Tiempo del comando en la base de datos.",
+                                       ('command',))
+COMMAND_TRELLO_SECONDS = metrics.histogram('slack_command_trello_seconds', "Tiempo del comando en llamadas a Trello (suma de las llamadas, también las paralelas).",
+                                           ('command',))
+COMMAND_ERRORS = metrics.counter('slack_command_errors_total', "Comandos que terminaron con una excepción.",
+                                 ('command',))
+
+
+class UsageError(ValueError):
+    """ Argumentos inválidos; el mensaje es el texto de uso que se devuelve al usuario. """
+
+
+def no_args(text):
+    return ()
+
+
+def raw_text(text):
+    return (text or '',)
+
+
+def split_args(count, usage):
+    """ Parser que exige exactamente `count` palabras. """
+    def parse(text):
+        parts = (text or '').split()
+        if len(parts) != count:
+            raise UsageError(usage)
+        return tuple(parts)
+    return parse
+
+
+def task_id_arg(usage):
+    """ Parser de un único ID de tarea numérico. """
+    def parse(text):
+        text = (text or '').strip()
+        if not text.isdigit():
+            raise UsageError(usage)
+        return (text,)
+    return parse
+
+
+class Command:
+    def __init__(self, name, handler, parser=no_args, timeout=None):
+        self.name = name
+        self.handler = handler
+        self.parser = parser
+        self.timeout = timeout
+
+    def prepare(self, request):
+        """ Validar los argumentos. Devuelve una función sin argumentos que ejecuta el comando.
+
+        Lanza UsageError si los argumentos no son válidos, antes de encolar nada.
+        """
+        args = self.parser(request.text)
+        return lambda: self.run(request, args)
+
+    def run(self, request, args):
+        timings = Timings()
+        previous = set_timings(timings)
+        started = time.perf_counter()
+        try:
+            return self.handler(request, *args)
+        except Exception:
+            COMMAND_ERRORS.inc(self.name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            set_timings(previous)
+            COMMAND_SECONDS.observe(self.name, value=elapsed)
+            COMMAND_DB_SECONDS.observe(self.name, value=timings.db)
+            COMMAND_TRELLO_SECONDS.observe(self.name, value=timings.trello)
+            logging.info("Comando %s ejecutado en %.0f ms (base de datos %.0f ms, Trello %.0f ms)",
+                         self.name, elapsed * 1000, timings.db * 1000, timings.trello * 1000)
+
+
+class CommandRegistry:
+    """ Comandos slash disponibles, registrados una sola vez al arrancar. """
+
+    def __init__(self):
+        self._commands = {}
+
+    def add(self, name, handler, parser=no_args, timeout=None):
+        self._commands[name] = Command(name, handler, parser, timeout)
+
+    def get(self, name):
+        return self._commands.get(name)
+
+    def timeouts(self):
+        """ Tiempo máximo declarado por cada comando que lo define. """
+        return {name: command.timeout for name, command in self._commands.items() if command.timeout is not None}
+
+    def __contains__(self, name):
+        return name in self._commands
+
+    def __iter__(self):
+        return iter(self._commands.values())
@@ -0,0 +1,193 @@
+import os
+from datetime import datetime
+from urllib.parse import urlencode
+
+from sqlalchemy import func
+
+from models import db, TrelloCard, TrelloComment, TrelloCommentCursor
+from modules.trello_integration import batch_get, get_card_comments
+from modules.trello_sync import parse_trello_date, upsert_comment
+from modules.write_coalescer import write_transaction
+
+# Acciones commentCard pedidas en cada llamada a Trello (la API admite hasta 1000)
+FETCH_LIMIT = int(os.getenv("TRELLO_COMMENTS_FETCH_LIMIT", "50"))
+# Comentarios por página de /view_comments
+PAGE_SIZE = int(os.getenv("COMMENTS_PAGE_SIZE", "10"))
+
+
+def _actions_path(card_id):
+    return f"/cards/{card_id}/actions"
+
+
+def refresh(card_ids):
+    """ Copiar a trello_comment los comentarios nuevos de las tarjetas que no replica el webhook.
+
+    La primera vez se piden los FETCH_LIMIT más recientes; después solo los posteriores al último visto
+    (since), así que el coste no crece con la longitud del hilo. Las tarjetas se piden en llamadas a /batch de
+    10 tarjetas, todas a la vez.
+    Devuelve las tarjetas cuyos comentarios locales están al día (las replicadas siempre lo están).
+    Las ediciones y borrados de comentarios solo llegan por el webhook.
+    """
+    card_ids = [card_id for card_id in dict.fromkeys(card_ids) if card_id]
+    if not card_ids:
+        return set()
+    fresh = {card_id for (card_id,) in db.session.query(TrelloCard.id).filter(TrelloCard.id.in_(card_ids))}
+    pending = [card_id for card_id in card_ids if card_id not in fresh]
+    if not pending:
+        return fresh
+    # Solo hacen falta los valores: la transacción de lectura se cierra antes de llamar a Trello
+    cursors = {card_id: newest for card_id, newest in db.session.query(
+        TrelloCommentCursor.card_id, TrelloCommentCursor.newest_action_id,
+    ).filter(TrelloCommentCursor.card_id.in_(pending))}
+    db.session.commit()
+
+    paths = []
+    for card_id in pending:
+        params = {'filter': 'commentCard', 'limit': FETCH_LIMIT}
+        if cursors.get(card_id):
+            params['since'] = cursors[card_id]
+        paths.append(f"{_actions_path(card_id)}?{urlencode(params)}")
+    results = batch_get(paths)
+
+    fetched = {}
+    for card_id, actions in zip(pending, results):
+        if actions is None:
+            continue
+        if cursors.get(card_id) and len(actions) == FETCH_LIMIT:
+            # Más comentarios nuevos que una página: el resto, hacia atrás hasta el último visto
+            newer = _pages(card_id, since=cursors[card_id], before=actions[-1]['id'])
+            if newer is None:
+                continue
+            actions = actions + newer
+        fetched[card_id] = actions
+
+    # Otro /view_comments de la misma tarjeta puede haber guardado lo mismo entretanto: todo son UPSERT
+    now = datetime.utcnow()
+    with write_transaction():
+        for card_id, actions in fetched.items():
+            _store_comments(actions)
+            _store_cursor(card_id, actions, now)
+    return fresh | set(fetched)
+
+
+def _insert():
+    """ insert() con ON CONFLICT del dialecto actual, o None si no lo tiene. """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def _comment_row(action):
+    data = action['data']
+    creator = action.get('memberCreator') or {}
+    return {
+        'id': action['id'],
+        'card_id': data['card']['id'],
+        'member_id': action.get('idMemberCreator') or creator.get('id'),
+        'member_name': creator.get('fullName') or creator.get('username'),
+        'text': data['text'],
+        'created_at': parse_trello_date(action['date']),
+    }
+
+
+def _store_comments(actions):
+    """ Guardar los comentarios con un solo INSERT ... ON CONFLICT DO UPDATE. No hace commit. """
+    if not actions:
+        return
+    insert = _insert()
+    if insert is None:
+        for action in actions:
+            upsert_comment(action)
+        return
+    stmt = insert(TrelloComment.__table__)
+    stmt = stmt.on_conflict_do_update(index_elements=['id'], set_={
+        column: stmt.excluded[column] for column in ('member_id', 'member_name', 'text')})
+    db.session.execute(stmt, [_comment_row(action) for action in actions])
+
+
+def _store_cursor(card_id, actions, now):
+    """ Crear el cursor de la tarjeta o avanzar su newest_action_id. No hace commit.
+
+    Un cursor nuevo apunta también al comentario más antiguo recibido; si ya existía, ese extremo y
+    `complete` los mantiene _load_older.
+    """
+    values = {
+        'card_id': card_id,
+        'newest_action_id': actions[0]['id'] if actions else None,
+        'oldest_action_id': actions[-1]['id'] if actions else None,
+        'complete': len(actions) < FETCH_LIMIT,
+        'synced_at': now,
+    }
+    insert = _insert()
+    if insert is None:
+        cursor = db.session.get(TrelloCommentCursor, card_id)
+        if cursor is None:
+            db.session.add(TrelloCommentCursor(**values))
+            return
+        cursor.newest_action_id = values['newest_action_id'] or cursor.newest_action_id
+        cursor.synced_at = now
+        return
+    table = TrelloCommentCursor.__table__
+    stmt = insert(table).values(**values)
+    stmt = stmt.on_conflict_do_update(index_elements=['card_id'], set_={
+        'newest_action_id': func.coalesce(stmt.excluded.newest_action_id, table.c.newest_action_id),
+        'synced_at': stmt.excluded.synced_at,
+    })
+    db.session.execute(stmt)
+
+
+def _pages(card_id, since=None, before=None):
+    """ Todas las acciones entre `since` y `before`, página a página. None si Trello falla a mitad. """
+    actions = []
+    while True:
+        page = get_card_comments(card_id, since=since, before=before, limit=FETCH_LIMIT)
+        if page is None:
+            return None
+        actions.extend(page)
+        if len(page) < FETCH_LIMIT:
+            return actions
+        before = page[-1]['id']
+
+
+def _load_older(card_id, needed):
+    """ Completar la copia local hacia atrás (before) hasta tener `needed` comentarios o toda la historia. """
+    cursor = db.session.get(TrelloCommentCursor, card_id)
+    if cursor is None or cursor.complete:
+        return
+    before = cursor.oldest_action_id
+    have = db.session.query(TrelloComment).filter_by(card_id=card_id).count()
+    db.session.commit()
+    complete = False
+    while have < needed and not complete:
+        actions = get_card_comments(card_id, before=before, limit=FETCH_LIMIT)
+        if actions is None:
+            break
+        if actions:
+            before = actions[-1]['id']
+        complete = len(actions) < FETCH_LIMIT
+        with write_transaction():
+            _store_comments(actions)
+            db.session.query(TrelloCommentCursor).filter_by(card_id=card_id) \
+                .update({'oldest_action_id': before, 'complete': complete}, synchronize_session=False)
+        have += len(actions)
+
+
+def comments_page(card_id, page=1, page_size=PAGE_SIZE):
+    """ (comentarios, hay_más) de la página `page`, del más reciente al más antiguo, leídos de la copia local. """
+    offset = (page - 1) * page_size
+    if db.session.get(TrelloCard, card_id) is None:
+        _load_older(card_id, offset + page_size + 1)
+    comments = db.session.query(TrelloComment).filter_by(card_id=card_id) \
+        .order_by(TrelloComment.created_at.desc(), TrelloComment.id.desc()) \
+        .offset(offset).limit(page_size + 1).all()
+    return comments[:page_size], len(comments) > page_size
+
+
+def is_cached(card_id):
+    """ True si la tarjeta tiene comentarios copiados localmente, aunque ahora no se puedan actualizar. """
+    return db.session.get(TrelloCard, card_id) is not None or db.session.get(TrelloCommentCursor, card_id) is not None
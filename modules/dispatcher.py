@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import requests
+
+from modules.log_pipeline import PAYLOAD
+from modules.metrics import current_timings, set_timings
+
+# Respuesta inmediata que recibe Slack mientras el comando se procesa en segundo plano
+ACK_MESSAGE = "Procesando tu comando…"
+BUSY_MESSAGE = "El servidor está ocupado. Inténtalo de nuevo en unos segundos."
+TIMEOUT_MESSAGE = "El comando tardó demasiado en procesarse. Inténtalo de nuevo."
+ERROR_MESSAGE = "Error interno del servidor."
+
+_local = threading.local()
+
+
+def current_deadline():
+    """ Instante (time.monotonic) en que vence el comando que se ejecuta en este hilo, o None. """
+    return getattr(_local, 'deadline', None)
+
+
+def bind_deadline(fn):
+    """ Envolver `fn` para que herede el vencimiento y las métricas del comando actual al ejecutarse en otro hilo. """
+    deadline = current_deadline()
+    timings = current_timings()
+
+    def wrapper(*args, **kwargs):
+        previous = current_deadline()
+        _local.deadline = deadline
+        previous_timings = set_timings(timings)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.deadline = previous
+            set_timings(previous_timings)
+    return wrapper
+
+
+class CommandDispatcher:
+    """ Pool acotado de workers que ejecuta comandos slash y publica el resultado en su response_url.
+
+    Cada handler corre en un pool aparte; el worker espera su resultado como mucho hasta el vencimiento del
+    comando y, si no llega, publica TIMEOUT_MESSAGE. El handler termina en segundo plano y su resultado se
+    descarta. Un handler que empieza ya vencido (esperó a un hilo libre) no se ejecuta.
+    """
+
+    def __init__(self, app, workers=4, queue_size=100, default_timeout=30.0, timeouts=None, post_timeout=5.0):
+        self.app = app
+        self.workers = workers
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.post_timeout = post_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._executor = None
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="slash-handler")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"slash-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, command, handler, response_url):
+        """ Encolar un comando. Devuelve False si la cola está llena. """
+        self.start()
+        deadline = time.monotonic() + self.timeouts.get(command, self.default_timeout)
+        try:
+            self._queue.put_nowait((command, handler, response_url, deadline))
+        except queue.Full:
+            logging.warning("Cola de comandos llena (%s). Rechazando %s.", self._queue.maxsize, command)
+            return False
+        return True
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(*job)
+            except Exception as e:
+                logging.error("Error inesperado en el worker de comandos: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, command, handler, response_url, deadline):
+        if time.monotonic() > deadline:
+            logging.warning("Comando %s descartado: venció mientras esperaba en la cola.", command)
+            self.post(response_url, TIMEOUT_MESSAGE)
+            return
+
+        future = self._executor.submit(self._execute, command, handler, deadline)
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            logging.warning("Comando %s superó su tiempo máximo de ejecución.", command)
+            future.add_done_callback(lambda _: logging.warning(
+                "Comando %s terminó %.1fs después de su tiempo máximo; resultado descartado.",
+                command, time.monotonic() - deadline))
+            result = TIMEOUT_MESSAGE
+        except Exception as e:
+            logging.error("Error al manejar el comando %s: %s", command, e)
+            result = ERROR_MESSAGE
+
+        if result is not None:
+            self.post(response_url, result)
+
+    def _execute(self, command, handler, deadline):
+        if time.monotonic() > deadline:
+            logging.warning("Comando %s descartado: venció mientras esperaba un hilo libre.", command)
+            return TIMEOUT_MESSAGE
+        _local.deadline = deadline
+        try:
+            with self.app.app_context():
+                return handler()
+        finally:
+            _local.deadline = None
+
+    def post(self, response_url, result):
+        """ Publicar el resultado de un comando en el response_url de Slack. """
+        payload = dict(result) if isinstance(result, dict) else {'text': str(result)}
+        payload.setdefault('response_type', 'ephemeral')
+        try:
+            response = self._session.post(response_url, json=payload, timeout=self.post_timeout)
+            if not response.ok:
+                logging.error("Error al publicar en response_url: Slack respondió %s", response.status_code)
+                logging.debug("Respuesta de Slack: %s", response.text, extra=PAYLOAD)
+        except requests.RequestException as e:
+            logging.error("Error al publicar en response_url: %s", e)
+
+
+def parse_timeouts(value):
+    """ Convertir '/create_task=20,/stats=5' en {'/create_task': 20.0, '/stats': 5.0}. """
+    timeouts = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        command, seconds = item.split('=', 1)
+        timeouts[command.strip()] = float(seconds)
+    return timeouts
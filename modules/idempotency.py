@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from modules.local_store import LocalSQLite
+from modules.metrics import registry as metrics_registry
+
+PENDING = 'pending'
+DONE = 'done'
+
+DUPLICATE_REQUESTS = metrics_registry.counter(
+    'slack_duplicate_requests_total', "Reintentos y duplicados de Slack respondidos sin volver a ejecutar el comando.",
+    labels=('command', 'state'))
+
+
+def request_key(form, body):
+    """ Clave de una invocación: el trigger_id de Slack o, si no viene, el hash del cuerpo (igual en cada reintento). """
+    trigger_id = form.get('trigger_id')
+    if trigger_id:
+        return f"trigger:{trigger_id}"
+    return "body:" + hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyStore:
+    """ Peticiones de Slack ya recibidas y su respuesta, con TTL y tamaño acotado, común a todos los workers.
+
+    Una entrada está PENDING mientras el comando se ejecuta y DONE con la respuesta cuando termina. Una
+    entrada PENDING más antigua que `pending_ttl` (el worker murió) se puede volver a reclamar.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS request (key TEXT PRIMARY KEY, state TEXT NOT NULL, result TEXT, "
+        "retries INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_request_created_at ON request (created_at)",
+    )
+
+    def __init__(self, path, ttl=300.0, pending_ttl=60.0, max_entries=100000):
+        self.store = LocalSQLite(path, self.SCHEMA)
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.max_entries = max_entries
+        self._claims = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, pending_ttl):
+        path = os.getenv('SLACK_IDEMPOTENCY_PATH', os.path.join(tempfile.gettempdir(), 'slack_api_lab_requests.db'))
+        return cls(path, ttl=float(os.getenv('SLACK_IDEMPOTENCY_TTL', '300')), pending_ttl=pending_ttl,
+                   max_entries=int(os.getenv('SLACK_IDEMPOTENCY_MAX_ENTRIES', '100000')))
+
+    def claim(self, key):
+        """ Reservar `key`. Devuelve None si hay que ejecutar el comando, o (estado, respuesta) de la petición original. """
+        now = time.time()
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM request WHERE created_at < ?", (now - self.ttl,))
+            row = connection.execute("SELECT state, result, created_at FROM request WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[0] == PENDING and row[2] < now - self.pending_ttl):
+                connection.execute("INSERT OR REPLACE INTO request (key, state, created_at) VALUES (?, ?, ?)",
+                                   (key, PENDING, now))
+                self._bound(connection)
+                return None
+            connection.execute("UPDATE request SET retries = retries + 1 WHERE key = ?", (key,))
+        state, result, _ = row
+        return state, json.loads(result) if result is not None else None
+
+    def finish(self, key, result):
+        """ Guardar la respuesta. Devuelve cuántos reintentos llegaron mientras el comando se ejecutaba. """
+        with self.store.transaction() as connection:
+            connection.execute("UPDATE request SET state = ?, result = ? WHERE key = ?", (DONE, json.dumps(result), key))
+            row = connection.execute("SELECT retries FROM request WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def release(self, key):
+        """ Olvidar `key` para que un reintento vuelva a ejecutar el comando (p. ej. si no se pudo encolar). """
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM request WHERE key = ?", (key,))
+
+    def _bound(self, connection):
+        # El TTL ya acota la tabla con tráfico normal; contar las filas cuesta, así que solo cada 100 reservas
+        with self._lock:
+            self._claims += 1
+            if self._claims % 100:
+                return
+        excess = connection.execute("SELECT count(*) FROM request").fetchone()[0] - self.max_entries
+        if excess > 0:
+            connection.execute("DELETE FROM request WHERE key IN "
+                               "(SELECT key FROM request ORDER BY created_at LIMIT ?)", (excess,))
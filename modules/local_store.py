@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class LocalSQLite:
+    """ Fichero SQLite local para datos desechables que comparten todos los workers de la máquina.
+
+    Cada hilo de cada proceso abre su propia conexión; las heredadas de un fork no se reutilizan.
+    """
+
+    def __init__(self, path, schema=()):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            for statement in self.schema:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """ Transacción con el bloqueo de escritura tomado desde el principio (BEGIN IMMEDIATE). """
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
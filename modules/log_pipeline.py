@@ -0,0 +1,159 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+
+from modules.metrics import registry as metrics_registry
+
+# extra= de las líneas con cuerpos de respuestas o payloads: solo se escribe una de cada 1/LOG_PAYLOAD_SAMPLE_RATE
+PAYLOAD = {'payload': True}
+
+LOG_DISCARDED = metrics_registry.counter(
+    'log_records_discarded_total', "Líneas de log descartadas en este proceso, por motivo (sampled_out/dropped).",
+    labels=('reason',))
+
+# Variables de entorno cuyo valor nunca debe aparecer en los logs
+SECRET_ENV_VARS = ('TRELLO_API_KEY', 'TRELLO_TOKEN', 'TRELLO_API_SECRET', 'SLACK_BOT_TOKEN', 'SLACK_SIGNING_SECRET')
+# key=… y token=… en URLs de Trello (las excepciones de requests incluyen la URL) y tokens de Slack
+SECRET_PATTERNS = (
+    (re.compile(r'\b(key|token)=[^&\s\'"]+'), r'\1=***'),
+    (re.compile(r'\bxox[abposr]-[0-9A-Za-z-]+'), 'xox*-***'),
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """ Una línea JSON por registro, con los secretos tapados y el mensaje acotado a `max_chars`. """
+
+    def __init__(self, max_chars=2000, secrets=()):
+        super().__init__()
+        self.max_chars = max_chars
+        self.secrets = [secret for secret in secrets if secret and len(secret) >= 6]
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': self.clean(record.getMessage()),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entry['exc'] = self.clean(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False)
+
+    def clean(self, text):
+        for secret in self.secrets:
+            text = text.replace(secret, '***')
+        for pattern, replacement in SECRET_PATTERNS:
+            text = pattern.sub(replacement, text)
+        if len(text) > self.max_chars:
+            text = f"{text[:self.max_chars]}… ({len(text) - self.max_chars} caracteres más)"
+        return text
+
+
+class TextFormatter(JsonFormatter):
+    """ El formato de texto de siempre, con los mismos secretos tapados (LOG_FORMAT=text). """
+
+    def __init__(self, max_chars=2000, secrets=()):
+        super().__init__(max_chars, secrets)
+        self.text = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        return self.clean(self.text.format(record))
+
+
+class PayloadSampler(logging.Filter):
+    """ Dejar pasar solo una fracción `rate` de las líneas marcadas con extra=PAYLOAD. """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, 'payload', False) and random.random() >= self.rate:
+            LOG_DISCARDED.inc('sampled_out')
+            return False
+        return True
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Con la cola llena put_nowait fallaría al parar: esperar a que el hilo libere un hueco
+        self.queue.put(self._sentinel)
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """ Los hilos de las peticiones solo encolan el registro; un hilo de fondo lo formatea y lo escribe.
+
+    El mensaje se formatea en ese hilo (los argumentos viajan sin formatear). Si la cola está llena el
+    registro se descarta: el log nunca bloquea una petición. Cada proceso tiene su cola y su hilo, creados
+    con el primer registro tras un fork.
+    """
+
+    def __init__(self, handler, queue_size=10000):
+        super().__init__(None)
+        self.handler = handler
+        self.queue_size = queue_size
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DISCARDED.inc('dropped')
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.queue_size)
+            self._listener = _QueueListener(self.queue, self.handler, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        """ Parar el hilo tras escribir lo que queda en la cola (logging.shutdown lo llama al salir). """
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+        super().close()
+
+
+def configure_logging(stream=None):
+    """ Configurar el logger raíz según LOG_LEVEL, LOG_FORMAT (json o text) y LOG_ASYNC. Idempotente. """
+    root = logging.getLogger()
+    if any(getattr(handler, '_log_pipeline', False) for handler in root.handlers):
+        return
+    level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    formatter_class = TextFormatter if os.getenv('LOG_FORMAT', 'json').lower() == 'text' else JsonFormatter
+    formatter = formatter_class(max_chars=int(os.getenv('LOG_MAX_MESSAGE_CHARS', '2000')),
+                                secrets=[os.getenv(name) for name in SECRET_ENV_VARS])
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(formatter)
+    handler = output
+    if os.getenv('LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes'):
+        handler = QueueLogHandler(output, queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    handler.addFilter(PayloadSampler(float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.1'))))
+    handler._log_pipeline = True
+    # Ningún formato usa fichero, función ni línea de origen: no inspeccionar la pila en cada registro
+    logging._srcfile = None
+    root.addHandler(handler)
+    root.setLevel(level)
+    return handler
@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+import time
+
+import prometheus_client
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Límites (segundos) de los histogramas de latencia
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_local = threading.local()
+
+
+class Timings:
+    """ Tiempo acumulado en la base de datos y en Trello por el comando en curso (puede usarse desde varios hilos). """
+
+    def __init__(self):
+        self.db = 0.0
+        self.trello = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, kind, seconds):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + seconds)
+
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+
+def set_timings(timings):
+    """ Asociar `timings` al hilo actual. Devuelve el valor anterior. """
+    previous = current_timings()
+    _local.timings = timings
+    return previous
+
+
+def add_time(kind, seconds):
+    """ Sumar `seconds` al comando en curso ('db' o 'trello'). Sin comando en curso no hace nada. """
+    timings = current_timings()
+    if timings is not None:
+        timings.add(kind, seconds)
+
+
+class Counter:
+    def __init__(self, name, help, labels=(), registry=None):
+        self.name = name
+        self.labels = tuple(labels)
+        self._metric = prometheus_client.Counter(name, help, self.labels, registry=registry)
+
+    def inc(self, *label_values, amount=1):
+        (self._metric.labels(*label_values) if self.labels else self._metric).inc(amount)
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.name = name
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._metric = prometheus_client.Histogram(name, help, self.labels, buckets=self.buckets, registry=registry)
+
+    def observe(self, *label_values, value):
+        (self._metric.labels(*label_values) if self.labels else self._metric).observe(value)
+
+
+class Gauge:
+    """ Valor leído con `read()` al refrescar las métricas.
+
+    Con varios workers cada proceso publica su último valor y `multiprocess_mode` dice cómo se combinan
+    (livesum: suma de los workers vivos; liveall: una serie por worker con la etiqueta pid; …).
+    """
+
+    def __init__(self, name, help, read, multiprocess_mode='liveall', registry=None):
+        self.name = name
+        self.read = read
+        self._metric = prometheus_client.Gauge(name, help, multiprocess_mode=multiprocess_mode, registry=registry)
+
+    def refresh(self):
+        self._metric.set(self.read())
+
+
+class GaugeSet:
+    """ Varios gauges calculados con una sola llamada: `read()` devuelve {clave: valor}. """
+
+    def __init__(self, read, gauges, multiprocess_mode='liveall', registry=None):
+        self.name = ",".join(gauges)
+        self.read = read
+        # {clave: gauge}; `gauges` es {nombre: (ayuda, clave)}
+        self._metrics = {key: prometheus_client.Gauge(name, help, multiprocess_mode=multiprocess_mode, registry=registry)
+                         for name, (help, key) in gauges.items()}
+
+    def refresh(self):
+        values = self.read()
+        for key, metric in self._metrics.items():
+            if key in values:
+                metric.set(values[key])
+
+
+def multiprocess_dir():
+    """ Directorio compartido por los workers (PROMETHEUS_MULTIPROC_DIR), o None si cada proceso expone lo suyo. """
+    return os.getenv('PROMETHEUS_MULTIPROC_DIR') or None
+
+
+class MetricsRegistry:
+    """ Métricas de la aplicación sobre prometheus_client.
+
+    Sin PROMETHEUS_MULTIPROC_DIR cada proceso expone solo sus series. Con él (gunicorn.conf.py lo fija antes
+    de cargar la aplicación) cada worker escribe sus valores en ese directorio y GET /metrics, lo atienda el
+    worker que sea, devuelve la suma de todos: los contadores no se reinician entre lecturas y los histogramas
+    permiten calcular percentiles de toda la flota. Los gauges se refrescan al exponer las métricas y, con
+    varios workers, cada `interval` segundos en un hilo de cada worker (start_refresh).
+    """
+
+    def __init__(self):
+        self._registry = prometheus_client.CollectorRegistry()
+        self._gauges = []
+        self._lock = threading.Lock()
+        self._refresh_pid = None
+
+    def counter(self, name, help, labels=()):
+        return Counter(name, help, labels, registry=self._registry)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return Histogram(name, help, labels, buckets, registry=self._registry)
+
+    def gauge(self, name, help, read, multiprocess_mode='liveall'):
+        return self._add_gauge(Gauge(name, help, read, multiprocess_mode, registry=self._registry))
+
+    def gauges(self, read, gauges, multiprocess_mode='liveall'):
+        """ Registrar los gauges {nombre: (ayuda, clave)} de una sola lectura `read()` -> {clave: valor}. """
+        return self._add_gauge(GaugeSet(read, gauges, multiprocess_mode, registry=self._registry))
+
+    def _add_gauge(self, gauge):
+        with self._lock:
+            self._gauges.append(gauge)
+        return gauge
+
+    def refresh(self):
+        """ Leer ahora el valor de todos los gauges de este proceso. """
+        with self._lock:
+            gauges = list(self._gauges)
+        for gauge in gauges:
+            try:
+                gauge.refresh()
+            except Exception as e:
+                logging.warning("No se pudo leer la métrica %s: %s", getattr(gauge, 'name', gauge), e)
+
+    def start_refresh(self, interval):
+        """ Con varios workers, refrescar los gauges de este proceso cada `interval` segundos. Idempotente. """
+        if not multiprocess_dir():
+            return
+        with self._lock:
+            if self._refresh_pid == os.getpid():
+                return
+            self._refresh_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.refresh()
+
+        threading.Thread(target=run, name="metrics-refresh", daemon=True).start()
+
+    def render(self):
+        """ Todas las métricas en el formato de texto de Prometheus. """
+        self.refresh()
+        directory = multiprocess_dir()
+        if directory:
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=directory)
+        else:
+            registry = self._registry
+        return prometheus_client.generate_latest(registry).decode()
+
+
+CONTENT_TYPE = prometheus_client.CONTENT_TYPE_LATEST
+
+# Solo las series que se usan: sin las *_created que prometheus_client añade a contadores e histogramas
+prometheus_client.disable_created_metrics()
+
+registry = MetricsRegistry()
+
+
+# Tiempo de base de datos: se mide cada sentencia en el motor y se suma al comando en curso
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    add_time('db', time.perf_counter() - started)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        add_time('db', time.perf_counter() - started.pop())
@@ -0,0 +1,91 @@
+import re
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+
+from models import db, Task, Timer, TrelloComment
+from modules.stats import totals_query
+from modules.task_pages import TASK_LISTS, segment_query
+from modules.task_search import search_query
+from modules.timers import CLOSE_OPEN_TIMER
+
+# Un recorrido completo de tabla en el plan de SQLite o PostgreSQL. Una tabla FTS5 se lee por su índice y
+# una subconsulta materializada (anon_N) tiene como mucho las filas de su LIMIT
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(?!\S+ VIRTUAL TABLE INDEX)(?!anon_\d+$)|Seq Scan')
+
+
+def command_queries(user_id='U_PLAN_CHECK'):
+    """ Las consultas que ejecuta cada comando, con valores de ejemplo: consultas ORM o sentencias SQL. """
+    today = datetime.utcnow().date()
+    pages = []
+    for name, task_list in TASK_LISTS.items():
+        # Cada segmento de la lista, en la primera página y en las siguientes (con clave)
+        key = [datetime.utcnow() if column.key == 'created_at' else 1 for column in task_list.order]
+        for index, segment in enumerate(task_list.segments(user_id, 'usuario')):
+            pages.append((f"/{name} (segmento {index})", segment_query(task_list, segment).limit(21)))
+            pages.append((f"/{name} (segmento {index}, siguiente)", segment_query(task_list, segment, key).limit(21)))
+    return pages + [
+        ('/upcoming_tasks', db.session.query(Task).filter(
+            Task.user_id == user_id, Task.due_date.between(today, today + timedelta(days=7))).order_by(Task.due_date)),
+        ('/delete_task', db.session.query(Task).filter_by(id=1, user_id=user_id)),
+        ('/start_timer', db.session.query(Task).filter_by(name='tarea', user_id=user_id)),
+        ('/start_timer (nombre parecido)', search_query(user_id, ['tar', 'pru'], any_term=True)),
+        ('/search_tasks', search_query(user_id, ['tarea'])),
+        # El cierre es la misma sentencia UPDATE ... RETURNING que ejecutan /stop_timer y /start_timer
+        ('/stop_timer', CLOSE_OPEN_TIMER.bindparams(now=datetime.utcnow(), user_id=user_id)),
+        ('/timer_status', db.session.query(Timer).filter_by(user_id=user_id, end_time=None)),
+        ('/stats', totals_query(user_id, today.replace(day=1), today)),
+        ('/view_comments', db.session.query(TrelloComment).filter_by(card_id='card').order_by(TrelloComment.created_at.desc())),
+        ('trello webhook', db.session.query(Task).filter_by(trello_card_id='card')),
+    ]
+
+
+def explain(query):
+    """ Líneas del plan de ejecución de una consulta ORM o una sentencia en la base de datos configurada. """
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        return [row[-1] for row in rows]
+    if dialect == 'postgresql':
+        # Con tablas pequeñas el planificador prefiere Seq Scan; se desactiva para ver si hay índice utilizable
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params).fetchall()
+        return [row[0] for row in rows]
+    raise click.ClickException(f"Comprobación de planes no disponible para {dialect}.")
+
+
+def check_query_plans():
+    """ Devuelve [(comando, usa_índice, plan)] para cada consulta de los comandos. """
+    results = []
+    try:
+        for command, query in command_queries():
+            plan = explain(query)
+            uses_index = not any(FULL_SCAN.search(line) for line in plan)
+            results.append((command, uses_index, plan))
+    finally:
+        db.session.rollback()
+    return results
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """ Verificar que la consulta de cada comando usa un índice. """
+    failures = 0
+    for command, uses_index, plan in check_query_plans():
+        status = "OK  " if uses_index else "SCAN"
+        click.echo(f"{status} {command}")
+        for line in plan:
+            click.echo(f"       {line}")
+        failures += not uses_index
+    if failures:
+        raise click.ClickException(f"{failures} consultas recorren la tabla completa.")
@@ -0,0 +1,253 @@
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from models import db
+from modules.local_store import LocalSQLite
+from modules.metrics import registry as metrics_registry
+
+CACHE_REQUESTS = metrics_registry.counter(
+    'read_cache_requests_total', "Lecturas de la caché por usuario, por comando y resultado (hit/miss).",
+    labels=('command', 'result'))
+
+
+class MemoryBackend:
+    """ LRU en memoria de este proceso, acotada por el tamaño total de los valores serializados. """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clave -> (usuario, valor, caduca)
+        self._user_keys = {}
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def set(self, user_id, key, value, version, ttl):
+        with self._lock:
+            # Si el usuario escribió mientras se cargaba el valor, el valor ya es viejo
+            if self._versions.get(user_id, 0) != version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (user_id, value, time.monotonic() + ttl)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _remove(self, key):
+        user_id, value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+        keys = self._user_keys[user_id]
+        keys.discard(key)
+        if not keys:
+            del self._user_keys[user_id]
+
+
+class SharedBackend:
+    """ LRU compartida por todos los workers de la máquina en un fichero SQLite local (desechable). """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entry (key TEXT PRIMARY KEY, user_id TEXT NOT NULL, value BLOB NOT NULL, "
+        "size INTEGER NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_entry_user_id ON entry (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_entry_used_at ON entry (used_at)",
+        "CREATE TABLE IF NOT EXISTS version (user_id TEXT PRIMARY KEY, version INTEGER NOT NULL)",
+    )
+
+    def __init__(self, path, max_bytes):
+        self.store = LocalSQLite(path, self.SCHEMA)
+        self.max_bytes = max_bytes
+
+    def get(self, user_id, key):
+        connection = self.store.connection()
+        row = connection.execute("SELECT value, expires_at, used_at FROM entry WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] < now:
+            return None
+        # El orden LRU se actualiza como mucho una vez por segundo para no escribir en cada acierto
+        if now - row[2] > 1:
+            connection.execute("UPDATE entry SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def version(self, user_id):
+        row = self.store.connection().execute("SELECT version FROM version WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def set(self, user_id, key, value, version, ttl):
+        now = time.time()
+        with self.store.transaction() as connection:
+            if self.version(user_id) == version:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entry (key, user_id, value, size, expires_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (key, user_id, value, len(value), now + ttl, now))
+                excess = connection.execute("SELECT total(size) FROM entry").fetchone()[0] - self.max_bytes
+                if excess > 0:
+                    self._evict(connection, excess)
+
+    def _evict(self, connection, excess):
+        freed = 0
+        keys = []
+        for key, size in connection.execute("SELECT key, size FROM entry ORDER BY used_at"):
+            if freed >= excess:
+                break
+            keys.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM entry WHERE key = ?", keys)
+
+    def invalidate(self, user_id):
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM entry WHERE user_id = ?", (user_id,))
+            connection.execute("INSERT INTO version (user_id, version) VALUES (?, 1) "
+                               "ON CONFLICT (user_id) DO UPDATE SET version = version + 1", (user_id,))
+
+    def stats(self):
+        entries, size = self.store.connection().execute("SELECT count(*), total(size) FROM entry").fetchone()
+        return {'entries': entries, 'bytes': int(size)}
+
+
+class ReadCache:
+    """ Caché de lectura por usuario para los comandos que solo consultan la base de datos.
+
+    Las claves son (usuario, comando, argumentos). Los valores se guardan serializados con pickle, así que
+    cada acierto devuelve una copia. Las escrituras marcan al usuario con invalidate_user() y sus entradas
+    se borran cuando la transacción hace commit.
+    """
+
+    def __init__(self, backend, ttl=60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, user_id, command, args, load):
+        """ Valor en caché para (user_id, command, args); si no está, `load()` y se guarda. """
+        key = f"{user_id}|{command}|{args!r}"
+        try:
+            data = self.backend.get(user_id, key)
+            version = self.backend.version(user_id) if data is None else None
+        except sqlite3.Error as e:
+            logging.warning("Caché de lectura no disponible: %s", e)
+            return load()
+        if data is not None:
+            self.hits += 1
+            CACHE_REQUESTS.inc(command, 'hit')
+            return pickle.loads(data)
+
+        self.misses += 1
+        CACHE_REQUESTS.inc(command, 'miss')
+        value = load()
+        try:
+            self.backend.set(user_id, key, pickle.dumps(value), version, self.ttl)
+        except sqlite3.Error as e:
+            logging.warning("No se pudo guardar en la caché de lectura: %s", e)
+        return value
+
+    def invalidate(self, user_id):
+        self.backend.invalidate(user_id)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class NullCache:
+    """ Caché desactivada (READ_CACHE_BACKEND=off). """
+
+    def get_or_load(self, user_id, command, args, load):
+        return load()
+
+    def invalidate(self, user_id):
+        pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_read_cache():
+    """ Caché de lectura configurada con READ_CACHE_BACKEND (memory, shared u off). """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build_cache()
+    return _cache
+
+
+def _build_cache():
+    backend = os.getenv('READ_CACHE_BACKEND', 'memory').lower()
+    max_bytes = int(os.getenv('READ_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    ttl = float(os.getenv('READ_CACHE_TTL', '60'))
+    if backend == 'off':
+        return NullCache()
+    if backend == 'shared':
+        path = os.getenv('READ_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'slack_api_lab_cache.db'))
+        return ReadCache(SharedBackend(path, max_bytes), ttl)
+    if backend != 'memory':
+        raise ValueError(f"READ_CACHE_BACKEND desconocido: {backend}")
+    return ReadCache(MemoryBackend(max_bytes), ttl)
+
+
+def _stat(name):
+    cache = _cache
+    if not isinstance(cache, ReadCache):
+        return 0
+    return cache.hit_ratio() if name == 'hit_ratio' else cache.backend.stats()[name]
+
+
+metrics_registry.gauge('read_cache_hit_ratio', "Proporción de aciertos de la caché de lectura en este proceso.",
+                       lambda: _stat('hit_ratio'))
+metrics_registry.gauge('read_cache_entries', "Entradas en la caché de lectura.", lambda: _stat('entries'))
+metrics_registry.gauge('read_cache_bytes', "Bytes serializados en la caché de lectura.", lambda: _stat('bytes'))
+
+
+def invalidate_user(user_id):
+    """ Borrar las entradas del usuario cuando la transacción actual haga commit. """
+    db.session.info.setdefault('read_cache_users', set()).add(user_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_committed(session):
+    users = session.info.pop('read_cache_users', None)
+    if users:
+        cache = get_read_cache()
+        for user_id in users:
+            try:
+                cache.invalidate(user_id)
+            except sqlite3.Error as e:
+                logging.error("No se pudo invalidar la caché de lectura del usuario %s: %s", user_id, e)
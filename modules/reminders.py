@@ -0,0 +1,67 @@
+import heapq
+
+
+class ReminderWheel:
+    """ Recordatorios pendientes agrupados por segundo.
+
+    Cada segundo con recordatorios es un cubo {clave: recordatorio}; un heap guarda los segundos
+    ocupados y un índice clave → segundo permite cancelar o reprogramar una clave en O(1).
+    Una clave (p. ej. ('break', user_id)) solo puede estar en un cubo a la vez.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._heap = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def schedule(self, key, due, reminder):
+        """ Programar `reminder` para el segundo `due` (epoch), sustituyendo el de la misma clave. """
+        second = int(due)
+        self.cancel(key)
+        bucket = self._buckets.get(second)
+        if bucket is None:
+            bucket = self._buckets[second] = {}
+            heapq.heappush(self._heap, second)
+        bucket[key] = reminder
+        self._index[key] = second
+
+    def cancel(self, key):
+        """ Quitar la clave. Devuelve False si no estaba programada. """
+        second = self._index.pop(key, None)
+        if second is None:
+            return False
+        bucket = self._buckets[second]
+        del bucket[key]
+        if not bucket:
+            # La entrada del heap se descarta cuando llegue a la cima
+            del self._buckets[second]
+        return True
+
+    def clear(self):
+        self._buckets.clear()
+        self._heap.clear()
+        self._index.clear()
+
+    def next_due(self):
+        """ Primer segundo con recordatorios, o None si no hay ninguno. """
+        while self._heap and self._heap[0] not in self._buckets:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def pop_due(self, now):
+        """ Sacar los cubos vencidos en `now`: [(segundo, {clave: recordatorio}), ...] en orden. """
+        due = []
+        while self._heap and self._heap[0] <= now:
+            second = heapq.heappop(self._heap)
+            bucket = self._buckets.pop(second, None)
+            if bucket:
+                for key in bucket:
+                    del self._index[key]
+                due.append((second, bucket))
+        return due
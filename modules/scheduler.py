@@ -0,0 +1,273 @@
+import calendar
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from models import db, Reminder, SchedulerLease
+from modules.reminders import ReminderWheel
+from modules.slack_commands import BREAK_REMINDER_MESSAGE, POMODORO_END_MESSAGE
+from modules.sqlite_profile import immediate
+from modules.timers import close_timer
+from modules.write_coalescer import write_transaction
+
+BREAK = 'break'
+POMODORO = 'pomodoro'
+BREAK_INTERVAL = 3600
+
+# Tamaño de los lotes de IN (...) al actualizar un cubo entero de recordatorios
+UPDATE_CHUNK = 500
+
+
+def to_epoch(value):
+    return calendar.timegm(value.utctimetuple())
+
+
+def from_epoch(second):
+    return datetime.utcfromtimestamp(second)
+
+
+class ReminderScheduler:
+    """ Recordatorios de descanso y fin de Pomodoro en la tabla reminder, con un hilo que los envía.
+
+    Todos los workers escriben en la tabla, pero solo el que tiene la concesión (lease) en
+    scheduler_lease mantiene los pendientes en un ReminderWheel y los envía, un lote por segundo.
+    """
+
+    def __init__(self, app, slack_sender, lease_ttl=30, poll_interval=5, sync_overlap=60):
+        self.app = app
+        self.slack_sender = slack_sender
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        # Al sincronizar se releen también las filas de este margen anterior, por transacciones lentas
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.wheel = ReminderWheel()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._synced_at = None
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, app, slack_sender):
+        return cls(
+            app, slack_sender,
+            lease_ttl=int(os.getenv('SCHEDULER_LEASE_TTL', '30')),
+            poll_interval=float(os.getenv('SCHEDULER_POLL_INTERVAL', '5')),
+        )
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="scheduler-dispatch", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval)
+        if self.is_leader:
+            self._release()
+
+    def add_break_reminder(self, user_id):
+        """ Recordatorio cada hora. Repetir el comando reprograma el existente en lugar de duplicarlo. """
+        due = datetime.utcnow().replace(microsecond=0) + timedelta(seconds=BREAK_INTERVAL)
+        self._save(user_id, BREAK, due, interval_seconds=BREAK_INTERVAL)
+
+    def cancel_break_reminder(self, user_id):
+        """ Cancelar solo los recordatorios del usuario. Devuelve False si no tenía ninguno. """
+        with write_transaction():
+            cancelled = db.session.query(Reminder).filter(
+                Reminder.user_id == user_id, Reminder.kind == BREAK, Reminder.due_at.isnot(None),
+            ).update({'due_at': None, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        with self._cond:
+            self.wheel.cancel((BREAK, user_id))
+        return bool(cancelled)
+
+    def add_pomodoro_end(self, user_id, timer_id, run_date):
+        self._save(user_id, POMODORO, run_date.replace(microsecond=0), timer_id=timer_id)
+
+    def _save(self, user_id, kind, due_at, interval_seconds=None, timer_id=None):
+        """ Guardar el recordatorio (uno por usuario y tipo) y, si este proceso es el líder, programarlo ya. """
+        values = {'user_id': user_id, 'kind': kind, 'due_at': due_at, 'interval_seconds': interval_seconds,
+                  'timer_id': timer_id, 'updated_at': datetime.utcnow()}
+        dialect = db.session.get_bind().dialect.name
+        with write_transaction():
+            if dialect in ('sqlite', 'postgresql'):
+                if dialect == 'sqlite':
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                stmt = insert(Reminder.__table__).values(**values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['user_id', 'kind'],
+                    set_={name: stmt.excluded[name] for name in ('due_at', 'interval_seconds', 'timer_id', 'updated_at')},
+                )
+                db.session.execute(stmt)
+            else:
+                reminder = db.session.query(Reminder).filter_by(user_id=user_id, kind=kind).first()
+                if reminder is None:
+                    reminder = Reminder(user_id=user_id, kind=kind)
+                    db.session.add(reminder)
+                for name, value in values.items():
+                    setattr(reminder, name, value)
+
+        if self.is_leader:
+            with self._cond:
+                self.wheel.schedule((kind, user_id), to_epoch(due_at), (interval_seconds, timer_id))
+                self._cond.notify()
+
+    def _run(self):
+        """ Único hilo del scheduler: renueva la concesión, sincroniza con la tabla y envía los vencidos. """
+        next_poll = 0.0
+        while not self._stop.is_set():
+            now = time.time()
+            if now >= next_poll:
+                self._poll()
+                next_poll = now + self.poll_interval
+            if self.is_leader:
+                self._fire_due(int(time.time()))
+
+            with self._cond:
+                wait = next_poll - time.time()
+                next_due = self.wheel.next_due() if self.is_leader else None
+                if next_due is not None:
+                    wait = min(wait, next_due - time.time())
+                if wait > 0 and not self._stop.is_set():
+                    self._cond.wait(wait)
+
+    def _poll(self):
+        try:
+            leader = self._try_acquire()
+        except SQLAlchemyError as e:
+            logging.error("Error al renovar la concesión del scheduler: %s", e)
+            leader = False
+
+        if leader and not self.is_leader:
+            logging.info("Este proceso (%s) envía ahora los recordatorios", self.holder)
+            with self._cond:
+                self.wheel.clear()
+            self._synced_at = None
+        elif not leader and self.is_leader:
+            logging.warning("Este proceso (%s) dejó de enviar los recordatorios", self.holder)
+            with self._cond:
+                self.wheel.clear()
+        self.is_leader = leader
+
+        if leader:
+            try:
+                self._sync()
+            except SQLAlchemyError as e:
+                logging.error("Error al leer los recordatorios: %s", e)
+
+    def _sync(self, batch_size=5000):
+        """ Cargar todos los recordatorios activos o, si ya se cargaron, solo los modificados desde entonces. """
+        started = datetime.utcnow()
+        query = select(Reminder.user_id, Reminder.kind, Reminder.due_at, Reminder.interval_seconds, Reminder.timer_id)
+        if self._synced_at is None:
+            query = query.where(Reminder.due_at.isnot(None))
+        else:
+            query = query.where(Reminder.updated_at >= self._synced_at - self.sync_overlap)
+
+        count = 0
+        with self.app.app_context():
+            result = db.session.execute(query.execution_options(yield_per=batch_size))
+            for rows in result.partitions():
+                with self._cond:
+                    for user_id, kind, due_at, interval_seconds, timer_id in rows:
+                        if due_at is None:
+                            self.wheel.cancel((kind, user_id))
+                        else:
+                            self.wheel.schedule((kind, user_id), to_epoch(due_at), (interval_seconds, timer_id))
+                count += len(rows)
+        if self._synced_at is None:
+            logging.info("%s recordatorios pendientes cargados", count)
+        self._synced_at = started
+
+    def _fire_due(self, now):
+        with self._cond:
+            due = self.wheel.pop_due(now)
+        for second, bucket in due:
+            try:
+                self._fire(second, bucket, now)
+            except Exception as e:
+                logging.error("Error al enviar los recordatorios del segundo %s: %s", second, e)
+
+    def _fire(self, second, bucket, now):
+        """ Enviar de una vez todos los recordatorios de un segundo y dejar la tabla al día. """
+        fired_at = from_epoch(second)
+        breaks = {}
+        pomodoros = []
+        for (kind, user_id), (interval_seconds, timer_id) in bucket.items():
+            if kind == POMODORO:
+                pomodoros.append((user_id, timer_id))
+            else:
+                # Si el envío se retrasó (cambio de líder) se salta a la siguiente hora futura, sin repetir
+                missed = max(0, now - second) // interval_seconds
+                next_due = second + (missed + 1) * interval_seconds
+                breaks.setdefault((interval_seconds, next_due), []).append(user_id)
+
+        with self.app.app_context(), write_transaction():
+            for user_id, timer_id in pomodoros:
+                close_timer(user_id, timer_id, pomodoro=True)
+            # La condición sobre due_at evita pisar un recordatorio reprogramado o cancelado entretanto
+            for user_ids, next_due in _chunks_by_due(breaks):
+                db.session.query(Reminder).filter(
+                    Reminder.kind == BREAK, Reminder.user_id.in_(user_ids), Reminder.due_at == fired_at,
+                ).update({'due_at': from_epoch(next_due)}, synchronize_session=False)
+            for offset in range(0, len(pomodoros), UPDATE_CHUNK):
+                user_ids = [user_id for user_id, _ in pomodoros[offset:offset + UPDATE_CHUNK]]
+                db.session.query(Reminder).filter(
+                    Reminder.kind == POMODORO, Reminder.user_id.in_(user_ids), Reminder.due_at == fired_at,
+                ).update({'due_at': None}, synchronize_session=False)
+
+        with self._cond:
+            for (interval_seconds, next_due), user_ids in breaks.items():
+                for user_id in user_ids:
+                    if (BREAK, user_id) not in self.wheel:
+                        self.wheel.schedule((BREAK, user_id), next_due, (interval_seconds, None))
+
+        messages = [(user_id, BREAK_REMINDER_MESSAGE) for user_ids in breaks.values() for user_id in user_ids]
+        messages += [(user_id, POMODORO_END_MESSAGE) for user_id, _ in pomodoros]
+        self.slack_sender.post_messages(messages)
+
+    def _try_acquire(self):
+        """ Tomar o renovar la concesión si es nuestra o ha caducado. """
+        with self.app.app_context(), immediate():
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.lease_ttl)
+            updated = db.session.query(SchedulerLease).filter(
+                SchedulerLease.name == 'reminders',
+                or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now),
+            ).update({'holder': self.holder, 'expires_at': expires_at}, synchronize_session=False)
+            if updated:
+                db.session.commit()
+                return True
+            try:
+                db.session.add(SchedulerLease(name='reminders', holder=self.holder, expires_at=expires_at))
+                db.session.commit()
+                return True
+            except IntegrityError:
+                db.session.rollback()
+                return False
+
+    def _release(self):
+        try:
+            with self.app.app_context(), write_transaction():
+                db.session.query(SchedulerLease).filter_by(name='reminders', holder=self.holder) \
+                    .update({'expires_at': datetime.utcnow()}, synchronize_session=False)
+        except SQLAlchemyError as e:
+            logging.error("Error al liberar la concesión del scheduler: %s", e)
+
+
+def _chunks_by_due(breaks):
+    for (_, next_due), user_ids in breaks.items():
+        for offset in range(0, len(user_ids), UPDATE_CHUNK):
+            yield user_ids[offset:offset + UPDATE_CHUNK], next_due
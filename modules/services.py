@@ -0,0 +1,175 @@
+import logging
+import os
+import threading
+import weakref
+
+from models import db
+from modules import slack_commands
+from modules.commands import CommandRegistry, raw_text, split_args, task_id_arg
+from modules.metrics import registry as metrics_registry
+
+
+class lazy:
+    """ Atributo que se construye en el primer acceso, una sola vez aunque lo pidan varios hilos. """
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        with instance._lock:
+            value = instance.__dict__.get(self.name)
+            if value is None:
+                value = self.build(instance)
+                # A partir de aquí el atributo de la instancia oculta al descriptor: acceso directo, sin lock
+                instance.__dict__[self.name] = value
+        return value
+
+
+# Aplicaciones de este proceso; los gauges se registran una sola vez y leen los servicios ya creados
+_instances = weakref.WeakSet()
+
+
+def _built(name):
+    return [services.__dict__[name] for services in list(_instances) if name in services.__dict__]
+
+
+def _outbox_stats():
+    # Las tres métricas del outbox salen de una sola consulta
+    workers = _built('trello_outbox')
+    return workers[0].stats() if workers else {}
+
+
+metrics_registry.gauge('slack_outbound_queue_depth', "Mensajes a Slack esperando envío.",
+                       lambda: sum(sender.stats()['queue_depth'] for sender in _built('slack_sender')),
+                       multiprocess_mode='livesum')
+metrics_registry.gauge('slash_dispatch_queue_depth', "Comandos slash esperando un worker.",
+                       lambda: sum(dispatcher.queue_depth() for dispatcher in _built('dispatcher')),
+                       multiprocess_mode='livesum')
+# La tabla es común a todos los workers: vale el último valor leído por cualquiera
+metrics_registry.gauges(_outbox_stats, {
+    'trello_outbox_pending': ("Cambios pendientes de enviar a Trello.", 'pending'),
+    'trello_outbox_lag_seconds': ("Segundos desde el cambio pendiente más antiguo.", 'lag_seconds'),
+    'trello_outbox_failed': ("Cambios que agotaron los reintentos.", 'failed'),
+}, multiprocess_mode='livemostrecent')
+
+
+class Services:
+    """ Clientes de Slack, scheduler y workers de una aplicación, creados cuando se usan por primera vez.
+
+    Crear la aplicación no abre conexiones ni arranca hilos, así que manage.py, las migraciones y el
+    proceso maestro de gunicorn --preload no pagan ese coste. Los hilos de fondo se arrancan con
+    start_background() después del fork (post_worker_init en gunicorn.conf.py).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.RLock()
+        self._background_pid = None
+        _instances.add(self)
+
+    @lazy
+    def signature_verifier(self):
+        from slack_sdk.signature import SignatureVerifier
+        return SignatureVerifier(signing_secret=os.getenv("SLACK_SIGNING_SECRET"))
+
+    @lazy
+    def slack_client(self):
+        from slack_sdk import WebClient
+        return WebClient(token=os.getenv("SLACK_BOT_TOKEN"))
+
+    @lazy
+    def slack_sender(self):
+        # Todos los mensajes salientes a Slack pasan por una cola con límite de ritmo por método
+        from modules.slack_sender import SlackSender
+        return SlackSender.from_env(self.slack_client)
+
+    @lazy
+    def scheduler(self):
+        # Recordatorios persistidos en la base de datos, enviados por un único worker líder
+        from modules.scheduler import ReminderScheduler
+        return ReminderScheduler.from_env(self.app, self.slack_sender)
+
+    @lazy
+    def trello_outbox(self):
+        # Cambios hacia Trello guardados en la misma transacción que el cambio local y enviados en segundo plano
+        from modules.trello_outbox import TrelloOutboxWorker
+        return TrelloOutboxWorker.from_env(self.app)
+
+    @lazy
+    def dispatcher(self):
+        # Pool de workers para los comandos slash; los hilos se crean con el primer comando.
+        # SLASH_COMMAND_TIMEOUTS tiene prioridad sobre el tiempo máximo declarado por cada comando.
+        from modules.dispatcher import CommandDispatcher
+        config = self.app.config
+        return CommandDispatcher(
+            self.app,
+            workers=config['SLASH_WORKERS'],
+            queue_size=config['SLASH_QUEUE_SIZE'],
+            default_timeout=config['SLASH_COMMAND_TIMEOUT'],
+            timeouts={**self.commands.timeouts(), **config['SLASH_COMMAND_TIMEOUTS']},
+        )
+
+    @lazy
+    def idempotency(self):
+        # Reintentos de Slack: una entrada en curso deja de bloquear cuando ya no puede estar ejecutándose
+        from modules.idempotency import IdempotencyStore
+        config = self.app.config
+        timeouts = [config['SLASH_COMMAND_TIMEOUT'], *self.commands.timeouts().values(),
+                    *config['SLASH_COMMAND_TIMEOUTS'].values()]
+        return IdempotencyStore.from_env(pending_ttl=max(timeouts) + 30)
+
+    @lazy
+    def commands(self):
+        """ Comandos slash: handler, parser de argumentos y tiempo máximo de cada uno. """
+        commands = CommandRegistry()
+        commands.add('/view_comments', lambda req, text: slack_commands.view_comments(req.user_id, text, db),  # uno o varios task_id
+                     parser=raw_text)
+        commands.add('/assign_task', lambda req, task_id, user: slack_commands.assign_task(req.user_id, task_id, user, db),
+                     parser=split_args(2, "Por favor, proporciona un ID de tarea válido y un usuario. Uso: /assign_task [task_id] [@usuario]"))
+        commands.add('/my_tasks', lambda req: slack_commands.my_tasks(req.user_id, db, req.user_name))
+        commands.add('/set_priority', lambda req, task_id, priority: slack_commands.set_priority(req.user_id, task_id, priority, db),
+                     parser=split_args(2, "Por favor, proporciona un ID de tarea válido y una prioridad. Uso: /set_priority [task_id] [high/medium/low]"))
+        commands.add('/priority_list', lambda req: slack_commands.priority_list(req.user_id, db))
+        commands.add('/create_task', lambda req, text: slack_commands.create_task(req.user_id, text, db), parser=raw_text,
+                     timeout=60)
+        commands.add('/start_timer', lambda req, text: slack_commands.start_timer(req.user_id, text, db), parser=raw_text)
+        commands.add('/stop_timer', lambda req: slack_commands.stop_timer(req.user_id, db))
+        commands.add('/get_tip', lambda req: slack_commands.get_tip(), timeout=5)
+        commands.add('/break_reminder', lambda req: slack_commands.break_reminder(req.user_id, self.slack_sender, self.scheduler))
+        commands.add('/cancel_break_reminder', lambda req: slack_commands.cancel_break_reminder(req.user_id, self.scheduler))
+        commands.add('/start_pomodoro', lambda req: slack_commands.start_pomodoro(req.user_id, db, self.scheduler))
+        commands.add('/list_tasks', lambda req: slack_commands.list_tasks(req.user_id, db))
+        commands.add('/search_tasks', lambda req, text: slack_commands.search_tasks(req.user_id, text, db), parser=raw_text)
+        commands.add('/delete_task', lambda req, task_id: slack_commands.delete_task(req.user_id, task_id, db),
+                     parser=task_id_arg("Por favor, proporciona un ID de tarea válido. Uso: /delete_task [ID]"))
+        commands.add('/stats', lambda req, period: slack_commands.stats(req.user_id, db, period), parser=raw_text, timeout=10)
+        commands.add('/recent_tasks', lambda req: slack_commands.recent_tasks(req.user_id, db))
+        commands.add('/timer_status', lambda req: slack_commands.timer_status(req.user_id, db))
+        return commands
+
+    def start_background(self):
+        """ Arrancar los hilos de fondo de este proceso. Idempotente; llamar después del fork. """
+        with self._lock:
+            if self._background_pid == os.getpid():
+                return
+            self._background_pid = os.getpid()
+        # Las conexiones heredadas del proceso padre no se reutilizan en el hijo
+        with self.app.app_context():
+            db.engine.dispose(close=False)
+        self.scheduler.start()
+        self.trello_outbox.start()
+        metrics_registry.start_refresh(float(os.getenv('METRICS_REFRESH_INTERVAL', '5')))
+        logging.info("Servicios de fondo arrancados en el proceso %s", os.getpid())
+
+    def shutdown(self):
+        if self._background_pid != os.getpid():
+            return
+        for name in ('trello_outbox', 'scheduler'):
+            service = self.__dict__.get(name)
+            if service is not None:
+                service.shutdown()
+        from modules.trello_async import close_async_client
+        close_async_client()
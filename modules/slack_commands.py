@@ -1,33 +1,62 @@
 import os
+import re
 import logging
-from slack_sdk import WebClient
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from random import choice
-from models import Task, Timer
+from models import db, Task, Timer
+from modules import comment_cache, task_search
 from modules.trello_integration import (
     create_card,
     create_new_list_on_trello,
-    set_card_due_date,
-    add_comment_to_card,
     move_card_to_list,
-    assign_card_member,
-    get_card_comments,
-    set_card_priority
+    trello_degraded,
 )
+from modules.board_cache import normalize_priority
+from modules.dispatcher import bind_deadline
+from modules.read_cache import get_read_cache, invalidate_user
+from modules.stats import parse_period, user_totals
+from modules.task_pages import task_page
+from modules.timers import open_timer, finish_timer
+from modules.trello_outbox import enqueue as enqueue_trello
+from modules.write_coalescer import run_write
 
+# Número máximo de tarjetas que se crean en paralelo con /create_task
+BULK_CREATE_CONCURRENCY = int(os.getenv("TRELLO_BULK_CONCURRENCY", "4"))
 
-def create_task(user_id, task_name, db):
-    if not task_name:
+DEGRADED_MESSAGE = "Trello no responde ahora mismo; los cambios se enviarán cuando se recupere."
+
+# Duración de una sesión Pomodoro
+POMODORO_MINUTES = 25
+
+BREAK_REMINDER_MESSAGE = "¡Es hora de tomar un descanso! Estírate y relaja la mente."
+POMODORO_END_MESSAGE = "¡Tu sesión Pomodoro ha terminado! Toma un descanso de 5 minutos."
+
+
+def parse_task_names(text):
+    """ Separar los nombres de tarea indicados uno por línea o separados por ';'. """
+    return [name.strip() for name in re.split(r'[;\n]', text or '') if name.strip()]
+
+def create_task(user_id, text, db):
+    task_names = parse_task_names(text)
+    if not task_names:
         return "Por favor, proporciona un nombre para la tarea. Uso: /create_task [nombre de la tarea]"
+    if len(task_names) > 1:
+        return create_tasks(user_id, task_names, db)
 
-    logging.info(f"Intentando crear tarea: {task_name}")
+    task_name = task_names[0]
+    logging.info("Intentando crear tarea: %s", task_name)
+    if trello_degraded():
+        return _create_deferred(user_id, [task_name])
     # Crear la tarea en Trello
     trello_created = create_card(task_name)
+    if not trello_created and trello_degraded():
+        # El circuito se abrió con esta llamada
+        return _create_deferred(user_id, [task_name])
     if trello_created:
         # Guardar la tarea en la base de datos
         task = Task(name=task_name, user_id=user_id, trello_card_id=trello_created['id'])
-        db.session.add(task)
-        db.session.commit()
+        run_write(lambda: _insert_tasks([task]))
         message = f"Tarea '{task_name}' creada en Trello y guardada en la base de datos."
         logging.info(message)
     else:
@@ -36,8 +65,52 @@ def create_task(user_id, task_name, db):
 
     return message
 
+def create_tasks(user_id, task_names, db):
+    """ Crear varias tarjetas en paralelo y guardar todas las tareas en una sola transacción. """
+    logging.info("Intentando crear %s tareas", len(task_names))
+    if trello_degraded():
+        return _create_deferred(user_id, task_names)
+    workers = max(1, min(BULK_CREATE_CONCURRENCY, len(task_names)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        cards = list(executor.map(bind_deadline(create_card), task_names))
+
+    tasks = [Task(name=name, user_id=user_id, trello_card_id=card['id'])
+             for name, card in zip(task_names, cards) if card]
+    if tasks:
+        run_write(lambda: _insert_tasks(tasks))
+
+    failed = [name for name, card in zip(task_names, cards) if not card]
+    message = f"{len(tasks)} de {len(task_names)} tareas creadas en Trello y guardadas en la base de datos."
+    if failed and trello_degraded():
+        return message + "\n" + _create_deferred(user_id, failed)
+    if failed:
+        message += "\nNo se pudieron crear: " + ", ".join(f"'{name}'" for name in failed)
+        logging.error("Error al crear en Trello las tareas: %s", failed)
+    return message
+
+def _create_deferred(user_id, task_names):
+    """ Modo degradado: guardar las tareas sin tarjeta y dejar su creación en Trello al outbox. """
+    tasks = [Task(name=name, user_id=user_id) for name in task_names]
+    run_write(lambda: _insert_deferred_tasks(tasks))
+    names = ", ".join(f"'{name}'" for name in task_names)
+    return f"Tareas guardadas en la base de datos: {names}. {DEGRADED_MESSAGE}"
+
+def _insert_deferred_tasks(tasks):
+    task_ids = _insert_tasks(tasks)
+    for task_id in task_ids:
+        enqueue_trello(None, 'create', {'task_id': task_id})
+    return task_ids
+
+def _insert_tasks(tasks):
+    """ Escritura para run_write: devuelve los ids, no los objetos, que quedan en la sesión del hilo escritor. """
+    db.session.add_all(tasks)
+    db.session.flush()
+    for user_id in {task.user_id for task in tasks}:
+        invalidate_user(user_id)
+    return [task.id for task in tasks]
+
 def create_new_list(user_id, list_name):
-    logging.info(f"Attempting to create new list: {list_name}")
+    logging.info("Attempting to create new list: %s", list_name)
     if create_new_list_on_trello(list_name):
         message = f"Nueva lista '{list_name}' creada con éxito en Trello."
         logging.info(message)
@@ -50,21 +123,27 @@ def set_due_date(user_id, task_id, due_date, db):
     if not task_id.isdigit():
         return "Por favor, proporciona un ID de tarea válido. Uso: /set_due_date [task_id] [YYYY-MM-DD]"
     
-    task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
-    if not task:
-        return f"No se encontró ninguna tarea con ID {task_id}."
-    
-    try:
-        due_date = datetime.strptime(due_date, "%Y-%m-%d")
-    except ValueError:
-        return "Formato de fecha inválido. Usa YYYY-MM-DD."
-    
-    if set_card_due_date(task.trello_card_id, due_date):
-        task.due_date = due_date
-        db.session.commit()
-        return f"Fecha límite para la tarea '{task.name}' establecida para {due_date.strftime('%Y-%m-%d')}."
-    else:
-        return "Error al establecer la fecha límite en Trello."
+    def write():
+        task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
+        if not task:
+            return f"No se encontró ninguna tarea con ID {task_id}."
+
+        try:
+            date = datetime.strptime(due_date, "%Y-%m-%d")
+        except ValueError:
+            return "Formato de fecha inválido. Usa YYYY-MM-DD."
+
+        # El cambio para Trello se guarda en la misma transacción y lo envía el outbox en segundo plano
+        task.due_date = date
+        _sync_to_trello(task, 'due', date.isoformat())
+        invalidate_user(user_id)
+        return f"Fecha límite para la tarea '{task.name}' establecida para {date.strftime('%Y-%m-%d')}."
+
+    return run_write(write)
+
+def _sync_to_trello(task, action, value):
+    if task.trello_card_id:
+        enqueue_trello(task.trello_card_id, action, value)
 
 def upcoming_tasks(user_id, db):
     today = datetime.now().date()
@@ -84,120 +163,168 @@ def add_comment(user_id, task_id, comment, db):
     if not task_id.isdigit():
         return "Por favor, proporciona un ID de tarea válido. Uso: /add_comment [task_id] [comentario]"
     
-    task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
-    if not task:
-        return f"No se encontró ninguna tarea con ID {task_id}."
-    
-    if add_comment_to_card(task.trello_card_id, comment):
+    def write():
+        task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
+        if not task:
+            return f"No se encontró ninguna tarea con ID {task_id}."
+
+        if not task.trello_card_id:
+            return f"La tarea '{task.name}' no tiene tarjeta en Trello."
+        _sync_to_trello(task, 'comment', comment)
         return f"Comentario agregado a la tarea '{task.name}': {comment}"
-    else:
-        return "Error al agregar el comentario en Trello."
 
-def view_comments(user_id, task_id, db):
-    if not task_id.isdigit():
-        return "Por favor, proporciona un ID de tarea válido. Uso: /view_comments [task_id]"
-    
+    return run_write(write)
+
+def view_comments(user_id, text, db):
+    args = (text or '').split()
+    page = 1
+    if len(args) == 2 and re.fullmatch(r'[pP]\d+', args[1]):
+        page = max(1, int(args[1][1:]))
+        args = args[:1]
+    if not args or not all(task_id.isdigit() for task_id in args):
+        return "Por favor, proporciona un ID de tarea válido. Uso: /view_comments [task_id] [task_id...] o /view_comments [task_id] p[página]"
+    if len(args) > 1:
+        return view_comments_for_tasks(user_id, [int(task_id) for task_id in args], db)
+
+    task_id = args[0]
     task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
     if not task:
         return f"No se encontró ninguna tarea con ID {task_id}."
-    
-    comments = get_card_comments(task.trello_card_id)
-    if comments:
-        comment_list = "\n".join([f"- {comment}" for comment in comments])
-        return f"Comentarios para la tarea '{task.name}':\n{comment_list}"
-    else:
-        return f"No se encontraron comentarios para la tarea '{task.name}' o error al obtener los comentarios."
+    if not task.trello_card_id:
+        return f"La tarea '{task.name}' aún no tiene tarjeta en Trello ni comentarios."
+
+    card_id = task.trello_card_id
+    fresh = card_id in comment_cache.refresh([card_id])
+    if not fresh and not comment_cache.is_cached(card_id):
+        return f"Trello no responde ahora mismo y los comentarios de la tarea '{task.name}' no están guardados localmente."
+    comments, more = comment_cache.comments_page(card_id, page)
+    if not comments:
+        return f"No se encontraron comentarios para la tarea '{task.name}'."
+    comment_list = "\n".join([f"- {comment.text}" for comment in comments])
+    message = f"Comentarios para la tarea '{task.name}' (página {page}):\n{comment_list}"
+    if more:
+        message += f"\nHay más comentarios: /view_comments {task.id} p{page + 1}"
+    if not fresh:
+        message += "\n(Trello no responde: puede que falten los comentarios más recientes)"
+    return message
+
+def view_comments_for_tasks(user_id, task_ids, db):
+    """ Primera página de comentarios de varias tareas; los nuevos se piden a Trello a la vez para todas. """
+    tasks = db.session.query(Task).filter(Task.id.in_(task_ids), Task.user_id == user_id).order_by(Task.id).all()
+    if not tasks:
+        return "No se encontró ninguna de las tareas indicadas."
+
+    comment_cache.refresh([task.trello_card_id for task in tasks])
+    sections = []
+    for task in tasks:
+        comments, more = comment_cache.comments_page(task.trello_card_id, 1) if task.trello_card_id else ([], False)
+        if comments:
+            comment_list = "\n".join([f"- {comment.text}" for comment in comments])
+            if more:
+                comment_list += f"\n- … más en /view_comments {task.id} p2"
+        else:
+            comment_list = "- (sin comentarios)"
+        sections.append(f"Comentarios para la tarea '{task.name}':\n{comment_list}")
+    return "\n\n".join(sections)
 
 def assign_task(user_id, task_id, assigned_user, db):
     if not task_id.isdigit():
         return "Por favor, proporciona un ID de tarea válido. Uso: /assign_task [task_id] [@usuario]"
     
-    task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
-    if not task:
-        return f"No se encontró ninguna tarea con ID {task_id}."
-    
-    if not assigned_user.startswith('@'):
-        return "Por favor, proporciona un usuario válido en formato @usuario."
-    
-    if assign_card_member(task.trello_card_id, assigned_user):
+    def write():
+        task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
+        if not task:
+            return f"No se encontró ninguna tarea con ID {task_id}."
+
+        if not assigned_user.startswith('@'):
+            return "Por favor, proporciona un usuario válido en formato @usuario."
+
         task.assigned_to = assigned_user
-        db.session.commit()
+        _sync_to_trello(task, 'member', assigned_user)
+        invalidate_user(user_id)
         return f"Tarea '{task.name}' asignada a {assigned_user}."
-    else:
-        return f"Error al asignar la tarea a {assigned_user} en Trello."
 
-def my_tasks(user_id, db):
-    tasks = db.session.query(Task).filter_by(assigned_to=user_id).all()
-    if not tasks:
-        return "No tienes tareas asignadas."
-    
-    task_list = "\n".join([f"- {task.name} (ID: {task.id})" for task in tasks])
-    return f"Tareas asignadas a ti:\n{task_list}"
+    return run_write(write)
+
+def my_tasks(user_id, db, user_name=None):
+    return task_page('my_tasks', user_id, user_name)
 
 def set_priority(user_id, task_id, priority, db):
     if not task_id.isdigit():
         return "Por favor, proporciona un ID de tarea válido. Uso: /set_priority [task_id] [high/medium/low]"
     
-    task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
-    if not task:
-        return f"No se encontró ninguna tarea con ID {task_id}."
-    
-    valid_priorities = ['high', 'medium', 'low']
-    if priority.lower() not in valid_priorities:
-        return "Prioridad inválida. Usa 'high', 'medium', o 'low'."
-    
-    if set_card_priority(task.trello_card_id, priority.lower()):
-        task.priority = priority.lower()
-        db.session.commit()
-        return f"Prioridad de la tarea '{task.name}' establecida a {priority}."
-    else:
-        return "Error al establecer la prioridad de la tarea en Trello."
+    def write():
+        task = db.session.query(Task).filter_by(id=int(task_id), user_id=user_id).first()
+        if not task:
+            return f"No se encontró ninguna tarea con ID {task_id}."
+
+        value = normalize_priority(priority)
+        if not value:
+            return "Prioridad inválida. Usa 'high', 'medium', o 'low'."
+
+        task.priority = value
+        _sync_to_trello(task, 'priority', value)
+        invalidate_user(user_id)
+        return f"Prioridad de la tarea '{task.name}' establecida a {value}."
+
+    return run_write(write)
 
 def priority_list(user_id, db):
-    tasks = db.session.query(Task).filter_by(user_id=user_id).order_by(
-        db.case(
-            {'high': 1, 'medium': 2, 'low': 3},
-            value=Task.priority
-        )
-    ).all()
-    
-    if not tasks:
-        return "No tienes tareas."
-    
-    task_list = "\n".join([f"- [{task.priority.upper()}] {task.name} (ID: {task.id})" for task in tasks])
-    return f"Tus tareas por prioridad:\n{task_list}"
+    return task_page('priority_list', user_id)
 
 def start_timer(user_id, task_name, db):
     task = None
+    task_name = task_name.strip()
     if task_name:
         task = db.session.query(Task).filter_by(name=task_name, user_id=user_id).first()
         if not task:
-            return f"No se encontró la tarea '{task_name}'."
+            task, message = _resolve_task_name(user_id, task_name)
+            if not task:
+                return message
 
-    timer = Timer(user_id=user_id, task_id=task.id if task else None)
-    db.session.add(timer)
-    db.session.commit()
+    # Solo puede haber un temporizador abierto: el anterior se cierra en la misma transacción
+    _, previous = open_timer(user_id, task.id if task else None)
 
-    if task:
-        return f"Temporizador iniciado para la tarea '{task_name}'."
-    else:
-        return "Temporizador iniciado."
+    message = f"Temporizador iniciado para la tarea '{task.name}'." if task else "Temporizador iniciado."
+    if previous:
+        message += f" Se detuvo el temporizador anterior ({_format_elapsed(previous)})."
+    return message
+
+def _resolve_task_name(user_id, task_name):
+    """ (tarea, None) con la tarea de nombre más parecido a `task_name`, o (None, mensaje) si no hay una clara. """
+    matches = task_search.fuzzy_matches(user_id, task_name)
+    close = [(score, task) for score, task in matches if score >= task_search.FUZZY_MATCH_RATIO]
+    if close and (len(close) == 1 or close[0][0] > close[1][0]):
+        return close[0][1], None
+    message = f"No se encontró la tarea '{task_name}'."
+    suggestions = [task for _, task in (close or matches)[:3]]
+    if suggestions:
+        message += " ¿Quisiste decir " + ", ".join(f"'{task.name}'" for task in suggestions) + "?"
+    return None, message
+
+def search_tasks(user_id, text, db):
+    if not text.strip():
+        return "Por favor, proporciona el texto a buscar. Uso: /search_tasks [texto]"
+    tasks = task_search.search_tasks(user_id, text)
+    if not tasks:
+        return f"No se encontraron tareas para '{text.strip()}'."
+    return f"Tareas que coinciden con '{text.strip()}':\n" + "\n".join(f"- {task.name} (ID: {task.id})" for task in tasks)
 
 def stop_timer(user_id, db):
-    timer = db.session.query(Timer).filter_by(user_id=user_id, end_time=None).first()
+    timer = finish_timer(user_id)
     if timer:
-        timer.end_time = datetime.utcnow()
-        db.session.commit()
-
-        elapsed = (timer.end_time - timer.start_time).total_seconds()
-        hours, remainder = divmod(int(elapsed), 3600)
-        minutes, seconds = divmod(remainder, 60)
-        message = f"Temporizador detenido. Tiempo transcurrido: {hours}h {minutes}m {seconds}s."
+        message = f"Temporizador detenido. Tiempo transcurrido: {_format_elapsed(timer)}."
     else:
         message = "No hay un temporizador en marcha."
 
     return message
 
+def _format_elapsed(timer):
+    elapsed = (timer.end_time - timer.start_time).total_seconds()
+    hours, remainder = divmod(int(elapsed), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h {minutes}m {seconds}s"
+
 def get_tip():
     tips = [
         "Divide tareas grandes en tareas más pequeñas.",
@@ -213,86 +340,80 @@ def get_tip():
     message = f"Consejo de productividad: {tip}"
     return message
 
-def break_reminder(user_id, slack_client, scheduler):
-    message = "¡Es hora de tomar un descanso! Estírate y relaja la mente."
-    slack_client.chat_postMessage(channel=user_id, text=message)
-    scheduler.add_job(lambda: break_reminder(user_id, slack_client, scheduler), 'interval', hours=1)
+def break_reminder(user_id, slack_sender, scheduler):
+    send_break_reminder(user_id, slack_sender)
+    scheduler.add_break_reminder(user_id)
+    return "Recordatorios de descanso activados: te avisaré cada hora."
+
+def send_break_reminder(user_id, slack_sender):
+    slack_sender.post_message(channel=user_id, text=BREAK_REMINDER_MESSAGE)
 
-def cancel_break_reminder(user_id, slack_client, scheduler):
-    scheduler.remove_all_jobs()
-    message = "Recordatorios de descanso cancelados."
-    slack_client.chat_postMessage(channel=user_id, text=message)
+def cancel_break_reminder(user_id, scheduler):
+    if scheduler.cancel_break_reminder(user_id):
+        return "Recordatorios de descanso cancelados."
+    return "No tenías recordatorios de descanso activos."
 
 def start_pomodoro(user_id, db, scheduler):
-  # Iniciar una sesión de Pomodoro
-  timer = Timer(user_id=user_id)
-  db.session.add(timer)
-  db.session.commit()
+  # Iniciar una sesión de Pomodoro (cierra cualquier temporizador abierto)
+  timer_id, _ = open_timer(user_id)
 
   # Programar el recordatorio al finalizar Pomodoro (25 minutos)
-  run_time = datetime.utcnow() + timedelta(minutes=25)
-  scheduler.add_job(send_pomodoro_end, 'date', run_date=run_time, args=[user_id, db])
+  run_time = datetime.utcnow() + timedelta(minutes=POMODORO_MINUTES)
+  scheduler.add_pomodoro_end(user_id, timer_id, run_time)
 
   message = "Sesión Pomodoro iniciada. Trabaja durante 25 minutos."
   return message
 
-def send_pomodoro_end(user_id, db):
-  slack_bot_token = os.getenv("SLACK_BOT_TOKEN")
-  slack_client = WebClient(token=slack_bot_token)
-  message = "¡Tu sesión Pomodoro ha terminado! Toma un descanso de 5 minutos."
-  slack_client.chat_postMessage(channel=user_id, text=message)
-
 def list_tasks(user_id, db):
-  tasks = db.session.query(Task).filter_by(user_id=user_id).all()
-  if not tasks:
-      return "No tienes tareas creadas."
-  task_list = "\n".join([f"- {task.name} (ID: {task.id})" for task in tasks])
-  message = f"Tus tareas:\n{task_list}"
-  return message
+  return task_page('list_tasks', user_id)
 
 def delete_task(user_id, task_id_str, db):
   if not task_id_str.isdigit():
       return "Por favor, proporciona un ID válido de tarea. Uso: /delete_task [ID]"
 
   task_id = int(task_id_str)
-  task = db.session.query(Task).filter_by(id=task_id, user_id=user_id).first()
-  if task:
+
+  def write():
+      task = db.session.query(Task).filter_by(id=task_id, user_id=user_id).first()
+      if not task:
+          return f"No se encontró la tarea con ID '{task_id}'."
       db.session.delete(task)
-      db.session.commit()
-      message = f"Tarea '{task.name}' eliminada."
-  else:
-      message = f"No se encontró la tarea con ID '{task_id}'."
-  return message
+      invalidate_user(user_id)
+      return f"Tarea '{task.name}' eliminada."
 
-def stats(user_id, db):
-  # Calcular tiempo total trabajado
-  timers = db.session.query(Timer).filter_by(user_id=user_id).all()
-  total_seconds = sum([(timer.end_time - timer.start_time).total_seconds() for timer in timers if timer.end_time])
-  hours, remainder = divmod(int(total_seconds), 3600)
-  minutes, seconds = divmod(remainder, 60)
+  return run_write(write)
 
-  # Contar Pomodoros
-  pomodoros = db.session.query(Timer).count()
+def stats(user_id, db, period=None):
+  try:
+      start, end, label = parse_period(period)
+  except ValueError:
+      return "Periodo inválido. Uso: /stats [today|week|month|YYYY-MM-DD..YYYY-MM-DD]"
+
+  # Totales agregados en SQL sobre el rollup diario (en caché hasta que el usuario cierre un temporizador)
+  total_seconds, sessions, pomodoros = get_read_cache().get_or_load(
+      user_id, 'stats', (start, end), lambda: user_totals(user_id, start, end))
+  hours, remainder = divmod(total_seconds, 3600)
+  minutes, seconds = divmod(remainder, 60)
 
-  message = f"**Estadísticas de Productividad**\nTiempo total trabajado: {hours}h {minutes}m {seconds}s.\nSesiones Pomodoro completadas: {pomodoros}."
+  message = (f"**Estadísticas de Productividad ({label})**\nTiempo total trabajado: {hours}h {minutes}m {seconds}s."
+             f"\nSesiones de trabajo: {sessions}.\nSesiones Pomodoro completadas: {pomodoros}.")
   return message
 
 def recent_tasks(user_id, db):
-  tareas = db.session.query(Task).filter_by(user_id=user_id).order_by(Task.created_at.desc()).limit(5).all()
-  if not tareas:
-      return "No tienes tareas recientes."
-  task_list = "\n".join([f"- {task.name} (Creada el: {task.created_at.strftime('%Y-%m-%d')})" for task in tareas])
-  message = f"Tus tareas recientes:\n{task_list}"
-  return message
+  return task_page('recent_tasks', user_id)
 
 def timer_status(user_id, db):
-  timer = db.session.query(Timer).filter_by(user_id=user_id, end_time=None).first()
-  if timer:
-      start_time = timer.start_time
+  # Se guarda el inicio y no el mensaje: el tiempo transcurrido se calcula en cada llamada
+  start_time = get_read_cache().get_or_load(user_id, 'timer_status', (), lambda: _open_timer_start(user_id))
+  if start_time:
       elapsed = datetime.utcnow() - start_time
       minutes, seconds = divmod(elapsed.seconds, 60)
       hours, minutes = divmod(minutes, 60)
       message = f"Tienes un temporizador activo desde {start_time.strftime('%H:%M:%S')} UTC. Tiempo transcurrido: {hours}h {minutes}m {seconds}s."
   else:
       message = "No tienes temporizadores activos."
-  return message
\ No newline at end of file
+  return message
+
+def _open_timer_start(user_id):
+  timer = db.session.query(Timer).filter_by(user_id=user_id, end_time=None).first()
+  return timer.start_time if timer else None
\ No newline at end of file
@@ -0,0 +1,193 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from slack_sdk.errors import SlackApiError
+
+# Límites por método (peticiones por segundo, ráfaga). chat.postMessage admite ~1 mensaje por
+# segundo y canal con ráfagas cortas, y un límite global de varios cientos por minuto.
+DEFAULT_RATE_LIMITS = {
+    'chat.postMessage': (5.0, 10),
+}
+FALLBACK_RATE_LIMIT = (1.0, 5)
+
+
+class TokenBucket:
+    """ Cubeta de tokens bloqueante; `pause` la vacía durante el Retry-After que indique Slack. """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class SlackSender:
+    """ Cola de salida de mensajes a Slack con un único WebClient y límite de ritmo por método.
+
+    WebClient abre una conexión urllib por petición (no hay pool): el límite de ritmo y el número
+    de workers acotan también las conexiones abiertas a la vez.
+    """
+
+    def __init__(self, client, workers=4, queue_size=10000, rate_limits=None, max_retries=3,
+                 retry_backoff=1.0, max_backoff=30.0):
+        self.client = client
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._latencies = deque(maxlen=1000)
+        self._counters = {'sent': 0, 'failed': 0, 'rate_limited': 0, 'dropped': 0}
+
+    @classmethod
+    def from_env(cls, client):
+        return cls(
+            client,
+            workers=int(os.getenv('SLACK_SENDER_WORKERS', '4')),
+            queue_size=int(os.getenv('SLACK_SENDER_QUEUE_SIZE', '10000')),
+            rate_limits=parse_rate_limits(os.getenv('SLACK_RATE_LIMITS')),
+        )
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"slack-sender-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def post_message(self, channel, text, **kwargs):
+        """ Encolar un chat.postMessage. Devuelve False si la cola está llena. """
+        return self.call('chat.postMessage', channel=channel, text=text, **kwargs)
+
+    def post_messages(self, messages):
+        """ Encolar de una vez varios chat.postMessage [(canal, texto), ...]. Devuelve cuántos se encolaron. """
+        return sum(1 for channel, text in messages if self.post_message(channel=channel, text=text))
+
+    def call(self, method, **payload):
+        self.start()
+        try:
+            self._queue.put_nowait((method, payload, time.monotonic(), 0, 0.0))
+        except queue.Full:
+            self._count('dropped')
+            logging.error("Cola de salida de Slack llena. Mensaje %s descartado.", method)
+            return False
+        return True
+
+    def stats(self):
+        """ Profundidad de la cola, contadores y latencia (encolado → enviado) de los últimos mensajes. """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+        stats = {'queue_depth': self._queue.qsize(), **counters}
+        if latencies:
+            stats['send_latency_avg'] = sum(latencies) / len(latencies)
+            stats['send_latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats['send_latency_max'] = latencies[-1]
+        return stats
+
+    def _bucket(self, method):
+        with self._lock:
+            bucket = self._buckets.get(method)
+            if bucket is None:
+                bucket = TokenBucket(*self.rate_limits.get(method, FALLBACK_RATE_LIMIT))
+                self._buckets[method] = bucket
+            return bucket
+
+    def _count(self, name, latency=None):
+        with self._lock:
+            self._counters[name] += 1
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._send(*job)
+            except Exception as e:
+                logging.error("Error inesperado al enviar a Slack: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, method, payload, enqueued_at, attempt, not_before=0.0):
+        # Un reintento no sale antes de su espera, aunque llegue pronto a la cabeza de la cola
+        wait = not_before - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        bucket = self._bucket(method)
+        bucket.acquire()
+        try:
+            self.client.api_call(method, json=payload)
+        except SlackApiError as e:
+            if e.response.status_code == 429 and attempt < self.max_retries:
+                retry_after = float(e.response.headers.get('Retry-After', 1))
+                bucket.pause(retry_after)
+                self._count('rate_limited')
+                logging.warning("Slack limitó %s. Reintentando en %ss", method, retry_after)
+                self._requeue(method, payload, enqueued_at, attempt + 1, retry_after)
+                return
+            self._count('failed')
+            logging.error("Error de Slack en %s: %s", method, e.response.get('error'))
+            return
+        except Exception as e:
+            if attempt < self.max_retries:
+                # Error de red o de Slack: espera exponencial, como Retry-After en los 429
+                delay = min(self.max_backoff, self.retry_backoff * 2 ** attempt)
+                logging.warning("Error al enviar %s a Slack: %s. Reintentando en %ss", method, e, delay)
+                self._requeue(method, payload, enqueued_at, attempt + 1, delay)
+                return
+            self._count('failed')
+            logging.error("Error al enviar %s a Slack: %s", method, e)
+            return
+        self._count('sent', time.monotonic() - enqueued_at)
+
+    def _requeue(self, method, payload, enqueued_at, attempt, delay):
+        try:
+            self._queue.put_nowait((method, payload, enqueued_at, attempt, time.monotonic() + delay))
+        except queue.Full:
+            self._count('dropped')
+            logging.error("Cola de salida de Slack llena. Mensaje %s descartado tras reintento.", method)
+
+
+def parse_rate_limits(value):
+    """ Convertir 'chat.postMessage=5:10,chat.update=1:3' en {método: (ritmo, ráfaga)}. """
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        method, spec = item.split('=', 1)
+        rate, _, burst = spec.partition(':')
+        limits[method.strip()] = (float(rate), int(burst or 1))
+    return limits
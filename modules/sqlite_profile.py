@@ -0,0 +1,94 @@
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from models import db
+
+# Las transacciones que empiezan mientras vale True se abren con BEGIN IMMEDIATE (ver immediate())
+_IMMEDIATE = ContextVar('sqlite_begin_immediate', default=False)
+
+
+@contextmanager
+def immediate():
+    """ Las transacciones SQLite que empiecen dentro del bloque toman el bloqueo de escritura desde el BEGIN.
+
+    Una transacción diferida que lee y después escribe tiene que ampliar su bloqueo a mitad; si otro proceso
+    ha escrito entretanto, SQLite devuelve SQLITE_BUSY al momento y busy_timeout no lo reintenta. Con BEGIN
+    IMMEDIATE la espera es al empezar, donde busy_timeout sí se aplica. Sin el perfil de SQLite no hace nada.
+    """
+    token = _IMMEDIATE.set(True)
+    try:
+        yield
+    finally:
+        _IMMEDIATE.reset(token)
+
+
+def configure_sqlite(app):
+    """ Perfil de producción para SQLite: opciones del motor antes de db.init_app(app).
+
+    No hace nada si la base de datos no es SQLite o si SQLITE_TUNING=false.
+    """
+    config = app.config
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    enabled = config.get('SQLITE_TUNING', os.getenv('SQLITE_TUNING', 'true').lower() in ('1', 'true', 'yes'))
+    # Las bases de datos en memoria (sqlite:// o :memory:) no admiten WAL ni un pool de conexiones
+    config['SQLITE_TUNING'] = enabled and url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+    if not config['SQLITE_TUNING']:
+        return
+
+    config.setdefault('SQLITE_BUSY_TIMEOUT_MS', int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')))
+    config.setdefault('SQLITE_SYNCHRONOUS', os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper())
+    config.setdefault('SQLITE_CACHE_SIZE_KB', int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536')))
+    config.setdefault('SQLITE_MMAP_SIZE', int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))))
+
+    # Con SQLAlchemy 1.4 un fichero SQLite usa NullPool: una conexión nueva (y sus PRAGMA) por sesión.
+    # Un pool reutiliza las conexiones y su caché de páginas entre peticiones y hilos.
+    options = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options.setdefault('poolclass', QueuePool)
+    options.setdefault('pool_size', config.get('SLASH_WORKERS', 4) + 4)
+    options.setdefault('max_overflow', 10)
+    connect_args = options.setdefault('connect_args', {})
+    connect_args.setdefault('check_same_thread', False)
+    connect_args.setdefault('timeout', config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+
+
+def install_pragmas(app):
+    """ Aplicar los PRAGMA a cada conexión nueva del motor de la aplicación. Llamar después de db.init_app(app). """
+    if not app.config.get('SQLITE_TUNING'):
+        return
+    config = app.config
+    pragmas = (
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA cache_size=-{config['SQLITE_CACHE_SIZE_KB']}",
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}",
+    )
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        # pysqlite abre y cierra transacciones por su cuenta y rompe los SAVEPOINT; se desactiva y
+        # SQLAlchemy emite BEGIN (ver el evento 'begin'), que además permite fijar los PRAGMA fuera de una transacción
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        # Las lecturas empiezan en diferido y no bloquean a nadie; las escrituras, con el bloqueo ya tomado
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if _IMMEDIATE.get() else "BEGIN")
+
+    logging.info("Perfil SQLite activo: WAL, synchronous=%s, busy_timeout=%s ms",
+                 config['SQLITE_SYNCHRONOUS'], config['SQLITE_BUSY_TIMEOUT_MS'])
@@ -0,0 +1,138 @@
+import re
+from datetime import datetime, date, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from models import db, Timer, TimerDailyRollup
+from modules.write_coalescer import write_transaction
+
+RANGE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:\.\.(\d{4}-\d{2}-\d{2}))?$')
+
+
+def split_by_day(start_time, end_time):
+    """ Repartir un intervalo entre los días (UTC) que abarca: [(día, segundos), ...]. """
+    parts = []
+    current = start_time
+    while current < end_time:
+        next_day = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+        chunk_end = min(next_day, end_time)
+        parts.append((current.date(), int((chunk_end - current).total_seconds())))
+        current = chunk_end
+    return parts
+
+
+def _upsert_rollup(user_id, day, seconds, sessions, pomodoros):
+    """ Sumar a la fila (user_id, day) del rollup con un único INSERT ... ON CONFLICT. """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        rollup = db.session.get(TimerDailyRollup, (user_id, day))
+        if rollup is None:
+            rollup = TimerDailyRollup(user_id=user_id, day=day, seconds=0, sessions=0, pomodoros=0)
+            db.session.add(rollup)
+        rollup.seconds += seconds
+        rollup.sessions += sessions
+        rollup.pomodoros += pomodoros
+        return
+
+    table = TimerDailyRollup.__table__
+    stmt = insert(table).values(user_id=user_id, day=day, seconds=seconds, sessions=sessions, pomodoros=pomodoros)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'day'],
+        set_={
+            'seconds': table.c.seconds + stmt.excluded.seconds,
+            'sessions': table.c.sessions + stmt.excluded.sessions,
+            'pomodoros': table.c.pomodoros + stmt.excluded.pomodoros,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def record_session(user_id, start_time, end_time, pomodoro=False):
+    """ Acumular en el rollup diario una sesión terminada. No hace commit: va en la transacción del llamador. """
+    parts = split_by_day(start_time, end_time) or [(start_time.date(), 0)]
+    for index, (day, seconds) in enumerate(parts):
+        # La sesión cuenta en el día en que empezó; los segundos, en el día en que se trabajaron
+        first = index == 0
+        _upsert_rollup(user_id, day, seconds, 1 if first else 0, 1 if first and pomodoro else 0)
+
+
+def parse_period(text, today=None):
+    """ Convertir 'today', 'week', 'month' o 'YYYY-MM-DD[..YYYY-MM-DD]' en (inicio, fin, etiqueta).
+
+    Un texto vacío significa todo el historial: (None, None, etiqueta). Lanza ValueError si no se reconoce.
+    """
+    today = today or datetime.utcnow().date()
+    text = (text or '').strip().lower()
+    if not text:
+        return None, None, "todo el historial"
+    if text in ('today', 'hoy'):
+        return today, today, "hoy"
+    if text in ('week', 'semana'):
+        return today - timedelta(days=today.weekday()), today, "esta semana"
+    if text in ('month', 'mes'):
+        return today.replace(day=1), today, "este mes"
+
+    match = RANGE_PATTERN.match(text)
+    if not match:
+        raise ValueError(text)
+    start = date.fromisoformat(match.group(1))
+    end = date.fromisoformat(match.group(2)) if match.group(2) else start
+    if end < start:
+        raise ValueError(text)
+    return start, end, f"{start.isoformat()} a {end.isoformat()}"
+
+
+def totals_query(user_id, start=None, end=None):
+    """ Consulta que agrega en SQL los totales del usuario sobre el rollup. """
+    query = db.session.query(
+        func.coalesce(func.sum(TimerDailyRollup.seconds), 0),
+        func.coalesce(func.sum(TimerDailyRollup.sessions), 0),
+        func.coalesce(func.sum(TimerDailyRollup.pomodoros), 0),
+    ).filter(TimerDailyRollup.user_id == user_id)
+    if start is not None:
+        query = query.filter(TimerDailyRollup.day >= start)
+    if end is not None:
+        query = query.filter(TimerDailyRollup.day <= end)
+    return query
+
+
+def user_totals(user_id, start=None, end=None):
+    """ (segundos, sesiones, pomodoros) del usuario en el rango. """
+    seconds, sessions, pomodoros = totals_query(user_id, start, end).one()
+    return int(seconds), int(sessions), int(pomodoros)
+
+
+def rebuild_rollups(batch_size=1000):
+    """ Recalcular el rollup completo a partir de la tabla timer.
+
+    La tabla timer no distingue los Pomodoros, así que el recálculo solo restaura segundos y sesiones.
+    """
+    count = 0
+    last_id = 0
+    with write_transaction():
+        db.session.query(TimerDailyRollup).delete()
+        while True:
+            timers = db.session.query(Timer.id, Timer.user_id, Timer.start_time, Timer.end_time) \
+                .filter(Timer.id > last_id, Timer.end_time.isnot(None)) \
+                .order_by(Timer.id).limit(batch_size).all()
+            if not timers:
+                break
+            for _, user_id, start_time, end_time in timers:
+                record_session(user_id, start_time, end_time)
+            count += len(timers)
+            last_id = timers[-1].id
+    return count
+
+
+@click.command('stats-rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """ Reconstruir timer_daily_rollup desde los temporizadores existentes. """
+    count = rebuild_rollups()
+    click.echo(f"Rollup reconstruido a partir de {count} temporizadores.")
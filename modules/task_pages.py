@@ -0,0 +1,173 @@
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from models import db, Task
+from modules.read_cache import get_read_cache
+
+# Tareas por página; con nombres de hasta 100 caracteres la página cabe en un bloque de texto (3000)
+PAGE_SIZE = int(os.getenv("SLACK_PAGE_SIZE", "20"))
+
+NEXT_ACTION = 'task_page_next'
+PREV_ACTION = 'task_page_prev'
+
+PRIORITY_ORDER = ('high', 'medium', 'low', None)
+
+
+class TaskList:
+    """ Una lista paginada de tareas.
+
+    La lista es una secuencia de segmentos (filtros sobre índices) recorridos en orden; dentro de cada
+    segmento las filas se ordenan por `order` y se pagina por clave (keyset), nunca con OFFSET.
+    """
+
+    def __init__(self, title, empty, line, order, segments, descending=False, cached=True):
+        self.title = title
+        self.empty = empty
+        self.line = line
+        self.order = order
+        self.segments = segments
+        self.descending = descending
+        self.cached = cached
+
+    def key(self, task):
+        return [getattr(task, column.key) for column in self.order]
+
+
+def _priority_segments(user_id, user_name):
+    return [Task.priority.is_(None) if priority is None else Task.priority == priority
+            for priority in PRIORITY_ORDER]
+
+
+def _assignee_segments(user_id, user_name):
+    # /assign_task y el webhook de Trello guardan el usuario como '@usuario'
+    assignees = [user_id] + ([f"@{user_name}"] if user_name else [])
+    return [Task.assigned_to == assignee for assignee in assignees]
+
+
+TASK_LISTS = {
+    'list_tasks': TaskList(
+        "Tus tareas:", "No tienes tareas creadas.",
+        lambda task: f"- {task.name} (ID: {task.id})",
+        order=(Task.created_at, Task.id),
+        segments=lambda user_id, user_name: [Task.user_id == user_id],
+    ),
+    'recent_tasks': TaskList(
+        "Tus tareas recientes:", "No tienes tareas recientes.",
+        lambda task: f"- {task.name} (Creada el: {task.created_at.strftime('%Y-%m-%d')})",
+        order=(Task.created_at, Task.id),
+        segments=lambda user_id, user_name: [Task.user_id == user_id],
+        descending=True,
+    ),
+    'priority_list': TaskList(
+        "Tus tareas por prioridad:", "No tienes tareas.",
+        lambda task: f"- [{(task.priority or 'sin prioridad').upper()}] {task.name} (ID: {task.id})",
+        order=(Task.id,),
+        segments=lambda user_id, user_name: [(Task.user_id == user_id) & segment
+                                             for segment in _priority_segments(user_id, user_name)],
+    ),
+    'my_tasks': TaskList(
+        "Tareas asignadas a ti:", "No tienes tareas asignadas.",
+        lambda task: f"- {task.name} (ID: {task.id})",
+        order=(Task.id,),
+        segments=_assignee_segments,
+        # Las asignaciones las cambian otros usuarios y Trello, no el dueño de la caché
+        cached=False,
+    ),
+}
+
+
+def segment_query(task_list, segment, after=None, forward=True):
+    """ Consulta de un segmento a partir de la clave `after` (excluida), hacia delante o hacia atrás. """
+    ascending = forward != task_list.descending
+    query = db.session.query(Task).filter(segment)
+    if after is not None:
+        key = tuple_(*task_list.order)
+        query = query.filter(key > tuple_(*after) if ascending else key < tuple_(*after))
+    return query.order_by(*[column.asc() if ascending else column.desc() for column in task_list.order])
+
+
+def fetch_page(name, user_id, user_name=None, cursor=None, forward=True, size=None):
+    """ Tareas de una página y si existen la anterior y la siguiente.
+
+    `cursor` es (segmento, clave) de la última tarea de la página previa (o de la primera, hacia atrás).
+    """
+    size = size or PAGE_SIZE
+    task_list = TASK_LISTS[name]
+    segments = task_list.segments(user_id, user_name)
+    start, after = cursor if cursor else (0, None)
+    indexes = range(start, len(segments)) if forward else range(start, -1, -1)
+
+    rows = []
+    for index in indexes:
+        query = segment_query(task_list, segments[index], after if index == start else None, forward)
+        rows += [(index, task) for task in query.limit(size + 1 - len(rows))]
+        if len(rows) > size:
+            break
+
+    more = len(rows) > size
+    rows = rows[:size]
+    if not forward:
+        rows.reverse()
+    has_prev, has_next = (cursor is not None, more) if forward else (more, True)
+    return rows, has_prev, has_next
+
+
+def encode_cursor(name, index, key):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    return json.dumps({'list': name, 'segment': index, 'key': values}, separators=(',', ':'))
+
+
+def decode_cursor(value):
+    """ (lista, (segmento, clave)) a partir del valor de un botón. Lanza ValueError si no es válido. """
+    try:
+        data = json.loads(value)
+        task_list = TASK_LISTS[data['list']]
+        key = [datetime.fromisoformat(value) if column.key == 'created_at' else int(value)
+               for column, value in zip(task_list.order, data['key'])]
+        return data['list'], (int(data['segment']), key)
+    except (KeyError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError(value) from e
+
+
+def task_page(name, user_id, user_name=None, cursor=None, forward=True):
+    """ Mensaje de Block Kit con una página de la lista y botones Anterior/Siguiente. """
+    if TASK_LISTS[name].cached:
+        return get_read_cache().get_or_load(user_id, name, (cursor, forward),
+                                            lambda: _task_page(name, user_id, user_name, cursor, forward))
+    return _task_page(name, user_id, user_name, cursor, forward)
+
+
+def _task_page(name, user_id, user_name, cursor, forward):
+    task_list = TASK_LISTS[name]
+    rows, has_prev, has_next = fetch_page(name, user_id, user_name, cursor, forward)
+    if not rows:
+        return task_list.empty if cursor is None else {'text': task_list.empty, 'replace_original': True}
+
+    lines = "\n".join(task_list.line(task) for _, task in rows)
+    blocks = [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': f"{task_list.title}\n{lines}"}}]
+
+    buttons = []
+    if has_prev:
+        index, task = rows[0]
+        buttons.append({'type': 'button', 'action_id': PREV_ACTION, 'text': {'type': 'plain_text', 'text': "Anterior"},
+                        'value': encode_cursor(name, index, task_list.key(task))})
+    if has_next:
+        index, task = rows[-1]
+        buttons.append({'type': 'button', 'action_id': NEXT_ACTION, 'text': {'type': 'plain_text', 'text': "Siguiente"},
+                        'value': encode_cursor(name, index, task_list.key(task))})
+    if buttons:
+        blocks.append({'type': 'actions', 'elements': buttons})
+
+    message = {'text': task_list.title, 'blocks': blocks}
+    if cursor is not None:
+        message['replace_original'] = True
+    return message
+
+
+def handle_page_action(action, user_id, user_name=None):
+    """ Página pedida con un botón Anterior/Siguiente. La lista siempre es la del usuario que pulsa. """
+    name, cursor = decode_cursor(action.get('value'))
+    return task_page(name, user_id, user_name, cursor, forward=action.get('action_id') == NEXT_ACTION)
@@ -0,0 +1,84 @@
+import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+from sqlalchemy import column, func, literal_column, select, table
+
+from models import db, Task
+
+# Resultados de /search_tasks
+SEARCH_LIMIT = int(os.getenv("TASK_SEARCH_LIMIT", "20"))
+# Candidatos del índice que se comparan con el nombre escrito en /start_timer
+FUZZY_CANDIDATES = int(os.getenv("TASK_FUZZY_CANDIDATES", "50"))
+# Parecido mínimo (0-1) para que /start_timer use una tarea que no se llama exactamente así
+FUZZY_MATCH_RATIO = float(os.getenv("TASK_FUZZY_MATCH_RATIO", "0.7"))
+# Letras iniciales de cada palabra con las que se buscan candidatos (las erratas suelen estar más adelante)
+FUZZY_PREFIX = 3
+
+WORD = re.compile(r'\w+')
+
+# Tabla FTS5 de la migración a4d9e6b2c815 (solo SQLite; no es un modelo)
+task_fts = table('task_fts', column('rowid'), column('task_fts'))
+
+
+def words(text):
+    return [word.lower() for word in WORD.findall(text or '')]
+
+
+def search_query(user_id, terms, any_term=False, limit=SEARCH_LIMIT):
+    """ Las `limit` tareas de `user_id` más relevantes cuyo nombre tiene palabras que empiezan por cada uno de
+    `terms` (o por alguno, con `any_term`). Usa el índice de búsqueda de la base de datos configurada.
+    """
+    dialect = db.session.get_bind().dialect.name
+    query = db.session.query(Task).filter(Task.user_id == user_id)
+    if dialect == 'sqlite':
+        # Los términos son \w+: no contienen comillas ni operadores de FTS5
+        names = (' OR ' if any_term else ' ').join(f'"{term}"*' for term in terms)
+        match = f'user_id : "{user_id.replace(chr(34), chr(34) * 2)}" AND name : ({names})'
+        score = func.bm25(literal_column('task_fts'), 1.0, 0.0).label('score')
+        # Con LIMIT la subconsulta no se aplana: SQLite siempre lee primero el índice FTS5 y después busca
+        # cada tarea por id, en vez de recorrer las tareas del usuario evaluando el MATCH en cada una
+        matches = select(task_fts.c.rowid, score).where(task_fts.c.task_fts.op('MATCH')(match)) \
+            .order_by(score).limit(limit).subquery()
+        return query.join(matches, matches.c.rowid == Task.id).order_by(matches.c.score, Task.id)
+    if dialect == 'postgresql':
+        vector = func.to_tsvector(literal_column("'simple'"), Task.name)
+        tsquery = func.to_tsquery(literal_column("'simple'"),
+                                  (' | ' if any_term else ' & ').join(f"{term}:*" for term in terms))
+        query = query.filter(vector.op('@@')(tsquery)).order_by(func.ts_rank(vector, tsquery).desc(), Task.id)
+        return query.limit(limit)
+    # Sin índice de texto: subcadenas, sin orden por relevancia
+    conditions = [func.lower(Task.name).contains(term, autoescape=True) for term in terms]
+    return query.filter(db.or_(*conditions) if any_term else db.and_(*conditions)).order_by(Task.id).limit(limit)
+
+
+def search_tasks(user_id, text, limit=SEARCH_LIMIT):
+    terms = words(text)
+    if not terms:
+        return []
+    return search_query(user_id, terms, limit=limit).all()
+
+
+def _fold(text):
+    """ Minúsculas y sin acentos, para comparar nombres. """
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def fuzzy_matches(user_id, name):
+    """ [(parecido, tarea)] de las tareas con un nombre parecido a `name`, de la más a la menos parecida.
+
+    El índice da los candidatos (alguna palabra empieza igual) y difflib los ordena por parecido con el
+    nombre completo, así que se toleran erratas, acentos y palabras que faltan o sobran.
+    """
+    terms = words(name)
+    # Las palabras de una o dos letras (de, la…) coinciden con casi todo: solo si no hay otras
+    terms = [term for term in terms if len(term) >= FUZZY_PREFIX] or terms
+    if not terms:
+        return []
+    prefixes = list(dict.fromkeys(term[:FUZZY_PREFIX] for term in terms))
+    candidates = search_query(user_id, prefixes, any_term=True, limit=FUZZY_CANDIDATES).all()
+    folded = _fold(name)
+    scored = [(SequenceMatcher(None, folded, _fold(task.name)).ratio(), task) for task in candidates]
+    return sorted(scored, key=lambda match: match[0], reverse=True)
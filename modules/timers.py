@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Timer
+from modules.read_cache import invalidate_user
+from modules.stats import record_session
+from modules.write_coalescer import run_write
+
+# Cierre en una sola sentencia: el UPDATE devuelve el intervalo cerrado, sin leer antes la fila
+CLOSE_OPEN_TIMER = text(
+    "UPDATE timer SET end_time = :now WHERE user_id = :user_id AND end_time IS NULL "
+    "RETURNING id, start_time, end_time"
+).bindparams(bindparam('now', type_=db.DateTime)).columns(id=db.Integer, start_time=db.DateTime, end_time=db.DateTime)
+
+CLOSE_TIMER = text(
+    "UPDATE timer SET end_time = :now WHERE id = :timer_id AND end_time IS NULL "
+    "RETURNING id, start_time, end_time"
+).bindparams(bindparam('now', type_=db.DateTime)).columns(id=db.Integer, start_time=db.DateTime, end_time=db.DateTime)
+
+
+def _record(user_id, closed, pomodoro=False):
+    if closed is not None:
+        record_session(user_id, closed.start_time, closed.end_time, pomodoro=pomodoro)
+        invalidate_user(user_id)
+    return closed
+
+
+def close_open_timer(user_id, now=None):
+    """ Cerrar el temporizador abierto del usuario y sumarlo al rollup. Devuelve la fila cerrada o None. No hace commit. """
+    closed = db.session.execute(CLOSE_OPEN_TIMER, {'now': now or datetime.utcnow(), 'user_id': user_id}).first()
+    return _record(user_id, closed)
+
+
+def close_timer(user_id, timer_id, now=None, pomodoro=False):
+    """ Cerrar un temporizador concreto si sigue abierto. Devuelve la fila cerrada o None. No hace commit. """
+    closed = db.session.execute(CLOSE_TIMER, {'now': now or datetime.utcnow(), 'timer_id': timer_id}).first()
+    return _record(user_id, closed, pomodoro=pomodoro)
+
+
+def open_timer(user_id, task_id=None):
+    """ Iniciar un temporizador cerrando antes el que estuviera abierto, todo en una transacción.
+
+    Devuelve (timer_id, cerrado) donde `cerrado` es el intervalo del temporizador anterior o None.
+    """
+    def write():
+        now = datetime.utcnow()
+        closed = close_open_timer(user_id, now)
+        timer = Timer(user_id=user_id, task_id=task_id, start_time=now)
+        db.session.add(timer)
+        db.session.flush()
+        invalidate_user(user_id)
+        return timer.id, closed
+
+    for attempt in range(2):
+        try:
+            return run_write(write)
+        except IntegrityError:
+            # Otro worker abrió un temporizador para el mismo usuario entre el UPDATE y el INSERT
+            if attempt:
+                raise
+
+
+def finish_timer(user_id):
+    """ Cerrar el temporizador abierto del usuario y hacer commit. Devuelve la fila cerrada o None. """
+    return run_write(lambda: close_open_timer(user_id))
@@ -0,0 +1,185 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+import aiohttp
+import requests
+
+from modules.log_pipeline import PAYLOAD
+from modules.metrics import add_time, registry as metrics_registry
+from modules.trello_client import IDEMPOTENT_METHODS, RETRY_STATUSES, BudgetExceeded, get_client
+
+FANOUT_CALLS = metrics_registry.histogram(
+    'trello_fanout_calls', "Llamadas a Trello lanzadas a la vez por cada gather().",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+
+
+class AsyncTrelloClient:
+    """ Variante asyncio del cliente de Trello para lanzar muchas lecturas a la vez.
+
+    Usa la configuración, el circuito y la pausa por límite de ritmo del cliente síncrono `client`, así que
+    las dos variantes ven el mismo estado de Trello. Tiene un bucle de eventos propio en un hilo de fondo con
+    una sesión aiohttp (pool de `pool_size` conexiones); como mucho `concurrency` peticiones están en vuelo.
+    Desde Flask y el scheduler se usa con gather(), que bloquea hasta que terminan todas las llamadas.
+    """
+
+    def __init__(self, client, concurrency=10, pool_size=None):
+        self.client = client
+        self.concurrency = concurrency
+        self.pool_size = pool_size or concurrency
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, client):
+        return cls(client,
+                   concurrency=int(os.getenv("TRELLO_FANOUT_CONCURRENCY", "10")),
+                   pool_size=int(os.getenv("TRELLO_POOL_SIZE", "10")))
+
+    def gather(self, calls, timeout=None):
+        """ Ejecutar `calls` a la vez y devolver sus resultados en el mismo orden.
+
+        Cada llamada es (método, ruta, params). El resultado es el JSON de la respuesta, o None si Trello
+        falló, respondió con error o el circuito está abierto. Todas comparten el vencimiento y el
+        presupuesto del comando actual, y al comando se le suma el tiempo real de espera, no el de cada llamada.
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+        FANOUT_CALLS.observe(value=len(calls))
+        deadline = self.client._deadline()
+        if timeout is None and deadline is not None:
+            timeout = max(0.0, deadline - time.monotonic()) + 1
+        started = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(self._gather(calls, deadline), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise BudgetExceeded("El comando agotó su tiempo esperando a Trello")
+        finally:
+            add_time('trello', time.perf_counter() - started)
+
+    def get_many(self, paths, params=None):
+        """ gather() de lecturas GET con los mismos `params` en todas las rutas. """
+        return self.gather([('GET', path, params) for path in paths])
+
+    def close(self):
+        with self._lock:
+            loop, session = self._loop, self._session
+            self._loop = self._session = None
+        if loop is None or self._pid != os.getpid():
+            return
+        asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _ensure_loop(self):
+        # Un bucle por proceso: el hilo y las conexiones del padre no sobreviven a un fork
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="trello-async", daemon=True).start()
+                self._session = asyncio.run_coroutine_threadsafe(self._open_session(), loop).result()
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                self._loop = loop
+                self._pid = os.getpid()
+            return self._loop
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        return aiohttp.ClientSession(connector=connector)
+
+    async def _gather(self, calls, deadline):
+        return await asyncio.gather(*(self._call(method, path, params, deadline) for method, path, params in calls))
+
+    async def _call(self, method, path, params, deadline):
+        async with self._semaphore:
+            try:
+                return await self.request(method, path, params, deadline)
+            except (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # ValueError: JSON inválido en una respuesta correcta; el circuito ya lo anotó como fallo
+                logging.error("Error en %s %s: %s", method, path, e)
+                return None
+
+    async def request(self, method, path, params=None, deadline=None):
+        """ Petición a Trello con los mismos reintentos y circuito que TrelloClient.request. Devuelve el JSON o None. """
+        breaker = self.client.breaker
+        breaker.before_call()
+        started = time.perf_counter()
+        try:
+            status, body = await self._request(method, path, params, deadline)
+        except BudgetExceeded:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(True, time.perf_counter() - started)
+            raise
+        breaker.record(status in RETRY_STATUSES, time.perf_counter() - started)
+        if status >= 400:
+            logging.error("Trello respondió %s a %s %s", status, method, path)
+            logging.debug("Respuesta de Trello a %s %s: %s", method, path, body, extra=PAYLOAD)
+            return None
+        return body
+
+    async def _request(self, method, path, params, deadline):
+        client = self.client
+        url = f"{client.base_url}{path}"
+        query = {**client.session.params, **(params or {})}
+        attempt = 0
+        while True:
+            await self._wait_for_rate_limit()
+            connect_timeout, read_timeout = client._timeout(deadline)
+            timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            try:
+                async with self._session.request(method, url, params=query, timeout=timeout) as response:
+                    body = await response.json(content_type=None) if response.status < 400 else await response.text()
+                    client._record_rate_limit(response)
+                    retryable = response.status == 429 or (
+                        response.status in RETRY_STATUSES and method in IDEMPOTENT_METHODS)
+                    if not retryable or attempt >= client.max_retries:
+                        return response.status, body
+                    delay = client._retry_delay(response, attempt)
+                    logging.warning("Trello respondió %s a %s %s. Reintentando en %.2fs", response.status, method, path, delay)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                # ClientPayloadError: la conexión se cortó a mitad del cuerpo; se reintenta como un fallo de conexión
+                if method not in IDEMPOTENT_METHODS or attempt >= client.max_retries:
+                    raise
+                delay = client._backoff_delay(attempt)
+                logging.warning("Fallo de conexión con Trello (%r). Reintentando en %.2fs", e, delay)
+
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise requests.Timeout(f"Sin tiempo para reintentar {method} {path} antes del vencimiento del comando")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _wait_for_rate_limit(self):
+        with self.client._lock:
+            wait = self.client._blocked_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_async_client = None
+_async_client_lock = threading.Lock()
+
+
+def get_async_client():
+    """ Cliente asyncio compartido por todo el proceso, sobre el cliente síncrono de get_client(). """
+    global _async_client
+    if _async_client is None:
+        with _async_client_lock:
+            if _async_client is None:
+                _async_client = AsyncTrelloClient.from_env(get_client())
+    return _async_client
+
+
+def close_async_client():
+    """ Cerrar la sesión y el bucle del cliente asyncio si se llegaron a abrir en este proceso. """
+    if _async_client is not None:
+        _async_client.close()
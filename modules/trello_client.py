@@ -0,0 +1,220 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.circuit_breaker import CircuitBreaker
+from modules.dispatcher import current_deadline
+from modules.metrics import add_time, current_timings, registry as metrics_registry
+
+DEFAULT_BASE_URL = "https://api.trello.com/1"
+
+# Códigos que Trello devuelve ante saturación o fallos transitorios
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+
+
+class BudgetExceeded(requests.Timeout):
+    """ El comando no tiene tiempo (o presupuesto de Trello) para la llamada; Trello no ha fallado. """
+
+
+class TrelloClient:
+    """ Cliente HTTP de Trello con sesión persistente, timeouts, reintentos con backoff y circuito.
+
+    `command_budget` limita los segundos que un mismo comando puede pasar esperando a Trello, sumando
+    todas sus llamadas; el vencimiento del comando también acota cada llamada.
+    """
+
+    def __init__(self, api_key, token, board_id=None, base_url=DEFAULT_BASE_URL,
+                 connect_timeout=3.05, read_timeout=10.0, max_retries=3,
+                 backoff=0.5, max_backoff=10.0, pool_size=10, command_budget=None, breaker=None):
+        self.board_id = board_id
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.command_budget = command_budget
+        self.breaker = breaker or CircuitBreaker()
+
+        # La autenticación se inyecta una sola vez en la sesión
+        self.session = requests.Session()
+        self.session.params = {'key': api_key, 'token': token}
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            api_key=os.getenv("TRELLO_API_KEY"),
+            token=os.getenv("TRELLO_TOKEN"),
+            board_id=os.getenv("TRELLO_BOARD_ID"),
+            base_url=os.getenv("TRELLO_API_URL", DEFAULT_BASE_URL),
+            connect_timeout=float(os.getenv("TRELLO_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("TRELLO_READ_TIMEOUT", "10")),
+            max_retries=int(os.getenv("TRELLO_MAX_RETRIES", "3")),
+            pool_size=int(os.getenv("TRELLO_POOL_SIZE", "10")),
+            command_budget=float(os.getenv("TRELLO_COMMAND_BUDGET", "10")) or None,
+            breaker=CircuitBreaker(
+                window=float(os.getenv("TRELLO_BREAKER_WINDOW", "30")),
+                min_calls=int(os.getenv("TRELLO_BREAKER_MIN_CALLS", "10")),
+                error_rate=float(os.getenv("TRELLO_BREAKER_ERROR_RATE", "0.5")),
+                slow_call=float(os.getenv("TRELLO_BREAKER_SLOW_CALL", "5")),
+                slow_rate=float(os.getenv("TRELLO_BREAKER_SLOW_RATE", "0.5")),
+                cooldown=float(os.getenv("TRELLO_BREAKER_COOLDOWN", "30")),
+            ),
+        )
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def request(self, method, path, params=None, **kwargs):
+        """ Ejecutar una petición contra la API de Trello.
+
+        Reintenta los 429 y, en métodos idempotentes, los 5xx y timeouts. Lanza
+        requests.RequestException si no hay respuesta tras agotar los reintentos, y CircuitOpenError
+        sin llamar a Trello si el circuito está abierto.
+        """
+        deadline = self._deadline()
+        self.breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = self._request(method, path, params, deadline, **kwargs)
+        except BudgetExceeded:
+            self.breaker.release()
+            raise
+        except requests.RequestException:
+            self.breaker.record(True, time.perf_counter() - started)
+            raise
+        else:
+            self.breaker.record(response.status_code in RETRY_STATUSES, time.perf_counter() - started)
+            return response
+        finally:
+            # Incluye esperas por límite de ritmo y reintentos: es el tiempo que el comando pasa en Trello
+            add_time('trello', time.perf_counter() - started)
+
+    def _deadline(self):
+        """ Instante (time.monotonic) límite para esta llamada: vencimiento del comando o fin de su presupuesto. """
+        deadline = current_deadline()
+        timings = current_timings()
+        if self.command_budget and timings is not None:
+            budget_deadline = time.monotonic() + self.command_budget - timings.trello
+            deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+        return deadline
+
+    def _request(self, method, path, params, deadline, **kwargs):
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            self._wait_for_rate_limit()
+            timeout = self._timeout(deadline)
+            try:
+                response = self.session.request(method, url, params=params, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logging.warning("Fallo de conexión con Trello (%s). Reintentando en %.2fs", e, delay)
+            else:
+                self._record_rate_limit(response)
+                retryable = response.status_code == 429 or (
+                    response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_delay(response, attempt)
+                logging.warning("Trello respondió %s a %s %s. Reintentando en %.2fs", response.status_code, method, path, delay)
+
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise requests.Timeout(f"Sin tiempo para reintentar {method} {path} antes del vencimiento del comando")
+            time.sleep(delay)
+            attempt += 1
+
+    def _timeout(self, deadline):
+        read_timeout = self.read_timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise BudgetExceeded("El comando agotó su tiempo antes de llamar a Trello")
+            read_timeout = min(read_timeout, remaining)
+        return (self.connect_timeout, read_timeout)
+
+    def _backoff_delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        interval = _rate_limit_interval(response)
+        if interval is not None:
+            return min(self.max_backoff, interval)
+        return self._backoff_delay(attempt)
+
+    def _record_rate_limit(self, response):
+        """ Si Trello indica que no quedan peticiones en la ventana, pausar hasta que se renueve. """
+        interval = _rate_limit_interval(response)
+        if interval is None:
+            return
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + min(self.max_backoff, interval))
+
+    def _wait_for_rate_limit(self):
+        with self._lock:
+            wait = self._blocked_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _rate_limit_interval(response):
+    """ Segundos hasta que se renueva la ventana de Trello, o None si aún quedan peticiones. """
+    for scope in ('token', 'key'):
+        remaining = response.headers.get(f'x-rate-limit-api-{scope}-remaining')
+        interval_ms = response.headers.get(f'x-rate-limit-api-{scope}-interval-ms')
+        if remaining == '0' and interval_ms:
+            try:
+                return int(interval_ms) / 1000.0
+            except ValueError:
+                return None
+    return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+metrics_registry.gauge('trello_circuit_state', "Estado del circuito de Trello (0 cerrado, 1 semiabierto, 2 abierto).",
+                       lambda: _client.breaker.state_value() if _client is not None else 0,
+                       # Con varios workers, el peor estado de todos
+                       multiprocess_mode='livemax')
+
+
+def get_client():
+    """ Cliente compartido por todo el proceso, creado con la primera llamada. """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TrelloClient.from_env()
+    return _client
@@ -1,317 +1,185 @@
-import os
-import requests
 import logging
-
-def create_card(name):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-    board_id = os.getenv("TRELLO_BOARD_ID")
-
-    logging.info(f"Intentando crear tarjeta: {name}")
-    url = f"https://api.trello.com/1/boards/{board_id}/lists?key={api_key}&token={token}"
-    response = requests.get(url)
-    if response.ok:
-        lists = response.json()
-        if lists:
-            list_id = lists[0]['id']  # Tomar la primera lista
-            logging.info(f"ID de la lista obtenido: {list_id}")
-            card_url = "https://api.trello.com/1/cards"
-            query = {'key': api_key, 'token': token, 'idList': list_id, 'name': name}
-            card_response = requests.post(card_url, params=query)
-            if card_response.ok:
-                logging.info("Tarjeta creada exitosamente")
-                return card_response.json()  # Retorna la tarjeta creada en formato JSON
-            else:
-                logging.error(f"Error al crear la tarjeta: {card_response.status_code} - {card_response.text}")
-                return None
-        else:
-            logging.error("No se encontraron listas en el tablero")
-    else:
-        logging.error(f"Error al obtener listas del tablero: {response.status_code} - {response.text}")
-    return None
-
-def create_new_list_on_trello(list_name):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-    board_id = os.getenv("TRELLO_BOARD_ID")
-
-    url = f"https://api.trello.com/1/boards/{board_id}/lists"
-    params = {
-        'key': api_key,
-        'token': token,
-        'name': list_name
-    }
-    response = requests.post(url, params=params)
-    
-    if response.ok:
-        logging.info(f"Lista '{list_name}' creada en Trello.")
-        return response.json()
-    else:
-        logging.error(f"Error al crear la lista en Trello: {response.text}")
+import requests
+from modules.trello_async import get_async_client
+from modules.trello_client import get_client
+from modules.board_cache import get_board_cache, normalize_priority
+from modules.log_pipeline import PAYLOAD
+
+
+def _request(method, path, action, **params):
+    """ Llamar a Trello a través del cliente compartido. Devuelve la respuesta o None si falla. """
+    try:
+        response = get_client().request(method, path, params=params)
+    except requests.RequestException as e:
+        logging.error("Error al %s: %s", action, e)
+        return None
+    if not response.ok:
+        logging.error("Error al %s: Trello respondió %s", action, response.status_code)
+        logging.debug("Respuesta de Trello al %s: %s", action, response.text, extra=PAYLOAD)
+        return None
+    return response
+
+def _board(action, getter, *args):
+    """ Leer de la caché de metadatos del tablero. Devuelve None si Trello falla. """
+    try:
+        return getter(*args)
+    except requests.RequestException as e:
+        logging.error("Error al %s: %s", action, e)
         return None
 
-def set_card_due_date(card_id, due_date):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-
-    url = f"https://api.trello.com/1/cards/{card_id}"
-    params = {
-        'key': api_key,
-        'token': token,
-        'due': due_date.isoformat()
-    }
-    response = requests.put(url, params=params)
-    
-    if response.ok:
-        logging.info(f"Fecha límite '{due_date}' establecida para la tarjeta {card_id}")
-        return True
-    else:
-        logging.error(f"Error al establecer fecha límite en Trello: {response.text}")
-        return False
-
-def add_comment_to_card(card_id, comment):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-
-    url = f"https://api.trello.com/1/cards/{card_id}/actions/comments"
-    params = {
-        'key': api_key,
-        'token': token,
-        'text': comment
-    }
-    response = requests.post(url, params=params)
-    
-    if response.ok:
-        logging.info(f"Comentario agregado a la tarjeta {card_id}: {comment}")
-        return True
-    else:
-        logging.error(f"Error al agregar comentario en Trello: {response.text}")
-        return False
-
-def get_card_comments(card_id):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-
-    url = f"https://api.trello.com/1/cards/{card_id}/actions?filter=commentCard"
-    params = {
-        'key': api_key,
-        'token': token
-    }
-    response = requests.get(url, params=params)
-    
-    if response.ok:
-        comments = [action['data']['text'] for action in response.json()]
-        logging.info(f"Comentarios obtenidos de la tarjeta {card_id}")
-        return comments
-    else:
-        logging.error(f"Error al obtener comentarios en Trello: {response.text}")
-        return []
-
-def assign_card_member(card_id, member_id):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-
-    url = f"https://api.trello.com/1/cards/{card_id}/idMembers"
-    params = {
-        'key': api_key,
-        'token': token,
-        'value': member_id
-    }
-    response = requests.post(url, params=params)
-    
-    if response.ok:
-        logging.info(f"Miembro {member_id} asignado a la tarjeta {card_id}")
-        return True
-    else:
-        logging.error(f"Error al asignar miembro en Trello: {response.text}")
-        return False
+def trello_degraded():
+    """ True si el circuito de Trello está abierto: los comandos responden con los datos locales. """
+    return get_client().breaker.is_open()
 
-def set_card_priority(card_id, priority):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
+def create_card(name):
+    logging.info("Intentando crear tarjeta: %s", name)
+    board = get_board_cache()
+    list_id = _board("obtener listas del tablero", board.default_list_id)  # Tomar la primera lista
+    if not list_id:
+        logging.error("No se encontraron listas en el tablero")
+        return None
 
-    # Suponemos que la prioridad se establece como una etiqueta en Trello
-    priority_labels = {
-        'high': 'label_id_high',
-        'medium': 'label_id_medium',
-        'low': 'label_id_low'
-    }
-    
-    label_id = priority_labels.get(priority.lower())
-    if not label_id:
-        logging.error(f"Prioridad {priority} no reconocida.")
-        return False
+    card_response = _request('POST', "/cards", "crear la tarjeta", idList=list_id, name=name)
+    if card_response:
+        logging.info("Tarjeta creada exitosamente")
+        return card_response.json()  # Retorna la tarjeta creada en formato JSON
 
-    url = f"https://api.trello.com/1/cards/{card_id}/idLabels"
-    params = {
-        'key': api_key,
-        'token': token,
-        'value': label_id
-    }
-    response = requests.post(url, params=params)
-    
-    if response.ok:
-        logging.info(f"Prioridad '{priority}' asignada a la tarjeta {card_id}")
-        return True
-    else:
-        logging.error(f"Error al establecer prioridad en Trello: {response.text}")
-        return False
+    # La lista pudo haberse archivado: recargar los metadatos en la próxima llamada
+    board.invalidate()
+    return None
 
 def create_new_list_on_trello(list_name):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-    board_id = os.getenv("TRELLO_BOARD_ID")
-
-    logging.info(f"Intentando crear una nueva lista: {list_name}")
-    logging.info(f"API Key: {api_key[:5]}... Token: {token[:5]}... Board ID: {board_id}")
+    logging.info("Intentando crear una nueva lista: %s", list_name)
 
     # Crear una nueva lista en el tablero
-    url = "https://api.trello.com/1/lists"
-    query = {
-        'key': api_key,
-        'token': token,
-        'name': list_name,
-        'idBoard': board_id
-    }
-    response = requests.post(url, params=query)
-
-    if response.ok:
+    response = _request('POST', "/lists", "crear la lista", name=list_name, idBoard=get_client().board_id)
+    if response:
         logging.info("Lista creada exitosamente")
         return response.json()  # Devuelve la información de la lista creada
-    else:
-        logging.error(f"Error al crear la lista: {response.status_code} - {response.text}")
-        return None
-    
-def set_card_due_date(card_id, due_date):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
+    return None
 
-    logging.info(f"Intentando establecer la fecha de vencimiento para la tarjeta ID: {card_id} a {due_date}")
-    
-    url = f"https://api.trello.com/1/cards/{card_id}"
-    query = {
-        'key': api_key,
-        'token': token,
-        'due': due_date  # Fecha en formato ISO 8601
-    }
-    response = requests.put(url, params=query)
+def set_card_due_date(card_id, due_date):
+    logging.info("Intentando establecer la fecha de vencimiento para la tarjeta ID: %s a %s", card_id, due_date)
 
-    if response.ok:
+    # Fecha en formato ISO 8601
+    due = due_date.isoformat() if hasattr(due_date, 'isoformat') else due_date
+    if _request('PUT', f"/cards/{card_id}", "establecer la fecha de vencimiento", due=due):
         logging.info("Fecha de vencimiento establecida exitosamente")
         return True
-    else:
-        logging.error(f"Error al establecer la fecha de vencimiento: {response.status_code} - {response.text}")
-        return False
-def add_comment_to_card(card_id, comment):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
+    return False
 
-    logging.info(f"Intentando añadir un comentario a la tarjeta ID: {card_id}")
-    
-    url = f"https://api.trello.com/1/cards/{card_id}/actions/comments"
-    query = {
-        'key': api_key,
-        'token': token,
-        'text': comment
-    }
-    response = requests.post(url, params=query)
+def add_comment_to_card(card_id, comment):
+    logging.info("Intentando añadir un comentario a la tarjeta ID: %s", card_id)
 
-    if response.ok:
+    if _request('POST', f"/cards/{card_id}/actions/comments", "añadir comentario", text=comment):
         logging.info("Comentario añadido exitosamente")
         return True
-    else:
-        logging.error(f"Error al añadir comentario: {response.status_code} - {response.text}")
-        return False
-def move_card_to_list(card_id, list_id):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
+    return False
 
-    logging.info(f"Intentando mover la tarjeta ID: {card_id} a la lista ID: {list_id}")
-    
-    url = f"https://api.trello.com/1/cards/{card_id}"
-    query = {
-        'key': api_key,
-        'token': token,
-        'idList': list_id
-    }
-    response = requests.put(url, params=query)
+def move_card_to_list(card_id, list_id):
+    logging.info("Intentando mover la tarjeta ID: %s a la lista ID: %s", card_id, list_id)
 
-    if response.ok:
+    if _request('PUT', f"/cards/{card_id}", "mover la tarjeta", idList=list_id):
         logging.info("Tarjeta movida exitosamente")
         return True
-    else:
-        logging.error(f"Error al mover la tarjeta: {response.status_code} - {response.text}")
-        return False
-def assign_card_member(card_id, member_id):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
+    return False
 
-    logging.info(f"Intentando asignar el miembro ID: {member_id} a la tarjeta ID: {card_id}")
+def assign_card_member(card_id, member_id):
+    logging.info("Intentando asignar el miembro ID: %s a la tarjeta ID: %s", member_id, card_id)
 
-    url = f"https://api.trello.com/1/cards/{card_id}/idMembers"
-    query = {
-        'key': api_key,
-        'token': token,
-        'value': member_id
-    }
-    response = requests.post(url, params=query)
+    # Se admite '@username', nombre completo o ID del miembro del tablero
+    board = get_board_cache()
+    trello_member_id = _board("obtener miembros del tablero", board.member_id, member_id)
+    if not trello_member_id:
+        logging.error("El miembro %s no pertenece al tablero", member_id)
+        return False
 
-    if response.ok:
+    if _request('POST', f"/cards/{card_id}/idMembers", "asignar el miembro", value=trello_member_id):
         logging.info("Miembro asignado exitosamente a la tarjeta")
         return True
-    else:
-        logging.error(f"Error al asignar el miembro: {response.status_code} - {response.text}")
-        return False
-def set_card_priority(card_id, priority_label):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
+    board.invalidate()
+    return False
 
-    logging.info(f"Intentando establecer la prioridad para la tarjeta ID: {card_id} a {priority_label}")
+def set_card_priority(card_id, priority_label):
+    logging.info("Intentando establecer la prioridad para la tarjeta ID: %s a %s", card_id, priority_label)
 
-    # Suponiendo que ya tienes las etiquetas de prioridad predefinidas en Trello
-    label_ids = {
-        "alta": "label_id_for_high_priority",
-        "media": "label_id_for_medium_priority",
-        "baja": "label_id_for_low_priority"
-    }
+    if not normalize_priority(priority_label):
+        logging.error("Prioridad no válida, debe ser 'high'/'alta', 'medium'/'media' o 'low'/'baja'")
+        return False
 
-    label_id = label_ids.get(priority_label.lower())
+    # La etiqueta se resuelve (o se crea) a partir de las etiquetas reales del tablero
+    board = get_board_cache()
+    label_id = _board("obtener etiquetas del tablero", board.priority_label_id, priority_label)
     if not label_id:
-        logging.error("Prioridad no válida, debe ser 'alta', 'media' o 'baja'")
         return False
 
-    url = f"https://api.trello.com/1/cards/{card_id}/idLabels"
-    query = {
-        'key': api_key,
-        'token': token,
-        'value': label_id
-    }
-    response = requests.post(url, params=query)
+    # Una tarjeta tiene una sola prioridad: se quitan las etiquetas de las otras
+    card = _request('GET', f"/cards/{card_id}", "obtener las etiquetas de la tarjeta", fields='idLabels')
+    if not card:
+        return False
+    current = set(card.json().get('idLabels') or ())
+    stale = current.intersection(_board("obtener etiquetas del tablero", board.priority_label_ids) or ()) - {label_id}
 
-    if response.ok:
-        logging.info(f"Prioridad establecida exitosamente para la tarjeta ID: {card_id}")
+    if label_id not in current and not _add_label(card_id, label_id):
+        board.invalidate()
+        return False
+    for old_id in stale:
+        if not _request('DELETE', f"/cards/{card_id}/idLabels/{old_id}", "quitar la prioridad anterior"):
+            return False
+    logging.info("Prioridad establecida exitosamente para la tarjeta ID: %s", card_id)
+    return True
+
+def _add_label(card_id, label_id):
+    """ Añadir la etiqueta a la tarjeta. Si ya la tenía, Trello responde 400 y también cuenta como éxito. """
+    try:
+        response = get_client().request('POST', f"/cards/{card_id}/idLabels", params={'value': label_id})
+    except requests.RequestException as e:
+        logging.error("Error al establecer la prioridad: %s", e)
+        return False
+    if response.status_code == 400 and 'already' in response.text.lower():
         return True
-    else:
-        logging.error(f"Error al establecer la prioridad: {response.status_code} - {response.text}")
+    if not response.ok:
+        logging.error("Error al establecer la prioridad: Trello respondió %s", response.status_code)
+        logging.debug("Respuesta de Trello al establecer la prioridad: %s", response.text, extra=PAYLOAD)
         return False
-
-def get_card_comments(card_id):
-    api_key = os.getenv("TRELLO_API_KEY")
-    token = os.getenv("TRELLO_TOKEN")
-
-    logging.info(f"Intentando obtener comentarios de la tarjeta ID: {card_id}")
-
-    url = f"https://api.trello.com/1/cards/{card_id}/actions?filter=commentCard"
-    query = {
-        'key': api_key,
-        'token': token
-    }
-    response = requests.get(url, params=query)
-
-    if response.ok:
-        comments = response.json()
-        logging.info(f"Comentarios obtenidos: {comments}")
-        return comments
-    else:
-        logging.error(f"Error al obtener comentarios: {response.status_code} - {response.text}")
-        return []
\ No newline at end of file
+    return True
+
+def get_card_comments(card_id, since=None, before=None, limit=None):
+    """ Acciones commentCard de la tarjeta, de la más reciente a la más antigua. None si Trello falla.
+
+    `since` y `before` son IDs de acción (o fechas) que acotan el intervalo; `limit` admite hasta 1000.
+    """
+    params = {'filter': 'commentCard'}
+    for name, value in (('since', since), ('before', before), ('limit', limit)):
+        if value is not None:
+            params[name] = value
+    response = _request('GET', f"/cards/{card_id}/actions", "obtener comentarios", **params)
+    if response is None:
+        return None
+    comments = response.json()
+    logging.debug("%s comentarios obtenidos de la tarjeta %s", len(comments), card_id)
+    return comments
+
+# Trello admite hasta 10 URLs por llamada a /1/batch
+BATCH_SIZE = 10
+
+def batch_get(paths):
+    """ Ejecutar varias lecturas GET en llamadas a /batch, todas a la vez. Devuelve un resultado por ruta (None si falló). """
+    chunks = [paths[start:start + BATCH_SIZE] for start in range(0, len(paths), BATCH_SIZE)]
+    try:
+        responses = get_async_client().gather([('GET', "/batch", {'urls': ",".join(chunk)}) for chunk in chunks])
+    except requests.RequestException as e:
+        logging.error("Error al ejecutar lectura por lotes: %s", e)
+        responses = [None] * len(chunks)
+    results = []
+    for chunk, items in zip(chunks, responses):
+        if items is None:
+            results.extend([None] * len(chunk))
+            continue
+        for path, item in zip(chunk, items):
+            # Cada elemento es {"200": cuerpo} o un objeto de error con statusCode
+            body = item.get('200') if isinstance(item, dict) else None
+            if body is None:
+                logging.error("Error en la lectura por lotes de %s: %s", path, item)
+            results.append(body)
+    return results
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, case, event, func, text
+
+from models import db, Task, TrelloOutbox
+from modules.metrics import registry as metrics_registry
+from modules.trello_client import get_client
+from modules.trello_integration import (
+    add_comment_to_card, assign_card_member, create_card, set_card_due_date, set_card_priority
+)
+from modules.write_coalescer import write_transaction
+
+
+def create_task_card(card_id, value):
+    """ Crear la tarjeta de una tarea guardada en modo degradado y encolar los campos que ya tenga. """
+    task = db.session.get(Task, value['task_id'])
+    if task is None or task.trello_card_id:
+        return True
+    card = create_card(task.name)
+    if not card:
+        return False
+    # La tarjeta ya existe: se guarda aunque después falle la actualización de la fila del outbox
+    with write_transaction():
+        task = db.session.get(Task, value['task_id'])
+        if task is None:
+            return True
+        task.trello_card_id = card['id']
+        for action, field in (('priority', task.priority), ('member', task.assigned_to),
+                              ('due', task.due_date.isoformat() if task.due_date else None)):
+            if field:
+                enqueue(card['id'], action, field)
+    return True
+
+
+# Operación de Trello que aplica cada tipo de cambio: (card_id, valor) -> bool
+ACTIONS = {
+    'create': create_task_card,
+    'priority': set_card_priority,
+    'due': set_card_due_date,
+    'member': assign_card_member,
+    'comment': add_comment_to_card,
+}
+# Solo importa el último valor de estos campos; cada comentario, en cambio, se envía
+COALESCED_ACTIONS = ('priority', 'due', 'member')
+
+OUTBOX_SENT = metrics_registry.counter(
+    'trello_outbox_sent_total', "Cambios del outbox enviados a Trello, por acción y resultado (ok/retry/failed).",
+    labels=('action', 'result'))
+OUTBOX_COALESCED = metrics_registry.counter(
+    'trello_outbox_coalesced_total', "Cambios fusionados con otro pendiente del mismo campo de la misma tarjeta.",
+    labels=('action',))
+
+# Reclamar filas vencidas: mientras este worker las envía, ningún otro las toma, tampoco tras fusionarse un cambio
+CLAIM_DUE = text(
+    "UPDATE trello_outbox SET claimed_until = :claimed_until WHERE id IN ("
+    "SELECT id FROM trello_outbox WHERE next_attempt_at <= :now "
+    "AND (claimed_until IS NULL OR claimed_until < :now) ORDER BY id LIMIT :limit) "
+    "RETURNING id, card_id, action, payload, version, attempts"
+).bindparams(bindparam('now', type_=db.DateTime), bindparam('claimed_until', type_=db.DateTime))
+
+# Fusionar con el cambio pendiente del mismo campo. Se conserva created_at de la primera fila: el retraso se mide
+# desde el cambio más antiguo sin enviar. claimed_until no se toca: si un worker lo está enviando, lo reenvía después.
+UPSERT = text(
+    "INSERT INTO trello_outbox (card_id, action, payload, coalesce_key, version, attempts, next_attempt_at, "
+    "last_error, created_at) VALUES (:card_id, :action, :payload, :coalesce_key, :version, :attempts, "
+    ":next_attempt_at, :last_error, :created_at) "
+    "ON CONFLICT (coalesce_key) DO UPDATE SET payload = excluded.payload, version = trello_outbox.version + 1, "
+    "attempts = 0, next_attempt_at = excluded.next_attempt_at, last_error = NULL "
+    "RETURNING version"
+).bindparams(bindparam('next_attempt_at', type_=db.DateTime), bindparam('created_at', type_=db.DateTime))
+
+_wakeup = threading.Event()
+
+
+def enqueue(card_id, action, value):
+    """ Guardar un cambio para Trello en la transacción actual, junto al cambio local. No hace commit. """
+    now = datetime.utcnow()
+    values = {'card_id': card_id, 'action': action, 'payload': json.dumps(value), 'version': 1, 'attempts': 0,
+              'next_attempt_at': now, 'last_error': None, 'created_at': now,
+              'coalesce_key': f"{card_id}:{action}" if action in COALESCED_ACTIONS else None}
+    dialect = db.session.get_bind().dialect.name
+    if values['coalesce_key'] is None or dialect not in ('sqlite', 'postgresql'):
+        outbox = None
+        if values['coalesce_key'] is not None:
+            outbox = db.session.query(TrelloOutbox).filter_by(coalesce_key=values['coalesce_key']).first()
+        if outbox is None:
+            db.session.add(TrelloOutbox(**values))
+        else:
+            _merge(outbox, values)
+            OUTBOX_COALESCED.inc(action)
+    elif db.session.execute(UPSERT, values).scalar() > 1:
+        OUTBOX_COALESCED.inc(action)
+    db.session.info['trello_outbox'] = True
+
+
+def _merge(outbox, values):
+    outbox.payload = values['payload']
+    outbox.version += 1
+    outbox.attempts = 0
+    outbox.next_attempt_at = values['next_attempt_at']
+    outbox.last_error = None
+
+
+@event.listens_for(db.session, 'after_commit')
+def _notify_committed(session):
+    # Despertar al worker de este proceso; los de otros procesos lo ven en su siguiente sondeo
+    if session.info.pop('trello_outbox', False):
+        _wakeup.set()
+
+
+class TrelloOutboxWorker:
+    """ Hilo que envía a Trello los cambios del outbox, con reintentos y espera exponencial.
+
+    Cada worker de gunicorn tiene uno; las filas se reclaman con un UPDATE ... RETURNING, así que dos
+    workers no envían la misma a la vez. Si un cambio se fusionó mientras se enviaba (version distinta),
+    la fila se queda para enviar el valor nuevo después.
+    """
+
+    def __init__(self, app, batch_size=20, poll_interval=1.0, max_attempts=8, base_backoff=2.0, max_backoff=600.0,
+                 claim_seconds=60):
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.claim_seconds = claim_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, app):
+        return cls(
+            app,
+            batch_size=int(os.getenv('TRELLO_OUTBOX_BATCH_SIZE', '20')),
+            poll_interval=float(os.getenv('TRELLO_OUTBOX_POLL_INTERVAL', '1')),
+            max_attempts=int(os.getenv('TRELLO_OUTBOX_MAX_ATTEMPTS', '8')),
+            max_backoff=float(os.getenv('TRELLO_OUTBOX_MAX_BACKOFF', '600')),
+        )
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="trello-outbox", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        _wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 5)
+
+    def stats(self):
+        """ Pendientes, segundos desde el cambio pendiente más antiguo y cambios que agotaron los reintentos. """
+        # Una sola consulta: next_attempt_at es NULL en los cambios que agotaron los reintentos
+        pending_created_at = case((TrelloOutbox.next_attempt_at.isnot(None), TrelloOutbox.created_at))
+        with self.app.app_context():
+            total, pending, oldest = db.session.query(
+                func.count(TrelloOutbox.id), func.count(TrelloOutbox.next_attempt_at), func.min(pending_created_at),
+            ).one()
+        failed = total - pending
+        lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+        return {'pending': pending, 'lag_seconds': lag, 'failed': failed}
+
+    def _run(self):
+        while not self._stop.is_set():
+            _wakeup.clear()
+            try:
+                while not self._stop.is_set() and self.drain() == self.batch_size:
+                    pass
+            except Exception as e:
+                logging.error("Error al vaciar el outbox de Trello: %s", e)
+            _wakeup.wait(self.poll_interval)
+
+    def drain(self):
+        """ Enviar un lote de cambios vencidos. Devuelve cuántos se reclamaron. """
+        # Con el circuito abierto los envíos fallarían y gastarían sus reintentos: se espera a que se recupere
+        if get_client().breaker.is_open():
+            return 0
+        now = datetime.utcnow()
+        with self.app.app_context():
+            with write_transaction():
+                rows = db.session.execute(CLAIM_DUE, {
+                    'now': now, 'claimed_until': now + timedelta(seconds=self.claim_seconds), 'limit': self.batch_size,
+                }).fetchall()
+            for row in sorted(rows, key=lambda row: row.id):
+                self._send(row)
+        return len(rows)
+
+    def _send(self, row):
+        try:
+            ok = ACTIONS[row.action](row.card_id, json.loads(row.payload))
+            error = None if ok else "Trello rechazó el cambio"
+        except Exception as e:
+            ok, error = False, str(e)
+
+        # Después de la llamada a Trello: el bloqueo de escritura no se mantiene durante la red
+        with write_transaction():
+            self._record(row, ok, error)
+
+    def _record(self, row, ok, error):
+        query = db.session.query(TrelloOutbox).filter_by(id=row.id, version=row.version)
+        db.session.query(TrelloOutbox).filter_by(id=row.id).update({'claimed_until': None}, synchronize_session=False)
+        if ok:
+            query.delete(synchronize_session=False)
+            OUTBOX_SENT.inc(row.action, 'ok')
+        elif row.attempts + 1 >= self.max_attempts:
+            query.update({'attempts': row.attempts + 1, 'next_attempt_at': None, 'last_error': error},
+                         synchronize_session=False)
+            OUTBOX_SENT.inc(row.action, 'failed')
+            logging.error("Cambio '%s' de la tarjeta %s descartado tras %s intentos: %s",
+                          row.action, row.card_id, row.attempts + 1, error)
+        else:
+            delay = min(self.max_backoff, self.base_backoff * 2 ** row.attempts)
+            query.update({'attempts': row.attempts + 1, 'last_error': error,
+                          'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)},
+                         synchronize_session=False)
+            OUTBOX_SENT.inc(row.action, 'retry')
@@ -0,0 +1,287 @@
+import base64
+import hashlib
+import hmac
+import logging
+from datetime import datetime
+
+import click
+import requests
+from flask import current_app
+from flask.cli import with_appcontext
+
+from models import db, Task, TrelloCard, TrelloComment, TrelloCommentCursor, TrelloLabel, TrelloMember, TrelloOutbox
+from modules.board_cache import normalize_priority
+from modules.read_cache import invalidate_user
+from modules.trello_async import get_async_client
+from modules.trello_client import get_client
+from modules.write_coalescer import write_transaction
+
+# Acciones de Trello que modifican los datos de una tarjeta
+CARD_ACTIONS = {'createCard', 'updateCard', 'copyCard', 'moveCardToBoard', 'convertToCardFromCheckItem'}
+LABEL_ACTIONS = {'createLabel', 'updateLabel'}
+# Campos de la tarjeta que se copian a las tareas, y la acción del outbox que cambia cada uno
+SYNCED_FIELDS = {'name': None, 'due': 'due', 'labels': 'priority', 'members': 'member'}
+
+
+def verify_signature(body, signature, callback_url, secret):
+    """ Validar la cabecera X-Trello-Webhook: base64(HMAC-SHA1(secret, body + callbackURL)). """
+    if not (signature and secret and callback_url):
+        return False
+    digest = hmac.new(secret.encode(), body + callback_url.encode(), hashlib.sha1).digest()
+    return hmac.compare_digest(base64.b64encode(digest).decode(), signature)
+
+
+def parse_trello_date(value):
+    """ Convertir '2024-09-28T15:57:36.528Z' en un datetime UTC sin zona, como el resto de la base de datos. """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def upsert_member(data):
+    member = db.session.get(TrelloMember, data['id'])
+    if member is None:
+        member = TrelloMember(id=data['id'])
+        db.session.add(member)
+    if 'username' in data:
+        member.username = data['username']
+    if 'fullName' in data:
+        member.full_name = data['fullName']
+    return member
+
+
+def upsert_label(data):
+    label = db.session.get(TrelloLabel, data['id'])
+    if label is None:
+        label = TrelloLabel(id=data['id'])
+        db.session.add(label)
+    if 'name' in data:
+        label.name = data['name']
+    if 'color' in data:
+        label.color = data['color']
+    return label
+
+
+def upsert_card(data):
+    """ Crear o actualizar la réplica de una tarjeta con los campos presentes en `data`. """
+    card = db.session.get(TrelloCard, data['id'])
+    if card is None:
+        card = TrelloCard(id=data['id'], closed=False)
+        db.session.add(card)
+    if 'name' in data:
+        card.name = data['name']
+    if 'idList' in data:
+        card.list_id = data['idList']
+    if 'due' in data:
+        card.due_date = parse_trello_date(data['due'])
+    if 'closed' in data:
+        card.closed = data['closed']
+    if 'members' in data:
+        card.members = [upsert_member(member) for member in data['members']]
+    if 'labels' in data:
+        card.labels = [upsert_label(label) for label in data['labels']]
+    card.updated_at = datetime.utcnow()
+    return card
+
+
+def upsert_comment(action):
+    data = action['data']
+    comment = db.session.get(TrelloComment, action['id'])
+    if comment is None:
+        comment = TrelloComment(id=action['id'], card_id=data['card']['id'],
+                                created_at=parse_trello_date(action['date']))
+        db.session.add(comment)
+    creator = action.get('memberCreator') or {}
+    comment.member_id = action.get('idMemberCreator') or creator.get('id')
+    comment.member_name = creator.get('fullName') or creator.get('username')
+    comment.text = data['text']
+    return comment
+
+
+def sync_tasks(card, fields=SYNCED_FIELDS):
+    """ Copiar a las tareas locales los campos de la tarjeta que leen los comandos.
+
+    Solo se copian los `fields` que traía la acción: una acción parcial (p. ej. updateCard de la fecha) no carga
+    etiquetas ni miembros en la réplica. Tampoco se tocan los campos con un cambio local pendiente en el outbox.
+    """
+    pending = {action for action, in db.session.query(TrelloOutbox.action).filter(
+        TrelloOutbox.card_id == card.id, TrelloOutbox.next_attempt_at.isnot(None))}
+    fields = {field for field in fields if SYNCED_FIELDS[field] not in pending}
+    if not fields:
+        return
+
+    priorities = [normalize_priority(label.name) for label in card.labels]
+    priority = next((p for p in ('high', 'medium', 'low') if p in priorities), None)
+    assigned_to = f"@{card.members[0].username}" if card.members and card.members[0].username else None
+    for task in db.session.query(Task).filter_by(trello_card_id=card.id):
+        if 'name' in fields and card.name:
+            task.name = card.name[:100]
+        if 'due' in fields:
+            task.due_date = card.due_date
+        if 'labels' in fields:
+            task.priority = priority
+        if 'members' in fields:
+            task.assigned_to = assigned_to
+        invalidate_user(task.user_id)
+
+
+def ingest_action(action):
+    """ Aplicar una acción de Trello (del webhook o del backfill) a la réplica local. No hace commit. """
+    action_type = action.get('type')
+    data = action.get('data', {})
+    card = None
+    fields = set(data.get('card') or ()).intersection(SYNCED_FIELDS)
+
+    if action_type in CARD_ACTIONS:
+        card = upsert_card(data['card'])
+    elif action_type == 'deleteCard':
+        deleted = db.session.get(TrelloCard, data['card']['id'])
+        if deleted is not None:
+            db.session.delete(deleted)
+        db.session.query(TrelloComment).filter_by(card_id=data['card']['id']).delete()
+        db.session.query(TrelloCommentCursor).filter_by(card_id=data['card']['id']).delete()
+    elif action_type in ('addMemberToCard', 'removeMemberFromCard'):
+        card = upsert_card(data['card'])
+        fields.add('members')
+        member = upsert_member(action.get('member') or data.get('member') or {'id': data['idMember']})
+        if action_type == 'addMemberToCard' and member not in card.members:
+            card.members.append(member)
+        elif action_type == 'removeMemberFromCard' and member in card.members:
+            card.members.remove(member)
+    elif action_type in ('addLabelToCard', 'removeLabelFromCard'):
+        card = upsert_card(data['card'])
+        fields.add('labels')
+        label = upsert_label(data['label'])
+        if action_type == 'addLabelToCard' and label not in card.labels:
+            card.labels.append(label)
+        elif action_type == 'removeLabelFromCard' and label in card.labels:
+            card.labels.remove(label)
+    elif action_type in LABEL_ACTIONS:
+        upsert_label(data['label'])
+    elif action_type == 'deleteLabel':
+        deleted = db.session.get(TrelloLabel, data['label']['id'])
+        if deleted is not None:
+            db.session.delete(deleted)
+    elif action_type == 'commentCard':
+        upsert_comment(action)
+    elif action_type == 'updateComment':
+        comment = db.session.get(TrelloComment, data['action']['id'])
+        if comment is not None:
+            comment.text = data['action']['text']
+    elif action_type == 'deleteComment':
+        db.session.query(TrelloComment).filter_by(id=data['action']['id']).delete()
+    elif action_type in ('addMemberToBoard', 'updateMember'):
+        upsert_member(action.get('member') or data.get('member', {}))
+    else:
+        logging.debug("Acción de Trello ignorada: %s", action_type)
+
+    if card is not None:
+        db.session.flush()
+        sync_tasks(card, fields)
+
+
+def handle_webhook(payload):
+    """ Procesar el cuerpo de una notificación del webhook de Trello. """
+    action = payload.get('action')
+    if not action:
+        return
+    with write_transaction():
+        ingest_action(action)
+
+
+def backfill(board_id=None):
+    """ Cargar el estado actual del tablero a través de la misma ruta de ingesta que el webhook. """
+    client = get_client()
+    board_id = board_id or client.board_id
+
+    # Etiquetas y tarjetas se piden a la vez; las acciones van después porque se paginan con un cursor
+    labels, cards = get_async_client().gather([
+        ('GET', f"/boards/{board_id}/labels", {'fields': 'name,color', 'limit': 1000}),
+        ('GET', f"/boards/{board_id}/cards/all", {
+            'fields': 'name,idList,due,closed,labels',
+            'members': 'true',
+            'member_fields': 'username,fullName',
+        }),
+    ])
+    if labels is None or cards is None:
+        raise requests.RequestException(f"No se pudieron leer las etiquetas y tarjetas del tablero {board_id}")
+    with write_transaction():
+        for label in labels:
+            upsert_label(label)
+        for data in cards:
+            card = upsert_card(data)
+            db.session.flush()
+            sync_tasks(card)
+
+    # Trello devuelve las acciones de la más reciente a la más antigua, como máximo 1000 por página
+    comments = 0
+    before = None
+    while True:
+        params = {'filter': 'commentCard', 'limit': 1000}
+        if before:
+            params['before'] = before
+        response = client.get(f"/boards/{board_id}/actions", params=params)
+        response.raise_for_status()
+        actions = response.json()
+        with write_transaction():
+            for action in actions:
+                ingest_action(action)
+        comments += len(actions)
+        if len(actions) < 1000:
+            break
+        before = actions[-1]['id']
+
+    logging.info("Backfill del tablero %s completado: %s tarjetas, %s comentarios", board_id, len(cards), comments)
+    return len(cards), comments
+
+
+def register_webhook(callback_url, board_id=None, description="Slack-Api-Lab"):
+    """ Registrar el webhook del tablero. Si ya existe uno con la misma URL se reutiliza. """
+    client = get_client()
+    board_id = board_id or client.board_id
+    token = client.session.params['token']
+
+    response = client.get(f"/tokens/{token}/webhooks")
+    response.raise_for_status()
+    for webhook in response.json():
+        if webhook.get('idModel') == board_id and webhook.get('callbackURL') == callback_url:
+            if not webhook.get('active', True):
+                client.put(f"/webhooks/{webhook['id']}", params={'active': 'true'}).raise_for_status()
+            logging.info("Webhook de Trello ya registrado: %s", webhook['id'])
+            return webhook
+
+    response = client.post("/webhooks", params={
+        'callbackURL': callback_url,
+        'idModel': board_id,
+        'description': description,
+    })
+    response.raise_for_status()
+    webhook = response.json()
+    logging.info("Webhook de Trello registrado: %s", webhook['id'])
+    return webhook
+
+
+@click.command('trello-backfill')
+@with_appcontext
+def backfill_command():
+    """ Copiar tarjetas, miembros, etiquetas y comentarios del tablero a la base de datos local. """
+    try:
+        cards, comments = backfill()
+    except requests.RequestException as e:
+        raise click.ClickException(f"Error al leer el tablero de Trello: {e}")
+    click.echo(f"{cards} tarjetas y {comments} comentarios sincronizados.")
+
+
+@click.command('trello-register-webhook')
+@click.argument('callback_url', required=False)
+@with_appcontext
+def register_webhook_command(callback_url):
+    """ Registrar (una sola vez) el webhook del tablero apuntando a CALLBACK_URL o TRELLO_WEBHOOK_URL. """
+    callback_url = callback_url or current_app.config['TRELLO_WEBHOOK_URL']
+    if not callback_url:
+        raise click.ClickException("Indica la URL pública de /trello/webhook o define TRELLO_WEBHOOK_URL.")
+    try:
+        webhook = register_webhook(callback_url)
+    except requests.RequestException as e:
+        raise click.ClickException(f"Error al registrar el webhook en Trello: {e}")
+    click.echo(f"Webhook activo: {webhook['id']} -> {callback_url}")
@@ -0,0 +1,141 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from flask import current_app
+
+from models import db
+from modules.metrics import add_time, registry as metrics_registry
+from modules.sqlite_profile import immediate
+
+WRITE_BATCH_SIZE = metrics_registry.histogram(
+    'db_write_batch_size', "Escrituras agrupadas en cada transacción del agrupador.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+WRITE_WAIT_SECONDS = metrics_registry.histogram(
+    'db_write_wait_seconds', "Tiempo desde que se encola una escritura hasta que su transacción hace commit.")
+
+
+class WriteCoalescer:
+    """ Un único hilo escritor que junta las escrituras que llegan con pocos milisegundos de diferencia.
+
+    Cada escritura es una función sin argumentos que usa db.session y devuelve valores simples (no objetos
+    del ORM, que quedan ligados a la sesión del hilo escritor). Todas las del lote van en una transacción,
+    cada una en su SAVEPOINT: si una falla solo se deshace esa y la excepción llega a quien la pidió.
+    """
+
+    def __init__(self, app, window=0.002, max_batch=64):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @classmethod
+    def from_env(cls, app):
+        return cls(app, window=float(os.getenv('SQLITE_COALESCE_WINDOW_MS', '2')) / 1000,
+                   max_batch=int(os.getenv('SQLITE_COALESCE_MAX_BATCH', '64')))
+
+    def start(self):
+        # El hilo no sobrevive a un fork: cada proceso arranca el suyo
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="db-write-coalescer", daemon=True).start()
+
+    def submit(self, unit):
+        """ Ejecutar `unit` en la próxima transacción agrupada y esperar su resultado. """
+        self.start()
+        future = Future()
+        self._queue.put((unit, future, time.monotonic()))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        closes_at = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = closes_at - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                with self.app.app_context():
+                    outcomes = self._write(batch)
+            except Exception as e:
+                logging.exception("Error en la transacción agrupada de escrituras")
+                outcomes = [(future, None, e) for _, future, _ in batch]
+            finished = time.monotonic()
+            WRITE_BATCH_SIZE.observe(value=len(batch))
+            for _, _, queued in batch:
+                WRITE_WAIT_SECONDS.observe(value=finished - queued)
+            for future, result, error in outcomes:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _write(self, batch):
+        outcomes = []
+        try:
+            with immediate():
+                for unit, future, _ in batch:
+                    try:
+                        with db.session.begin_nested():
+                            outcomes.append((future, unit(), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+        return outcomes
+
+
+@contextmanager
+def write_transaction():
+    """ Transacción de escritura en la sesión actual: commit al salir del bloque, rollback si hay una excepción.
+
+    La transacción en curso se cierra antes y la nueva empieza con BEGIN IMMEDIATE en SQLite, así que lo que se
+    lea dentro del bloque no puede quedar desfasado al escribir. No debe contener llamadas de red: el bloqueo de
+    escritura se mantiene hasta el commit.
+    """
+    db.session.commit()
+    with immediate():
+        try:
+            yield
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def run_write(unit):
+    """ Ejecutar una escritura y hacer commit, agrupada con otras si la aplicación tiene agrupador.
+
+    La transacción de la sesión actual se cierra antes: no debe retener bloqueos ni una instantánea
+    antigua de la base de datos mientras espera al hilo escritor.
+    """
+    coalescer = current_app.extensions.get('write_coalescer')
+    if coalescer is None:
+        with write_transaction():
+            result = unit()
+        return result
+    db.session.commit()
+    started = time.perf_counter()
+    try:
+        return coalescer.submit(unit)
+    finally:
+        add_time('db', time.perf_counter() - started)
@@ -0,0 +1,182 @@
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qsl, urlencode
+
+import pytest
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+# app.py crea una aplicación al importarse: sin secretos reales, en memoria y con el logging síncrono
+os.environ['SLACK_SIGNING_SECRET'] = 'test-signing-secret'
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['LOG_ASYNC'] = 'false'
+os.environ['LOG_LEVEL'] = 'WARNING'
+os.environ['SLACK_IDEMPOTENCY_PATH'] = os.path.join(tempfile.mkdtemp(prefix='slack_api_lab_tests_'), 'requests.db')
+
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+from modules import board_cache, read_cache, trello_async, trello_client  # noqa: E402
+from modules.services import Services  # noqa: E402
+from modules.trello_client import TrelloClient  # noqa: E402
+
+BOARD_ID = 'board-test'
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """ Aplicación con una base de datos SQLite nueva en un fichero temporal y despacho síncrono.
+
+    Las peticiones no arrancan el scheduler ni el outbox: las pruebas que los usan los crean ellas mismas.
+    """
+    monkeypatch.setattr(Services, 'start_background', lambda self: None)
+    apps = []
+
+    def make(**config):
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+            'SLASH_ASYNC_DISPATCH': False,
+            'SQLITE_WRITE_COALESCE': False,
+            'TESTING': True,
+            **config,
+        })
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def sign(body, timestamp=None):
+    """ Cabeceras de una petición firmada por Slack con SLACK_SIGNING_SECRET. """
+    timestamp = str(int(timestamp or time.time()))
+    base = f"v0:{timestamp}:{body}".encode()
+    signature = 'v0=' + hmac.new(os.environ['SLACK_SIGNING_SECRET'].encode(), base, hashlib.sha256).hexdigest()
+    return {'X-Slack-Request-Timestamp': timestamp, 'X-Slack-Signature': signature,
+            'Content-Type': 'application/x-www-form-urlencoded'}
+
+
+@pytest.fixture
+def slash_for():
+    """ slash_for(app) devuelve send(command, text, user_id=…, **campos), que envía un comando firmado. """
+    def client_for(app):
+        client = app.test_client()
+
+        def send(command, text='', user_id='U1', user_name='ana', headers=None, **fields):
+            body = urlencode({'command': command, 'text': text, 'user_id': user_id, 'user_name': user_name,
+                              'trigger_id': fields.pop('trigger_id', f"{time.monotonic_ns()}"), **fields})
+            return client.post('/slash/events', data=body, headers={**sign(body), **(headers or {})})
+        return send
+    return client_for
+
+
+@pytest.fixture
+def slash(app, slash_for):
+    """ Enviar un comando slash firmado a /slash/events: slash('/list_tasks', 'texto', user_id='U1'). """
+    return slash_for(app)
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # Las cachés de proceso no deben pasar datos de una base de datos de prueba a la siguiente
+    read_cache._cache = None
+    board_cache._cache = None
+    yield
+    read_cache._cache = None
+    board_cache._cache = None
+
+
+class Responses(list):
+    """ Respuestas de una ruta de FakeTrello, una por llamada; la última se repite. """
+
+
+class FakeTrello:
+    """ API de Trello en memoria: `routes` da, para cada (método, ruta), el JSON de la respuesta.
+
+    El valor puede ser una función (params) -> JSON, una tupla (status, JSON) o (status, JSON, cabeceras), o
+    una lista de esas respuestas que se devuelven por orden. Las llamadas quedan en `calls`. Si no hay ruta
+    para /batch, cada URL de `urls` se responde con su propia ruta, como hace Trello.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+
+    def respond(self, method, path, params):
+        self.calls.append((method, path, dict(params or {})))
+        route = self.routes.get((method, path))
+        if route is None and (method, path) == ('GET', '/batch'):
+            return 200, [self._batch_item(url) for url in params['urls'].split(',')], {}
+        if route is None:
+            return 404, {'message': 'not found'}, {}
+        if isinstance(route, Responses):
+            route = route.pop(0) if len(route) > 1 else route[0]
+        if callable(route):
+            route = route(params or {})
+        if isinstance(route, Exception):
+            raise route
+        if not isinstance(route, tuple):
+            route = (200, route)
+        return route if len(route) == 3 else (*route, {})
+
+    def _batch_item(self, url):
+        path, _, query = url.partition('?')
+        status, body, _ = self.respond('GET', path, dict(parse_qsl(query)))
+        return {str(status): body} if status == 200 else {'statusCode': status, 'message': body}
+
+    def request(self, method, url, params=None, timeout=None, **kwargs):
+        """ Sustituto de requests.Session.request para TrelloClient. """
+        path = url.split(trello_client.DEFAULT_BASE_URL, 1)[-1]
+        status, body, headers = self.respond(method, path, params)
+        response = requests.Response()
+        response.status_code = status
+        response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.headers.update(headers)
+        response.url = url
+        return response
+
+    def gather(self, calls, timeout=None):
+        """ Sustituto de AsyncTrelloClient.gather: JSON de cada llamada o None si falla. """
+        results = []
+        for method, path, params in calls:
+            status, body, _ = self.respond(method, path, params)
+            results.append(body if 200 <= status < 300 else None)
+        return results
+
+    def close(self):
+        pass
+
+    def paths(self, method=None):
+        return [path for call_method, path, _ in self.calls if method in (None, call_method)]
+
+
+@pytest.fixture
+def trello(monkeypatch):
+    """ Clientes de Trello (síncrono y asíncrono) contra un FakeTrello, sin red. """
+    fake = FakeTrello()
+    client = TrelloClient('key', 'token', board_id=BOARD_ID, max_retries=0)
+    monkeypatch.setattr(client.session, 'request', fake.request)
+    monkeypatch.setattr(trello_client, '_client', client)
+    monkeypatch.setattr(trello_async, '_async_client', fake)
+    fake.client = client
+    return fake
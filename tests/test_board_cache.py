@@ -0,0 +1,111 @@
+import time
+
+import pytest
+import requests
+
+from conftest import BOARD_ID
+from modules import trello_integration
+from modules.board_cache import BoardMetadataCache, get_board_cache, normalize_priority
+
+BOARD_PATH = f"/boards/{BOARD_ID}"
+
+
+@pytest.fixture
+def board(trello):
+    trello.routes[('GET', BOARD_PATH)] = {
+        'id': BOARD_ID,
+        'lists': [{'id': 'list-2', 'name': 'Hecho', 'pos': 2}, {'id': 'list-1', 'name': 'Por hacer', 'pos': 1}],
+        'labels': [{'id': 'label-alta', 'name': 'Alta', 'color': 'red'}, {'id': 'label-x', 'name': None}],
+        'members': [
+            {'id': 'm1', 'username': 'ana', 'fullName': 'Ana Pérez'},
+            {'id': 'm2', 'username': 'luis', 'fullName': None},
+            {'id': 'm3', 'username': None, 'fullName': 'Sin Usuario'},
+        ],
+    }
+    return BoardMetadataCache(trello.client, BOARD_ID, ttl=60)
+
+
+def test_metadata_is_loaded_once_per_ttl(board, trello):
+    assert board.default_list_id() == 'list-1'
+    board.labels()
+    board.members()
+    assert trello.paths() == [BOARD_PATH]
+
+    board.invalidate()
+    board.lists()
+    assert trello.paths() == [BOARD_PATH, BOARD_PATH]
+
+    board._loaded_at = time.monotonic() - 61
+    board.lists()
+    assert len(trello.calls) == 3
+
+
+def test_member_id_tolerates_null_names(board):
+    assert board.member_id('@luis') == 'm2'
+    assert board.member_id('sin usuario') == 'm3'
+    assert board.member_id('Ana Pérez') == 'm1'
+    assert board.member_id('M1') == 'm1'
+    assert board.member_id('@nadie') is None
+    assert board.member_id('@') is None
+
+
+def test_priority_label_is_reused_or_created(board, trello):
+    assert board.priority_label_id('high') == 'label-alta'
+    trello.routes[('POST', f"{BOARD_PATH}/labels")] = {'id': 'label-low', 'name': 'low', 'color': 'green'}
+    assert board.priority_label_id('baja') == 'label-low'
+    assert board.priority_label_id('low') == 'label-low'
+    assert trello.paths('POST') == [f"{BOARD_PATH}/labels"]
+    assert board.priority_label_id('urgente') is None
+
+
+def test_normalize_priority():
+    assert normalize_priority(' Alta ') == 'high'
+    assert normalize_priority('media') == 'medium'
+    assert normalize_priority(None) is None
+
+
+def test_failed_write_invalidates_cached_metadata(trello, board):
+    trello.routes[('POST', '/cards/c1/idMembers')] = (400, {'message': 'member not on board'})
+    cache = get_board_cache()
+    assert trello_integration.assign_card_member('c1', '@ana') is False
+    assert cache._loaded_at is None
+
+
+def test_trello_errors_propagate_from_refresh(trello):
+    trello.routes[('GET', BOARD_PATH)] = (500, {})
+    with pytest.raises(requests.HTTPError):
+        BoardMetadataCache(trello.client, BOARD_ID).lists()
+
+
+@pytest.fixture
+def priority_board(trello):
+    trello.routes[('GET', BOARD_PATH)] = {
+        'id': BOARD_ID, 'lists': [], 'members': [],
+        'labels': [{'id': 'label-alta', 'name': 'Alta'}, {'id': 'label-low', 'name': 'low'},
+                   {'id': 'label-bug', 'name': 'bug'}],
+    }
+    return trello
+
+
+def test_changing_priority_removes_the_previous_label(priority_board):
+    trello = priority_board
+    trello.routes[('GET', '/cards/c1')] = {'id': 'c1', 'idLabels': ['label-alta', 'label-bug']}
+    trello.routes[('POST', '/cards/c1/idLabels')] = ['label-alta', 'label-bug', 'label-low']
+    trello.routes[('DELETE', '/cards/c1/idLabels/label-alta')] = {'_value': None}
+
+    assert trello_integration.set_card_priority('c1', 'baja') is True
+    writes = [(method, path) for method, path, _ in trello.calls if method != 'GET']
+    assert writes == [('POST', '/cards/c1/idLabels'), ('DELETE', '/cards/c1/idLabels/label-alta')]
+
+
+def test_label_already_on_card_counts_as_success(priority_board):
+    trello = priority_board
+    trello.routes[('GET', '/cards/c1')] = {'id': 'c1', 'idLabels': []}
+    trello.routes[('POST', '/cards/c1/idLabels')] = (400, 'that label is already on the card')
+
+    assert trello_integration.set_card_priority('c1', 'high') is True
+    assert get_board_cache()._loaded_at is not None
+
+    trello.routes[('GET', '/cards/c1')] = {'id': 'c1', 'idLabels': ['label-alta']}
+    assert trello_integration.set_card_priority('c1', 'alta') is True
+    assert trello.paths('POST') == ['/cards/c1/idLabels']
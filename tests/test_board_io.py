@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+import pytest
+
+from models import db, Task, Timer
+from modules.board_io import JsonStream, export_rows, import_board, iter_export
+
+EXPORT = {
+    'id': 'board-test', 'name': "Tablero", 'prefs': {'background': 'blue', 'sizes': [1, 2]},
+    'cards': [
+        {'id': 'c1', 'name': "Primera", 'due': '2026-02-01T10:00:00.000Z', 'closed': False,
+         'labels': [{'name': 'Alta'}], 'idMembers': ['m2']},
+        {'id': 'c2', 'name': "Archivada", 'closed': True, 'labels': [], 'idMembers': []},
+        {'id': 'c3', 'name': "Con miembro", 'closed': False, 'labels': [{'name': 'low'}],
+         'members': [{'id': 'm1', 'username': 'ana'}]},
+    ],
+    'actions': [{'id': 'a1', 'data': {'text': "x" * 50}}, {'id': 'a2', 'amount': 12345.5e-3}],
+    'members': [{'id': 'm2', 'username': 'luis'}],
+}
+
+
+def export(data=EXPORT, **kwargs):
+    return io.StringIO(json.dumps(data, **kwargs))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1 << 20])
+def test_values_split_across_chunks_are_read_whole(chunk_size):
+    items = list(iter_export(export(indent=2), ('cards', 'members', 'actions'), chunk_size=chunk_size))
+    assert items == [('cards', card) for card in EXPORT['cards']] + \
+        [('actions', action) for action in EXPORT['actions']] + [('members', EXPORT['members'][0])]
+
+
+def test_number_at_the_end_of_a_chunk_continues_in_the_next():
+    stream = JsonStream(io.StringIO('12345 -6.5e3'), chunk_size=2)
+    assert stream.value() == 12345
+    assert stream.value() == -6.5e3
+    assert stream.peek() == ''
+
+
+def test_empty_export_and_arrays():
+    assert list(iter_export(io.StringIO('{}'), ('cards',))) == []
+    assert list(iter_export(io.StringIO('{"cards": [], "members": []}'), ('cards',))) == []
+
+
+@pytest.mark.parametrize('text', [
+    '', 'no es json', '[]', '{"cards": [{"id": "c1"}', '{"cards" [1]}', '{"cards": [1 2]}',
+    '{"cards": [1], "id": "x" "name": "y"}', '{"cards": [{"id": "c1", }]}',
+])
+def test_malformed_exports_raise_value_error(text):
+    with pytest.raises(ValueError):
+        list(iter_export(io.StringIO(text), ('cards',), chunk_size=4))
+
+
+def test_large_malformed_export_is_rejected_without_reading_it_whole():
+    # Un elemento que nunca se cierra: no se lee más allá del tamaño máximo de un valor
+    fp = io.StringIO('{"cards": [{"desc": "' + 'x' * (1 << 20))
+    with pytest.raises(ValueError, match="mal formada"):
+        list(iter_export(fp, ('cards',), chunk_size=1 << 10, max_value_size=1 << 15))
+    assert fp.tell() < 1 << 16
+
+
+def test_import_creates_tasks_and_reimport_updates_them(app):
+    assert import_board(iter_export(export(), ('cards', 'members')), 'U1', batch_size=1) == 2
+    tasks = {task.trello_card_id: task for task in db.session.query(Task)}
+    assert set(tasks) == {'c1', 'c3'}
+    assert (tasks['c1'].priority, tasks['c1'].assigned_to) == ('high', '@luis')  # miembro listado después
+    assert tasks['c1'].due_date.isoformat() == '2026-02-01T10:00:00'
+    assert (tasks['c3'].priority, tasks['c3'].assigned_to) == ('low', '@ana')
+
+    changed = dict(EXPORT, cards=[dict(EXPORT['cards'][0], name="Renombrada")])
+    import_board(iter_export(export(changed), ('cards', 'members')), 'U2', include_archived=True)
+    db.session.expire_all()
+    task = db.session.query(Task).filter_by(trello_card_id='c1').one()
+    assert (task.name, task.user_id) == ("Renombrada", 'U1')
+    assert db.session.query(Task).count() == 2
+
+
+def test_export_rows_in_batches(app):
+    db.session.add_all([Task(name="Una, con coma", user_id='U1'), Task(name="Otra", user_id='U2'),
+                        Task(name="Tercera", user_id='U1')])
+    db.session.add(Timer(user_id='U1'))
+    db.session.commit()
+
+    out = io.StringIO()
+    assert export_rows('tasks', 'csv', out, user_id='U1', batch_size=1) == 2
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [row['name'] for row in rows] == ["Una, con coma", "Tercera"]
+
+    out = io.StringIO()
+    assert export_rows('timers', 'jsonl', out) == 1
+    assert json.loads(out.getvalue())['user_id'] == 'U1'
+
+
+def test_import_command_reports_invalid_files(app, tmp_path):
+    path = tmp_path / 'board.json'
+    path.write_text('{"cards": [{"id": "c1", "name": "Uno"} {"id": "c2"}]}', encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['board-import', '--user', 'U1', '--file', str(path)])
+    assert result.exit_code == 1
+    assert "Exportación de Trello no válida" in result.output
@@ -0,0 +1,98 @@
+import pytest
+
+from models import db, Task, TrelloOutbox
+from modules import circuit_breaker
+from modules.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from modules.slack_commands import DEGRADED_MESSAGE
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: clock[0])
+    return clock
+
+
+def calls(breaker, count, failed=False, seconds=0.1):
+    for _ in range(count):
+        breaker.before_call()
+        breaker.record(failed, seconds)
+
+
+def test_errors_open_the_circuit_and_a_probe_closes_it(clock):
+    breaker = CircuitBreaker(min_calls=4, error_rate=0.5, cooldown=30)
+    calls(breaker, 2)
+    calls(breaker, 1, failed=True)
+    assert breaker.state == CLOSED  # menos de min_calls
+    calls(breaker, 1, failed=True)
+    assert breaker.state == OPEN and breaker.is_open()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] += 30
+    assert not breaker.is_open()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # una sola llamada de prueba a la vez
+    breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+    calls(breaker, 3, failed=True)
+    assert breaker.state == CLOSED  # la ventana empezó de nuevo
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(min_calls=1, cooldown=10)
+    calls(breaker, 1, failed=True)
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record(True, 0.1)
+    assert breaker.state == OPEN and breaker.is_open()
+
+
+def test_released_probe_lets_another_call_through(clock):
+    breaker = CircuitBreaker(min_calls=1, cooldown=10)
+    calls(breaker, 1, failed=True)
+    clock[0] += 10
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_slow_calls_open_the_circuit(clock):
+    breaker = CircuitBreaker(min_calls=4, slow_call=2.0, slow_rate=0.5)
+    calls(breaker, 2)
+    calls(breaker, 2, seconds=3.0)
+    assert breaker.state == OPEN
+
+
+def test_old_calls_leave_the_window(clock):
+    breaker = CircuitBreaker(window=30, min_calls=4, error_rate=0.5)
+    calls(breaker, 3, failed=True)
+    clock[0] += 31
+    calls(breaker, 3)
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_rejects_calls_without_reaching_trello(trello):
+    trello.client.breaker = CircuitBreaker(min_calls=1)
+    trello.routes[('GET', '/boards/board-test')] = (503, {})
+    trello.client.get('/boards/board-test')
+    with pytest.raises(CircuitOpenError):
+        trello.client.get('/boards/board-test')
+    assert len(trello.calls) == 1
+
+
+def test_degraded_mode_saves_tasks_locally_and_defers_the_card(app, slash, trello):
+    trello.client.breaker = CircuitBreaker(min_calls=1)
+    trello.client.breaker.before_call()
+    trello.client.breaker.record(True, 0.1)
+
+    response = slash('/create_task', "Sin Trello")
+    assert DEGRADED_MESSAGE in response.get_data(as_text=True)
+    assert trello.calls == []
+    task = db.session.query(Task).one()
+    assert task.trello_card_id is None
+    outbox = db.session.query(TrelloOutbox).one()
+    assert outbox.action == 'create'
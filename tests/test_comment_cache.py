@@ -0,0 +1,95 @@
+from models import db, TrelloComment, TrelloCommentCursor
+from modules import comment_cache
+
+CARD = 'card-1'
+PATH = f"/cards/{CARD}/actions"
+
+
+def action(n, text=None):
+    return {
+        'id': f"a{n:04d}", 'type': 'commentCard', 'date': f"2026-01-01T00:{n // 60:02d}:{n % 60:02d}.000Z",
+        'idMemberCreator': 'm1', 'memberCreator': {'id': 'm1', 'fullName': None, 'username': 'ana'},
+        'data': {'text': text or f"comentario {n}", 'card': {'id': CARD}},
+    }
+
+
+def thread(count):
+    """ Ruta de FakeTrello con `count` comentarios: del más reciente al más antiguo, con since, before y limit. """
+    def actions(params):
+        found = [action(n) for n in range(count, 0, -1)]
+        if params.get('since'):
+            found = [a for a in found if a['id'] > params['since']]
+        if params.get('before'):
+            found = [a for a in found if a['id'] < params['before']]
+        return found[:int(params.get('limit', 50))]
+    return actions
+
+
+def test_refresh_copies_recent_comments_and_then_only_newer(app, trello, monkeypatch):
+    monkeypatch.setattr(comment_cache, 'FETCH_LIMIT', 5)
+    trello.routes[('GET', PATH)] = thread(12)
+
+    assert comment_cache.refresh([CARD]) == {CARD}
+    assert db.session.query(TrelloComment).count() == 5
+    cursor = db.session.get(TrelloCommentCursor, CARD)
+    assert (cursor.newest_action_id, cursor.oldest_action_id, cursor.complete) == ('a0012', 'a0008', False)
+
+    trello.routes[('GET', PATH)] = thread(14)
+    comment_cache.refresh([CARD])
+    assert trello.calls[-1][2]['since'] == 'a0012'
+    assert db.session.get(TrelloCommentCursor, CARD).newest_action_id == 'a0014'
+    assert db.session.query(TrelloComment).count() == 7
+
+
+def test_concurrent_refresh_of_the_same_card_upserts(app, trello):
+    """ Otra petición guarda los mismos comentarios y el cursor mientras esta espera a Trello. """
+    nested = []
+
+    def actions(params):
+        if not nested:
+            nested.append(True)
+            with app.app_context():
+                comment_cache.refresh([CARD])
+                db.session.remove()
+        return [action(2, "editado"), action(1)]
+
+    trello.routes[('GET', PATH)] = actions
+    assert comment_cache.refresh([CARD]) == {CARD}
+    assert db.session.query(TrelloComment).count() == 2
+    assert db.session.get(TrelloComment, 'a0002').text == "editado"
+    assert db.session.query(TrelloCommentCursor).count() == 1
+
+
+def test_comments_page_loads_older_comments_on_demand(app, trello, monkeypatch):
+    monkeypatch.setattr(comment_cache, 'FETCH_LIMIT', 5)
+    trello.routes[('GET', PATH)] = thread(12)
+    comment_cache.refresh([CARD])
+
+    comments, more = comment_cache.comments_page(CARD, page=2, page_size=4)
+    assert [comment.id for comment in comments] == ['a0008', 'a0007', 'a0006', 'a0005']
+    assert more
+    assert trello.calls[-1][2]['before'] == 'a0008'
+
+    comment_cache.comments_page(CARD, page=3, page_size=4)
+    assert db.session.query(TrelloComment).count() == 12
+    assert db.session.get(TrelloCommentCursor, CARD).complete
+
+
+def test_refresh_keeps_cached_comments_when_trello_fails(app, trello):
+    trello.routes[('GET', PATH)] = [action(1)]
+    comment_cache.refresh([CARD])
+    trello.routes[('GET', PATH)] = (500, {})
+    assert comment_cache.refresh([CARD]) == set()
+    assert comment_cache.is_cached(CARD)
+
+
+def test_refresh_reads_cards_in_batches_of_ten(app, trello):
+    cards = [f"card-{i}" for i in range(12)]
+    for card_id in cards:
+        trello.routes[('GET', f"/cards/{card_id}/actions")] = []
+    trello.routes[('GET', '/cards/card-3/actions')] = (500, {})
+
+    assert comment_cache.refresh(cards) == set(cards) - {'card-3'}
+    batches = [params['urls'].split(',') for _, path, params in trello.calls if path == '/batch']
+    assert [len(urls) for urls in batches] == [10, 2]
+    assert batches[0][0] == '/cards/card-0/actions?filter=commentCard&limit=50'
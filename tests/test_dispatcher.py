@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from modules.dispatcher import (ACK_MESSAGE, ERROR_MESSAGE, TIMEOUT_MESSAGE, CommandDispatcher, bind_deadline,
+                                current_deadline, parse_timeouts)
+
+
+@pytest.fixture
+def dispatcher(app):
+    dispatcher = CommandDispatcher(app, workers=2, queue_size=4, default_timeout=0.3)
+    dispatcher.posted = []
+    dispatcher.post = lambda response_url, result: dispatcher.posted.append((response_url, result))
+    return dispatcher
+
+
+def run(dispatcher, handler, command='/test'):
+    assert dispatcher.submit(command, handler, 'https://hooks.slack.test/1')
+    dispatcher._queue.join()
+    return [result for _, result in dispatcher.posted]
+
+
+def test_result_is_posted_to_response_url(dispatcher):
+    assert run(dispatcher, lambda: "hecho") == ["hecho"]
+
+
+def test_handler_errors_post_a_generic_message(dispatcher):
+    def fail():
+        raise RuntimeError("fallo")
+    assert run(dispatcher, fail) == [ERROR_MESSAGE]
+
+
+def test_slow_handler_gets_timeout_message_and_late_result_is_dropped(dispatcher):
+    finished = threading.Event()
+
+    def slow():
+        time.sleep(0.6)
+        finished.set()
+        return "tarde"
+
+    started = time.monotonic()
+    assert run(dispatcher, slow) == [TIMEOUT_MESSAGE]
+    assert time.monotonic() - started < 0.55  # el worker no esperó al handler
+    assert finished.wait(2)
+    time.sleep(0.05)
+    assert [result for _, result in dispatcher.posted] == [TIMEOUT_MESSAGE]
+
+
+def test_handler_sees_its_deadline(dispatcher):
+    seen = []
+
+    def handler():
+        seen.append(current_deadline())
+        return bind_deadline(current_deadline)()
+
+    before = time.monotonic()
+    result, = run(dispatcher, handler)
+    assert seen[0] == result
+    assert before < seen[0] <= time.monotonic() + 0.3
+
+
+def test_command_expired_in_queue_is_not_run(dispatcher):
+    ran = []
+    dispatcher.default_timeout = -1
+    assert run(dispatcher, lambda: ran.append(True)) == [TIMEOUT_MESSAGE]
+    assert ran == []
+
+
+def test_full_queue_rejects_commands(app):
+    dispatcher = CommandDispatcher(app, workers=1, queue_size=1)
+    release = threading.Event()
+    dispatcher.post = lambda response_url, result: None
+    assert dispatcher.submit('/a', release.wait, 'u')
+    time.sleep(0.05)  # el worker ya tiene el primero
+    assert dispatcher.submit('/b', lambda: None, 'u')
+    assert not dispatcher.submit('/c', lambda: None, 'u')
+    release.set()
+
+
+def test_slash_command_is_acknowledged_and_finished_in_background(make_app, slash_for, monkeypatch):
+    from app import services
+
+    app = make_app(SLASH_ASYNC_DISPATCH=True)
+    with app.app_context():
+        dispatcher = services().dispatcher
+        posted = []
+        monkeypatch.setattr(dispatcher, 'post', lambda response_url, result: posted.append((response_url, result)))
+        response = slash_for(app)('/get_tip', response_url='https://hooks.slack.test/2')
+        assert response.get_json() == {'response_type': 'ephemeral', 'text': ACK_MESSAGE}
+        dispatcher._queue.join()
+    assert posted[0][0] == 'https://hooks.slack.test/2'
+    assert posted[0][1]
+
+
+def test_parse_timeouts():
+    assert parse_timeouts('/create_task=20, /stats=5,mal') == {'/create_task': 20.0, '/stats': 5.0}
+    assert parse_timeouts(None) == {}
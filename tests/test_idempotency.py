@@ -0,0 +1,73 @@
+import threading
+import uuid
+
+import pytest
+
+from modules import idempotency, slack_commands
+from modules.idempotency import DONE, PENDING, IdempotencyStore, request_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    return IdempotencyStore(str(tmp_path / 'requests.db'), ttl=300, pending_ttl=60)
+
+
+def test_claim_finish_and_retry(store):
+    assert store.claim('k') is None
+    assert store.claim('k') == (PENDING, None)
+    assert store.finish('k', {'text': "hecho"}) == 1
+    assert store.claim('k') == (DONE, {'text': "hecho"})
+
+
+def test_release_lets_a_retry_run_again(store):
+    assert store.claim('k') is None
+    store.release('k')
+    assert store.claim('k') is None
+
+
+def test_stale_pending_claim_can_be_taken_again(store, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(idempotency.time, 'time', lambda: clock[0])
+    assert store.claim('k') is None
+    clock[0] += 30
+    assert store.claim('k') == (PENDING, None)
+    clock[0] += 31  # el worker que la reservó ya no puede estar ejecutándola
+    assert store.claim('k') is None
+
+
+def test_entries_expire_after_ttl(store, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(idempotency.time, 'time', lambda: clock[0])
+    store.claim('k')
+    store.finish('k', "hecho")
+    clock[0] += 301
+    assert store.claim('k') is None
+
+
+def test_only_one_concurrent_claim_wins(store):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.claim('k'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(None) == 1
+
+
+def test_request_key_prefers_trigger_id():
+    assert request_key({'trigger_id': 'T1'}, b'cuerpo') == 'trigger:T1'
+    assert request_key({}, b'cuerpo') == request_key({}, b'cuerpo') != request_key({}, b'otro')
+
+
+def test_slack_retry_returns_the_stored_result(app, slash, monkeypatch):
+    runs = []
+    monkeypatch.setattr(slack_commands, 'get_tip', lambda: runs.append(True) or "Consejo")
+    trigger_id = uuid.uuid4().hex
+
+    first = slash('/get_tip', trigger_id=trigger_id)
+    retry = slash('/get_tip', trigger_id=trigger_id, headers={'X-Slack-Retry-Num': '1'})
+    assert first.get_data(as_text=True) == retry.get_data(as_text=True) == "Consejo"
+    assert len(runs) == 1
+
+    slash('/get_tip')
+    assert len(runs) == 2
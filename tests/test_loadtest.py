@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+import pytest
+from slack_sdk.signature import SignatureVerifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import loadtest  # noqa: E402
+from fake_trello import BOARD_ID, FakeTrello  # noqa: E402
+from modules.trello_client import TrelloClient  # noqa: E402
+
+
+@pytest.fixture
+def fake_trello():
+    fake = FakeTrello(latency=0, seed=1).start()
+    yield fake
+    fake.stop()
+
+
+def test_requests_are_signed_like_slack():
+    body = "command=%2Flist_tasks&user_id=U1"
+    timestamp = str(int(time.time()))
+    headers = {'X-Slack-Request-Timestamp': timestamp, 'X-Slack-Signature': loadtest.sign(body, timestamp)}
+    assert SignatureVerifier(loadtest.SIGNING_SECRET).is_valid_request(body, headers)
+
+
+def test_error_replies_are_counted_even_with_http_200():
+    assert loadtest.is_error("El comando tardó demasiado en responder.")
+    assert not loadtest.is_error("Tus tareas:")
+    assert loadtest.result_text(b'{"text": "hola"}') == "hola"
+    assert loadtest.result_text(b'texto plano') == "texto plano"
+
+
+def test_summary_separates_errors_lost_results_and_latency():
+    class Collector:
+        results = {'r1': (1.5, b'{"text": "Tus tareas:"}'), 'r2': (2.0, b'{"text": "Hubo un error"}')}
+
+        def get(self, request_id):
+            return self.results.get(request_id)
+
+    sent = {
+        'r1': ('/list_tasks', 1.0, 1.01, 200, "Procesando…"),
+        'r2': ('/list_tasks', 1.0, 1.01, 200, "Procesando…"),
+        'r3': ('/list_tasks', 1.0, 1.01, 200, "Procesando…"),
+        'r4': ('/stats', 1.0, 1.2, 200, "Estadísticas"),
+        'r5': ('/stats', 1.0, 1.2, 500, ""),
+    }
+    report = loadtest.summarize(sent, Collector(), elapsed=10)
+    assert report['commands']['/list_tasks']['errors'] == 2
+    assert report['commands']['/list_tasks']['lost'] == 1
+    assert report['commands']['/list_tasks']['p50'] == pytest.approx(0.5)
+    assert report['commands']['/stats']['error_rate'] == 0.5
+    assert report['total']['requests'] == 5 and report['total']['errors'] == 3
+
+
+def test_fake_trello_serves_the_routes_the_client_uses(fake_trello):
+    client = TrelloClient('fake-key', 'fake-token', board_id=BOARD_ID, base_url=fake_trello.url, max_retries=0)
+    assert client.get(f"/boards/{BOARD_ID}").json()['id'] == BOARD_ID
+    assert client.post('/cards', params={'name': 'Nueva'}).json()['name'] == 'Nueva'
+    actions = client.get('/cards/c1/actions', params={'limit': 2}).json()
+    assert [action['id'] for action in actions] == ['c1-action-2', 'c1-action-1']
+    assert fake_trello.stats()['requests'] == 3
+
+
+def test_fake_trello_injects_rate_limits(fake_trello):
+    fake_trello.rate_limit_rate = 1.0
+    client = TrelloClient('fake-key', 'fake-token', base_url=fake_trello.url, max_retries=0)
+    response = client.get(f"/boards/{BOARD_ID}")
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '0.5'
@@ -0,0 +1,76 @@
+import io
+import json
+import logging
+import os
+import re
+import time
+
+from modules.log_pipeline import PAYLOAD, JsonFormatter, PayloadSampler, QueueLogHandler, TextFormatter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+EAGER_LOG_CALL = re.compile(r'\blogging\.(debug|info|warning|error|exception|critical)\(\s*f["\']')
+
+
+def record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord('root', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_redacts_secrets_and_tokens():
+    formatter = JsonFormatter(secrets=['trello-secret-token', 'short', None])
+    line = formatter.format(record(
+        "Fallo en %s con %s y %s", "https://api.trello.com/1/cards?key=abc123&token=def456",
+        "xoxb-1234-abcd", "trello-secret-token"))
+    entry = json.loads(line)
+    assert entry['level'] == 'INFO'
+    assert entry['message'] == "Fallo en https://api.trello.com/1/cards?key=***&token=*** con xox*-*** y ***"
+    assert 'abc123' not in line and 'def456' not in line and 'trello-secret-token' not in line
+
+
+def test_json_formatter_truncates_long_messages():
+    entry = json.loads(JsonFormatter(max_chars=10).format(record("x" * 25)))
+    assert entry['message'] == "x" * 10 + "… (15 caracteres más)"
+
+
+def test_text_formatter_redacts_too():
+    assert TextFormatter(secrets=['s3cr3t-value']).format(record("token s3cr3t-value")).endswith("token ***")
+
+
+def test_payload_sampler_only_filters_payload_lines():
+    assert PayloadSampler(0.0).filter(record("normal"))
+    assert not PayloadSampler(0.0).filter(record("cuerpo", **PAYLOAD))
+    assert PayloadSampler(1.0).filter(record("cuerpo", **PAYLOAD))
+
+
+def test_queue_handler_formats_in_background_thread():
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter())
+    handler = QueueLogHandler(output, queue_size=10)
+    handler.handle(record("Comando %s", "/list_tasks"))
+    handler.close()
+    assert json.loads(stream.getvalue())['message'] == "Comando /list_tasks"
+
+
+def test_queue_handler_drops_when_full():
+    slow = logging.StreamHandler(io.StringIO())
+    slow.emit = lambda record: time.sleep(0.05)
+    handler = QueueLogHandler(slow, queue_size=1)
+    started = time.monotonic()
+    for i in range(20):
+        handler.handle(record("línea %s", i))
+    assert time.monotonic() - started < 0.5  # el hilo de la petición nunca espera a la escritura
+    handler.close()
+
+
+def test_modules_log_lazily():
+    """ Los argumentos se formatean en el hilo de logging, y solo si el nivel está activo. """
+    offenders = []
+    for directory in ('.', 'modules'):
+        for name in sorted(os.listdir(os.path.join(ROOT, directory))):
+            if name.endswith('.py'):
+                with open(os.path.join(ROOT, directory, name), encoding='utf-8') as source:
+                    offenders += [f"{directory}/{name}:{number}" for number, line in enumerate(source, 1)
+                                  if EAGER_LOG_CALL.search(line)]
+    assert offenders == []
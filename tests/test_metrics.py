@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Task
+from modules.commands import Command, CommandRequest, UsageError, split_args
+from modules.metrics import MetricsRegistry, Timings, add_time, set_timings
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter('errors_total', "Errores.", ('command',))
+    histogram = registry.histogram('duration_seconds', "Duración.", ('command',), buckets=(0.1, 1.0))
+    registry.gauge('queue_depth', "Cola.", lambda: 3)
+    counter.inc('/a')
+    counter.inc('/a', amount=2)
+    counter.inc('a"b')
+    histogram.observe('/a', value=0.05)
+    histogram.observe('/a', value=0.5)
+
+    lines = registry.render().splitlines()
+    assert 'errors_total{command="/a"} 3.0' in lines
+    assert 'errors_total{command="a\\"b"} 1.0' in lines
+    assert 'duration_seconds_bucket{command="/a",le="0.1"} 1.0' in lines
+    assert 'duration_seconds_bucket{command="/a",le="+Inf"} 2.0' in lines
+    assert 'duration_seconds_sum{command="/a"} 0.55' in lines
+    assert 'queue_depth 3.0' in lines
+    assert not any('_created' in line for line in lines)
+
+
+WORKER = """
+import os
+import sys
+from prometheus_client import multiprocess
+from modules.metrics import MetricsRegistry
+registry = MetricsRegistry()
+errors = registry.counter('errors_total', "Errores.", ('command',))
+duration = registry.histogram('duration_seconds', "Duración.", ('command',), buckets=(0.1, 1.0))
+registry.gauge('queue_depth', "Cola.", lambda: int(sys.argv[1]), multiprocess_mode='livesum')
+if sys.argv[1] == 'render':
+    if len(sys.argv) > 2:
+        multiprocess.mark_process_dead(int(sys.argv[2]))
+    print(registry.render())
+else:
+    errors.inc('/a', amount=int(sys.argv[1]))
+    duration.observe('/a', value=0.05 * int(sys.argv[1]))
+    registry.refresh()
+    print(os.getpid())
+"""
+
+
+def test_workers_share_their_series_in_multiprocess_mode(tmp_path):
+    """ Con PROMETHEUS_MULTIPROC_DIR, cualquier worker devuelve la suma de todos. """
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=ROOT)
+
+    def worker(*args):
+        return subprocess.run([sys.executable, '-c', WORKER, *args], env=env, cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout
+
+    first = int(worker('2'))
+    worker('3')
+    lines = worker('render').splitlines()
+    assert 'errors_total{command="/a"} 5.0' in lines
+    assert 'duration_seconds_count{command="/a"} 2.0' in lines
+    assert 'queue_depth 5.0' in lines
+
+    # gunicorn.conf.py: al salir un worker, sus gauges dejan de contar
+    assert 'queue_depth 3.0' in worker('render', str(first)).splitlines()
+
+
+def test_app_gauges_are_registered_once(make_app):
+    first, second = make_app(), make_app()
+    for app in (first, second):
+        app.extensions['services'].dispatcher
+    text = first.test_client().get('/metrics').get_data(as_text=True)
+    assert text.count('# TYPE slash_dispatch_queue_depth gauge') == 1
+    assert 'slash_dispatch_queue_depth 0.0' in text
+
+
+def test_outbox_gauges_use_one_query(app):
+    from modules.trello_outbox import TrelloOutboxWorker
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    assert TrelloOutboxWorker(app).stats() == {'pending': 0, 'lag_seconds': 0.0, 'failed': 0}
+    assert len([statement for statement in statements if statement.startswith('SELECT')]) == 1
+
+
+def test_db_time_is_added_to_the_running_command(app):
+    timings = Timings()
+    previous = set_timings(timings)
+    try:
+        db.session.query(Task).count()
+        add_time('trello', 0.25)
+    finally:
+        set_timings(previous)
+    assert timings.db > 0 and timings.trello == 0.25
+    add_time('db', 1.0)  # sin comando en curso no hace nada
+    assert timings.db < 1.0
+
+
+def test_command_records_latency_and_errors(app):
+    def fail(request, task_id):
+        raise RuntimeError("fallo")
+
+    command = Command('/metrics_test', fail, parser=split_args(1, "Uso: /metrics_test <id>"))
+    with pytest.raises(UsageError):
+        command.prepare(CommandRequest('/metrics_test', 'U1', 'ana', ''))
+    with pytest.raises(RuntimeError):
+        command.prepare(CommandRequest('/metrics_test', 'U1', 'ana', '7'))()
+
+    client = app.test_client()
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert 'slack_command_errors_total{command="/metrics_test"} 1' in text
+    assert 'slack_command_duration_seconds_count{command="/metrics_test"} 1' in text
+
+
+def test_slash_command_is_measured(app, slash):
+    slash('/get_tip')
+    text = app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'slack_command_duration_seconds_count{command="/get_tip"}' in text
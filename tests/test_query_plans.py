@@ -0,0 +1,31 @@
+from modules.query_plans import FULL_SCAN, check_query_plans, check_query_plans_command
+
+
+def test_every_command_query_uses_an_index(app):
+    results = check_query_plans()
+    assert [(command, plan) for command, uses_index, plan in results if not uses_index] == []
+
+
+def test_stop_timer_plan_is_the_closing_update(app):
+    plans = {command: plan for command, _, plan in check_query_plans()}
+    assert any('ix_timer_user_id_end_time' in line for line in plans['/stop_timer'])
+
+
+def test_full_scan_pattern():
+    assert FULL_SCAN.search('SCAN task')
+    assert FULL_SCAN.search('Seq Scan on task  (cost=0.00..1.01 rows=1 width=4)')
+    assert not FULL_SCAN.search('SEARCH task USING INDEX ix_task_user_id (user_id=?)')
+    assert not FULL_SCAN.search('SCAN task_fts VIRTUAL TABLE INDEX 0:M2')
+    assert not FULL_SCAN.search('SCAN anon_1')
+    assert not FULL_SCAN.search('SCAN CONSTANT ROW')
+
+
+def test_cli_fails_when_a_query_scans(app, monkeypatch):
+    result = app.test_cli_runner().invoke(check_query_plans_command)
+    assert result.exit_code == 0
+    assert "OK   /stop_timer" in result.output
+
+    monkeypatch.setattr('modules.query_plans.check_query_plans', lambda: [('/lenta', False, ['SCAN task'])])
+    result = app.test_cli_runner().invoke(check_query_plans_command)
+    assert result.exit_code == 1
+    assert "SCAN /lenta" in result.output
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from models import db, Task
+from modules import read_cache
+from modules.read_cache import MemoryBackend, ReadCache, SharedBackend, invalidate_user
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend(max_bytes=100)
+    return SharedBackend(str(tmp_path / 'cache.db'), max_bytes=100)
+
+
+def test_least_recently_used_entries_are_evicted_by_size(backend, monkeypatch):
+    clock = iter(range(1000, 2000, 5))
+    monkeypatch.setattr(read_cache.time, 'time', lambda: next(clock))
+    backend.set('U1', 'a', b'x' * 40, 0, 60)
+    backend.set('U1', 'b', b'x' * 40, 0, 60)
+    assert backend.get('U1', 'a') == b'x' * 40  # 'a' pasa a ser la más reciente
+    backend.set('U2', 'c', b'x' * 40, 0, 60)
+    assert backend.get('U1', 'b') is None
+    assert backend.get('U1', 'a') is not None and backend.get('U2', 'c') is not None
+    assert backend.stats() == {'entries': 2, 'bytes': 80}
+
+
+def test_expired_entries_are_misses(backend):
+    backend.set('U1', 'a', b'valor', 0, -1)
+    assert backend.get('U1', 'a') is None
+
+
+def test_value_loaded_before_an_invalidation_is_not_stored(backend):
+    version = backend.version('U1')
+    backend.invalidate('U1')
+    backend.set('U1', 'a', b'viejo', version, 60)
+    assert backend.get('U1', 'a') is None
+    backend.set('U1', 'a', b'nuevo', backend.version('U1'), 60)
+    assert backend.get('U1', 'a') == b'nuevo'
+
+
+def test_shared_backend_is_seen_by_every_worker(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first, second = SharedBackend(path, 1000), SharedBackend(path, 1000)
+    first.set('U1', 'a', b'valor', 0, 60)
+    assert second.get('U1', 'a') == b'valor'
+    second.invalidate('U1')
+    assert first.get('U1', 'a') is None and first.version('U1') == 1
+
+
+def test_cache_returns_copies_and_counts_hits():
+    cache = ReadCache(MemoryBackend(10000))
+    loads = []
+
+    def load():
+        loads.append(True)
+        return ['tarea']
+
+    first = cache.get_or_load('U1', '/list_tasks', (), load)
+    first.append('cambiada')
+    assert cache.get_or_load('U1', '/list_tasks', (), load) == ['tarea']
+    assert len(loads) == 1 and cache.hit_ratio() == 0.5
+
+
+def test_invalidate_user_waits_for_the_commit(app, monkeypatch):
+    cache = ReadCache(MemoryBackend(10000))
+    monkeypatch.setattr(read_cache, '_cache', cache)
+    cache.get_or_load('U1', '/list_tasks', (), lambda: "antes")
+
+    db.session.add(Task(name="Nueva", user_id='U1'))
+    invalidate_user('U1')
+    db.session.flush()
+    assert cache.get_or_load('U1', '/list_tasks', (), lambda: "después") == "antes"
+    db.session.commit()
+    assert cache.get_or_load('U1', '/list_tasks', (), lambda: "después") == "después"
+
+
+def test_backend_is_chosen_from_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv('READ_CACHE_BACKEND', 'off')
+    assert isinstance(read_cache._build_cache(), read_cache.NullCache)
+    monkeypatch.setenv('READ_CACHE_BACKEND', 'shared')
+    monkeypatch.setenv('READ_CACHE_PATH', str(tmp_path / 'cache.db'))
+    assert isinstance(read_cache._build_cache().backend, SharedBackend)
+    monkeypatch.setenv('READ_CACHE_BACKEND', 'redis')
+    with pytest.raises(ValueError):
+        read_cache._build_cache()
+
+
+@pytest.mark.parametrize('workers, configured, expected', [
+    ('4', None, 'shared'), ('1', None, 'memory'), ('4', 'memory', 'memory'),
+])
+def test_gunicorn_defaults_to_the_shared_cache_with_several_workers(tmp_path, workers, configured, expected):
+    env = {key: value for key, value in os.environ.items() if key != 'READ_CACHE_BACKEND'}
+    env.update(WEB_CONCURRENCY=workers, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    if configured:
+        env['READ_CACHE_BACKEND'] = configured
+    script = "import os, runpy; runpy.run_path('gunicorn.conf.py'); print(os.getenv('READ_CACHE_BACKEND', 'memory'))"
+    result = subprocess.run([sys.executable, '-c', script], env=env, cwd=ROOT, check=True,
+                            capture_output=True, text=True)
+    assert result.stdout.strip() == expected
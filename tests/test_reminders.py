@@ -0,0 +1,43 @@
+from modules.reminders import ReminderWheel
+
+
+def test_reminders_of_the_same_second_fire_together_in_order():
+    wheel = ReminderWheel()
+    wheel.schedule(('break', 'U2'), 20, 'b')
+    wheel.schedule(('break', 'U1'), 10.7, 'a')
+    wheel.schedule(('pomodoro', 'U1'), 10, 'c')
+    assert len(wheel) == 3 and wheel.next_due() == 10
+
+    assert wheel.pop_due(9) == []
+    assert wheel.pop_due(15) == [(10, {('break', 'U1'): 'a', ('pomodoro', 'U1'): 'c'})]
+    assert ('break', 'U1') not in wheel
+    assert wheel.pop_due(30) == [(20, {('break', 'U2'): 'b'})]
+    assert wheel.next_due() is None
+
+
+def test_schedule_again_moves_the_key():
+    wheel = ReminderWheel()
+    wheel.schedule(('break', 'U1'), 10, 'antes')
+    wheel.schedule(('break', 'U1'), 50, 'después')
+    assert len(wheel) == 1
+    assert wheel.next_due() == 50
+    assert wheel.pop_due(100) == [(50, {('break', 'U1'): 'después'})]
+
+
+def test_cancel_removes_only_that_key():
+    wheel = ReminderWheel()
+    wheel.schedule(('break', 'U1'), 10, 'a')
+    wheel.schedule(('break', 'U2'), 10, 'b')
+    wheel.schedule(('break', 'U3'), 5, 'c')
+    assert wheel.cancel(('break', 'U3'))
+    assert not wheel.cancel(('break', 'U3'))
+    assert wheel.cancel(('break', 'U1'))
+    assert wheel.next_due() == 10
+    assert wheel.pop_due(10) == [(10, {('break', 'U2'): 'b'})]
+
+
+def test_clear():
+    wheel = ReminderWheel()
+    wheel.schedule(('break', 'U1'), 10, 'a')
+    wheel.clear()
+    assert len(wheel) == 0 and wheel.next_due() is None and wheel.pop_due(100) == []
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Reminder, SchedulerLease
+from modules.scheduler import BREAK, BREAK_INTERVAL, POMODORO, ReminderScheduler, to_epoch
+from modules.slack_commands import BREAK_REMINDER_MESSAGE
+
+
+class FakeSender:
+    def __init__(self):
+        self.messages = []
+
+    def post_messages(self, messages):
+        self.messages += messages
+
+
+@pytest.fixture
+def scheduler(app):
+    return ReminderScheduler(app, FakeSender(), lease_ttl=30)
+
+
+def test_repeating_the_command_reschedules_instead_of_duplicating(scheduler):
+    scheduler.add_break_reminder('U1')
+    scheduler.add_break_reminder('U1')
+    reminders = db.session.query(Reminder).all()
+    assert len(reminders) == 1
+    assert reminders[0].interval_seconds == BREAK_INTERVAL
+
+    assert scheduler.cancel_break_reminder('U1')
+    assert not scheduler.cancel_break_reminder('U1')
+    assert db.session.query(Reminder).one().due_at is None
+
+
+def test_only_one_scheduler_holds_the_lease(app, scheduler):
+    other = ReminderScheduler(app, FakeSender(), lease_ttl=30)
+    assert scheduler._try_acquire()
+    assert not other._try_acquire()
+    assert scheduler._try_acquire()  # renovar la propia
+
+    scheduler._release()
+    assert other._try_acquire()
+    assert db.session.get(SchedulerLease, 'reminders').holder == other.holder
+
+
+def test_leader_loads_pending_reminders_and_fires_them(app, scheduler):
+    due = datetime.utcnow().replace(microsecond=0) - timedelta(seconds=5)
+    scheduler._save('U1', BREAK, due, interval_seconds=BREAK_INTERVAL)
+    scheduler._save('U2', POMODORO, due)
+
+    scheduler._poll()
+    assert scheduler.is_leader
+    assert (BREAK, 'U1') in scheduler.wheel and (POMODORO, 'U2') in scheduler.wheel
+
+    scheduler._fire_due(to_epoch(due) + 5)
+    assert ('U1', BREAK_REMINDER_MESSAGE) in scheduler.slack_sender.messages
+    assert len(scheduler.slack_sender.messages) == 2
+
+    db.session.expire_all()
+    assert db.session.query(Reminder).filter_by(user_id='U2').one().due_at is None
+    assert db.session.query(Reminder).filter_by(user_id='U1').one().due_at == due + timedelta(seconds=BREAK_INTERVAL)
+    assert (BREAK, 'U1') in scheduler.wheel
+
+
+def test_reminders_changed_in_another_worker_are_synced(app, scheduler):
+    scheduler._poll()
+    other = ReminderScheduler(app, FakeSender())
+    other.add_break_reminder('U3')
+    scheduler._poll()
+    assert (BREAK, 'U3') in scheduler.wheel
+
+    other.cancel_break_reminder('U3')
+    scheduler._poll()
+    assert (BREAK, 'U3') not in scheduler.wheel
@@ -0,0 +1,64 @@
+import threading
+
+from modules.services import Services
+
+# make_app sustituye start_background por un no-op; aquí se prueba el original
+START_BACKGROUND = Services.start_background
+
+LAZY = ('signature_verifier', 'slack_client', 'slack_sender', 'scheduler', 'trello_outbox', 'dispatcher',
+        'idempotency', 'commands')
+
+
+class FakeService:
+    def __init__(self):
+        self.started = 0
+        self.stopped = 0
+
+    def start(self):
+        self.started += 1
+
+    def shutdown(self):
+        self.stopped += 1
+
+
+def test_creating_the_app_builds_no_services_and_starts_no_threads(make_app):
+    before = threading.active_count()
+    app = make_app()
+    services = app.extensions['services']
+    assert not any(name in services.__dict__ for name in LAZY)
+    assert threading.active_count() == before
+
+
+def test_services_are_built_once_on_first_use(make_app):
+    services = make_app().extensions['services']
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(services.slack_client)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in seen}) == 1
+    assert services.slack_client is seen[0]
+    assert 'slack_sender' not in services.__dict__
+
+
+def test_start_background_is_idempotent_per_process(make_app, monkeypatch):
+    from modules import trello_async
+    monkeypatch.setattr(trello_async, 'close_async_client', lambda: None)
+    services = make_app().extensions['services']
+    scheduler = services.__dict__['scheduler'] = FakeService()
+    outbox = services.__dict__['trello_outbox'] = FakeService()
+
+    START_BACKGROUND(services)
+    START_BACKGROUND(services)
+    assert (scheduler.started, outbox.started) == (1, 1)
+
+    services.shutdown()
+    assert (scheduler.stopped, outbox.stopped) == (1, 1)
+
+
+def test_shutdown_without_start_does_nothing(make_app):
+    services = make_app().extensions['services']
+    services.__dict__['scheduler'] = scheduler = FakeService()
+    services.shutdown()
+    assert scheduler.stopped == 0
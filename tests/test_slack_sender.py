@@ -0,0 +1,96 @@
+import pytest
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+from modules import slack_sender
+from modules.slack_sender import SlackSender, parse_rate_limits
+
+
+class FakeClient:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def api_call(self, method, json=None):
+        self.calls.append((method, json))
+        result = self.results.pop(0) if self.results else {'ok': True}
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def rate_limited(retry_after):
+    response = SlackResponse(client=None, http_verb='POST', api_url='chat.postMessage', req_args={},
+                             data={'ok': False, 'error': 'ratelimited'}, headers={'Retry-After': retry_after},
+                             status_code=429)
+    return SlackApiError("ratelimited", response)
+
+
+class FakeClock:
+    """ Sustituye al módulo time de slack_sender: dormir solo avanza el reloj. """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(slack_sender, 'time', clock)
+    return clock.sleeps
+
+
+def drain(sender):
+    """ Enviar en este hilo lo que haya en la cola, incluidos los reintentos. """
+    while not sender._queue.empty():
+        sender._send(*sender._queue.get_nowait())
+
+
+def test_network_errors_are_retried_with_exponential_backoff(sleeps):
+    client = FakeClient(ConnectionError("sin red"), ConnectionError("sin red"))
+    sender = SlackSender(client, max_retries=3, retry_backoff=0.5)
+    sender._queue.put_nowait(('chat.postMessage', {'channel': 'U1', 'text': 'hola'}, 0.0, 0, 0.0))
+    drain(sender)
+
+    assert len(client.calls) == 3
+    assert len(sleeps) == 2
+    assert sleeps == [0.5, 1.0]
+    assert sender.stats()['sent'] == 1
+
+
+def test_message_fails_after_max_retries(sleeps):
+    client = FakeClient(*[ConnectionError("sin red")] * 5)
+    sender = SlackSender(client, max_retries=2, retry_backoff=0.1)
+    sender._queue.put_nowait(('chat.postMessage', {}, 0.0, 0, 0.0))
+    drain(sender)
+    assert len(client.calls) == 3
+    assert sender.stats()['failed'] == 1
+
+
+def test_rate_limited_message_waits_for_retry_after(sleeps):
+    client = FakeClient(rate_limited('2'))
+    sender = SlackSender(client)
+    sender._queue.put_nowait(('chat.postMessage', {}, 0.0, 0, 0.0))
+    drain(sender)
+    assert len(client.calls) == 2
+    assert sleeps == [2.0]
+    assert sender.stats()['rate_limited'] == 1 and sender.stats()['sent'] == 1
+
+
+def test_full_queue_drops_messages(sleeps):
+    sender = SlackSender(FakeClient(), workers=0, queue_size=1)
+    assert sender.post_messages([('U1', 'uno'), ('U2', 'dos')]) == 1
+    assert sender.stats()['dropped'] == 1
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits('chat.postMessage=5:10, chat.update=1,mal') == {
+        'chat.postMessage': (5.0, 10), 'chat.update': (1.0, 1)}
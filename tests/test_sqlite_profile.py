@@ -0,0 +1,83 @@
+import threading
+
+from sqlalchemy import event
+
+from models import db, Task
+from modules.write_coalescer import run_write, write_transaction
+
+
+def begins(app):
+    statements = []
+
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('BEGIN'):
+            statements.append(statement)
+
+    return statements
+
+
+def test_profile_enables_wal(app):
+    assert app.config['SQLITE_TUNING']
+    assert db.session.execute(db.text("PRAGMA journal_mode")).scalar() == 'wal'
+
+
+def test_reads_begin_deferred_and_writes_immediate(app):
+    statements = begins(app)
+    db.session.query(Task).count()
+    db.session.commit()
+    with write_transaction():
+        db.session.add(Task(name="Escritura", user_id='U1'))
+    run_write(lambda: db.session.query(Task).count())
+    assert statements == ['BEGIN', 'BEGIN IMMEDIATE', 'BEGIN IMMEDIATE']
+
+
+def test_write_transaction_rolls_back_on_error(app):
+    try:
+        with write_transaction():
+            db.session.add(Task(name="No se guarda", user_id='U1'))
+            raise RuntimeError("fallo")
+    except RuntimeError:
+        pass
+    assert db.session.query(Task).count() == 0
+
+
+def test_concurrent_read_then_write_does_not_lock(app):
+    """ Cada escritura lee antes de escribir: con BEGIN diferido, varios hilos a la vez daban 'database is locked'. """
+    errors = []
+
+    def insert_next():
+        count = db.session.query(Task).filter_by(user_id='U1').count()
+        db.session.add(Task(name=f"Tarea {count}", user_id='U1'))
+
+    def worker():
+        with app.app_context():
+            for _ in range(20):
+                try:
+                    run_write(insert_next)
+                except Exception as e:
+                    errors.append(e)
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert db.session.query(Task).count() == 160
+
+
+def test_coalescer_runs_units_in_one_immediate_transaction(make_app):
+    app = make_app(SQLITE_WRITE_COALESCE=True)
+    with app.app_context():
+        assert 'write_coalescer' in app.extensions
+        task_id = run_write(lambda: _add_task("Agrupada"))
+        assert db.session.get(Task, task_id).name == "Agrupada"
+
+
+def _add_task(name):
+    task = Task(name=name, user_id='U1')
+    db.session.add(task)
+    db.session.flush()
+    return task.id
@@ -0,0 +1,97 @@
+import os
+from datetime import date, datetime
+
+import pytest
+from flask_migrate import upgrade
+
+from models import db, Timer, TimerDailyRollup
+from modules.stats import parse_period, rebuild_rollups, record_session, split_by_day, user_totals
+from modules.write_coalescer import run_write
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+TODAY = date(2026, 10, 15)  # jueves
+
+
+def test_split_by_day_within_one_day():
+    assert split_by_day(datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 10, 30)) == [(date(2026, 1, 1), 5400)]
+
+
+def test_split_by_day_across_midnight():
+    assert split_by_day(datetime(2026, 1, 1, 23, 30), datetime(2026, 1, 3, 0, 15)) == [
+        (date(2026, 1, 1), 1800), (date(2026, 1, 2), 86400), (date(2026, 1, 3), 900)]
+    assert split_by_day(datetime(2026, 1, 1, 23), datetime(2026, 1, 2)) == [(date(2026, 1, 1), 3600)]
+
+
+def test_split_by_day_of_an_empty_interval():
+    assert split_by_day(datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 9)) == []
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('', (None, None, "todo el historial")),
+    ('hoy', (TODAY, TODAY, "hoy")),
+    ('Week', (date(2026, 10, 12), TODAY, "esta semana")),
+    ('mes', (date(2026, 10, 1), TODAY, "este mes")),
+    ('2026-01-05', (date(2026, 1, 5), date(2026, 1, 5), "2026-01-05 a 2026-01-05")),
+    ('2026-01-05..2026-02-01', (date(2026, 1, 5), date(2026, 2, 1), "2026-01-05 a 2026-02-01")),
+])
+def test_parse_period(text, expected):
+    assert parse_period(text, today=TODAY) == expected
+
+
+@pytest.mark.parametrize('text', ['ayer', '2026-02-01..2026-01-05', '2026-13-01', '2026-01-05..'])
+def test_parse_period_rejects(text):
+    with pytest.raises(ValueError):
+        parse_period(text, today=TODAY)
+
+
+def test_sessions_accumulate_per_day(app):
+    def write():
+        record_session('U1', datetime(2026, 1, 1, 23), datetime(2026, 1, 2, 1), pomodoro=True)
+        record_session('U1', datetime(2026, 1, 2, 9), datetime(2026, 1, 2, 9, 30))
+        record_session('U2', datetime(2026, 1, 2, 9), datetime(2026, 1, 2, 10))
+    run_write(write)
+
+    rows = {(row.day, row.seconds, row.sessions, row.pomodoros)
+            for row in db.session.query(TimerDailyRollup).filter_by(user_id='U1')}
+    assert rows == {(date(2026, 1, 1), 3600, 1, 1), (date(2026, 1, 2), 5400, 1, 0)}
+    assert user_totals('U1') == (9000, 2, 1)
+    assert user_totals('U1', date(2026, 1, 2), date(2026, 1, 2)) == (5400, 1, 0)
+    assert user_totals('U3') == (0, 0, 0)
+
+
+def test_stats_command_reads_the_rollup(app, slash):
+    run_write(lambda: record_session('U1', datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 10, 1, 5)))
+    text = slash('/stats', '2026-01-01', user_id='U1').get_data(as_text=True)
+    assert "(2026-01-01 a 2026-01-01)" in text
+    assert "Tiempo total trabajado: 1h 1m 5s." in text
+    assert "Periodo inválido" in slash('/stats', 'ayer').get_data(as_text=True)
+
+
+def test_rebuild_rollups_from_closed_timers(app):
+    db.session.add_all([
+        Timer(user_id='U1', start_time=datetime(2026, 1, 1, 23), end_time=datetime(2026, 1, 2, 1)),
+        Timer(user_id='U1', start_time=datetime(2026, 1, 3, 9), end_time=None),
+        Timer(user_id='U2', start_time=datetime(2026, 1, 3, 9), end_time=datetime(2026, 1, 3, 9, 10)),
+    ])
+    db.session.add(TimerDailyRollup(user_id='U1', day=date(2025, 1, 1), seconds=1, sessions=1, pomodoros=0))
+    db.session.commit()
+
+    assert rebuild_rollups(batch_size=1) == 2
+    assert user_totals('U1') == (7200, 1, 0)
+    assert user_totals('U2') == (600, 1, 0)
+
+
+def test_rollup_migration_backfills_existing_timers(make_app):
+    with make_app().app_context():
+        db.drop_all()
+        upgrade(directory=MIGRATIONS, revision='7c1e5a2b9d40')
+        db.session.execute(Timer.__table__.insert(), [
+            {'user_id': 'U1', 'start_time': datetime(2026, 1, 1, 23, 30), 'end_time': datetime(2026, 1, 2, 0, 30)},
+            {'user_id': 'U1', 'start_time': datetime(2026, 1, 2, 9), 'end_time': datetime(2026, 1, 2, 10)},
+            {'user_id': 'U1', 'start_time': datetime(2026, 1, 3, 9), 'end_time': None},
+        ])
+        db.session.commit()
+
+        upgrade(directory=MIGRATIONS)
+        assert user_totals('U1') == (7200, 2, 0)
+        assert user_totals('U1', date(2026, 1, 2), date(2026, 1, 2)) == (5400, 1, 0)
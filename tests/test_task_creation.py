@@ -0,0 +1,68 @@
+from conftest import BOARD_ID
+from models import db, Task, TrelloOutbox
+from modules import slack_commands, trello_integration
+from modules.slack_commands import create_task, parse_task_names
+
+
+def board(trello):
+    trello.routes[('GET', f"/boards/{BOARD_ID}")] = {'lists': [{'id': 'list-1', 'pos': 1}], 'labels': [], 'members': []}
+
+
+def cards(trello, failing=()):
+    def create(params):
+        if params['name'] in failing:
+            return 400, {'message': 'invalid'}
+        return {'id': f"card-{params['name']}", 'name': params['name']}
+    trello.routes[('POST', '/cards')] = create
+
+
+def test_parse_task_names():
+    assert parse_task_names("Uno; Dos\nTres ;; ") == ['Uno', 'Dos', 'Tres']
+    assert parse_task_names(None) == []
+
+
+def test_single_task_gets_a_trello_card(app, trello):
+    board(trello)
+    cards(trello)
+    assert create_task('U1', "Revisar informe", db) == \
+        "Tarea 'Revisar informe' creada en Trello y guardada en la base de datos."
+    task = db.session.query(Task).one()
+    assert (task.name, task.user_id, task.trello_card_id) == ("Revisar informe", 'U1', 'card-Revisar informe')
+
+
+def test_bulk_creation_saves_created_tasks_in_one_write(app, trello, monkeypatch):
+    board(trello)
+    cards(trello, failing={'Dos'})
+    monkeypatch.setattr(slack_commands, 'BULK_CREATE_CONCURRENCY', 1)  # orden de las llamadas determinista
+    writes = []
+    run_write = slack_commands.run_write
+    monkeypatch.setattr(slack_commands, 'run_write', lambda unit: writes.append(unit) or run_write(unit))
+
+    message = create_task('U1', "Uno; Dos; Tres; Cuatro", db)
+    assert message.startswith("3 de 4 tareas creadas")
+    assert "No se pudieron crear: 'Dos'" in message
+    assert len(writes) == 1
+    assert sorted(task.name for task in db.session.query(Task)) == ['Cuatro', 'Tres', 'Uno']
+    # El tablero se leyó una vez para las cuatro tarjetas y otra después del fallo, que invalida los metadatos
+    assert trello.paths('GET') == [f"/boards/{BOARD_ID}"] * 2
+
+
+def test_tasks_are_saved_for_later_when_trello_is_down(app, trello, monkeypatch):
+    monkeypatch.setattr(slack_commands, 'trello_degraded', lambda: True)
+    message = create_task('U1', "Uno; Dos", db)
+    assert "Tareas guardadas en la base de datos: 'Uno', 'Dos'" in message
+    assert db.session.query(Task).filter(Task.trello_card_id.is_(None)).count() == 2
+    assert db.session.query(TrelloOutbox).count() == 2
+    assert trello.calls == []
+
+
+def test_batch_get_splits_paths_and_reads_each_result(trello, monkeypatch):
+    monkeypatch.setattr(trello_integration, 'BATCH_SIZE', 2)
+
+    def batch(params):
+        return [{'200': {'path': url}} if 'bad' not in url else {'statusCode': 404} for url in params['urls'].split(',')]
+    trello.routes[('GET', '/batch')] = batch
+
+    paths = ['/cards/a', '/cards/bad', '/cards/c']
+    assert trello_integration.batch_get(paths) == [{'path': '/cards/a'}, None, {'path': '/cards/c'}]
+    assert [params['urls'] for _, _, params in trello.calls] == ['/cards/a,/cards/bad', '/cards/c']
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Task
+from modules import task_pages
+from modules.task_pages import NEXT_ACTION, PREV_ACTION, decode_cursor, encode_cursor, fetch_page, handle_page_action
+
+
+def add_tasks(*specs):
+    start = datetime(2026, 1, 1)
+    for n, (user_id, priority) in enumerate(specs):
+        db.session.add(Task(name=f"Tarea {n}", user_id=user_id, priority=priority,
+                            created_at=start + timedelta(minutes=n)))
+    db.session.commit()
+
+
+def names(rows):
+    return [task.name for _, task in rows]
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 1, 1, 12, 30)
+    value = encode_cursor('recent_tasks', 0, [created_at, 7])
+    assert decode_cursor(value) == ('recent_tasks', (0, [created_at, 7]))
+    assert decode_cursor(encode_cursor('priority_list', 3, [42])) == ('priority_list', (3, [42]))
+
+
+@pytest.mark.parametrize('value', [None, 'no es json', '{"list":"otra","segment":0,"key":[1]}',
+                                   '{"list":"my_tasks","segment":0,"key":["x"]}', '{"list":"my_tasks"}'])
+def test_invalid_cursor_raises_value_error(value):
+    with pytest.raises(ValueError):
+        decode_cursor(value)
+
+
+def test_pages_cross_segment_boundaries(app):
+    # Prioridades: high, low, medium, None, high, medium → orden por segmento y luego por id
+    add_tasks(('U1', 'high'), ('U1', 'low'), ('U1', 'medium'), ('U1', None), ('U1', 'high'), ('U1', 'medium'),
+              ('U2', 'high'))
+
+    rows, has_prev, has_next = fetch_page('priority_list', 'U1', size=3)
+    assert names(rows) == ["Tarea 0", "Tarea 4", "Tarea 2"]
+    assert (has_prev, has_next) == (False, True)
+
+    index, task = rows[-1]
+    cursor = (index, task_pages.TASK_LISTS['priority_list'].key(task))
+    rows, has_prev, has_next = fetch_page('priority_list', 'U1', cursor=cursor, size=3)
+    assert names(rows) == ["Tarea 5", "Tarea 1", "Tarea 3"]
+    assert (has_prev, has_next) == (True, False)
+
+    index, task = rows[0]
+    cursor = (index, task_pages.TASK_LISTS['priority_list'].key(task))
+    rows, has_prev, has_next = fetch_page('priority_list', 'U1', cursor=cursor, forward=False, size=3)
+    assert names(rows) == ["Tarea 0", "Tarea 4", "Tarea 2"]
+    assert (has_prev, has_next) == (False, True)
+
+
+def test_descending_list_pages_newest_first(app):
+    add_tasks(*[('U1', None)] * 5)
+    rows, _, has_next = fetch_page('recent_tasks', 'U1', size=2)
+    assert names(rows) == ["Tarea 4", "Tarea 3"] and has_next
+    index, task = rows[-1]
+    rows, _, has_next = fetch_page('recent_tasks', 'U1', cursor=(index, [task.created_at, task.id]), size=2)
+    assert names(rows) == ["Tarea 2", "Tarea 1"] and has_next
+
+
+def test_buttons_page_through_the_list(app, monkeypatch):
+    monkeypatch.setattr(task_pages, 'PAGE_SIZE', 2)
+    add_tasks(*[('U1', None)] * 3)
+
+    first = task_pages.task_page('list_tasks', 'U1')
+    buttons = first['blocks'][1]['elements']
+    assert [button['action_id'] for button in buttons] == [NEXT_ACTION]
+
+    second = handle_page_action(buttons[0], 'U1')
+    assert second['replace_original']
+    assert "Tarea 2" in second['blocks'][0]['text']['text']
+    prev, = second['blocks'][1]['elements']
+    assert prev['action_id'] == PREV_ACTION
+    assert json.loads(prev['value'])['list'] == 'list_tasks'
+
+    # La lista es siempre la del usuario que pulsa, aunque el botón venga de otro mensaje
+    assert handle_page_action(buttons[0], 'U2') == {'text': "No tienes tareas creadas.", 'replace_original': True}
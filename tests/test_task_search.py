@@ -0,0 +1,94 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from flask_migrate import upgrade
+
+from models import db, Task
+from modules import task_search
+from modules.task_search import fuzzy_matches, search_query, search_tasks
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+NAMES = ["Preparar presentación del cliente", "Revisar presupuesto anual", "Llamar al cliente",
+         "Presupuesto 50% descuento", "Diseño de la página"]
+
+
+@pytest.fixture
+def migrated(make_app):
+    """ Base de datos creada con las migraciones: incluye la tabla FTS5 y sus triggers. """
+    app = make_app()
+    with app.app_context():
+        db.drop_all()
+        upgrade(directory=MIGRATIONS)
+        db.session.add_all([Task(name=name, user_id='U1') for name in NAMES])
+        db.session.add(Task(name="Preparar cliente ajeno", user_id='U2'))
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture
+def like_only(monkeypatch):
+    """ Forzar la rama sin índice de texto (bases de datos que no son SQLite ni PostgreSQL). """
+    monkeypatch.setattr(db.session, 'get_bind', lambda *args, **kwargs: SimpleNamespace(dialect=SimpleNamespace(name='mysql')))
+
+
+def names(tasks):
+    return [task.name for task in tasks]
+
+
+def test_full_text_search_matches_word_prefixes_of_the_user(migrated):
+    assert names(search_tasks('U1', "clien")) == ["Llamar al cliente", "Preparar presentación del cliente"]
+    assert names(search_tasks('U1', "prep cliente")) == ["Preparar presentación del cliente"]
+    assert names(search_tasks('U1', "presentacion")) == ["Preparar presentación del cliente"]  # sin acentos
+    assert search_tasks('U1', "ajeno") == []
+    assert search_tasks('U1', "¿?") == []
+
+
+def test_index_follows_renames_and_deletes(migrated):
+    task = db.session.query(Task).filter_by(name="Llamar al cliente").one()
+    task.name = "Llamar al proveedor"
+    db.session.commit()
+    assert names(search_tasks('U1', "proveedor")) == ["Llamar al proveedor"]
+    db.session.delete(task)
+    db.session.commit()
+    assert search_tasks('U1', "proveedor") == []
+
+
+def test_user_id_with_quotes_is_escaped(migrated):
+    db.session.add(Task(name="Cliente raro", user_id='U"1'))
+    db.session.commit()
+    assert names(search_tasks('U"1', "cliente")) == ["Cliente raro"]
+
+
+def test_like_fallback_matches_substrings(app, like_only):
+    db.session.add_all([Task(name=name, user_id='U1') for name in NAMES])
+    db.session.commit()
+    assert names(search_query('U1', ['cliente']).all()) == ["Preparar presentación del cliente", "Llamar al cliente"]
+    assert names(search_query('U1', ['50%']).all()) == ["Presupuesto 50% descuento"]
+    assert names(search_query('U1', ['5_%']).all()) == []  # los comodines se escapan
+    assert len(search_query('U1', ['cliente', 'página'], any_term=True).all()) == 3
+
+
+def test_fuzzy_matches_tolerate_typos_and_accents(migrated):
+    (score, best), *_ = fuzzy_matches('U1', "preparar presentacion del clinete")
+    assert best.name == "Preparar presentación del cliente" and score > task_search.FUZZY_MATCH_RATIO
+    # Solo palabras cortas: se buscan igualmente, pero ninguna tarea se parece lo bastante
+    assert all(score < task_search.FUZZY_MATCH_RATIO for score, _ in fuzzy_matches('U1', "de"))
+    assert fuzzy_matches('U1', "") == []
+
+
+def test_start_timer_uses_the_closest_task_or_suggests(migrated, slash_for):
+    slash = slash_for(migrated)
+    text = slash('/start_timer', "revisar presupuesto anul").get_data(as_text=True)
+    assert text == "Temporizador iniciado para la tarea 'Revisar presupuesto anual'."
+    text = slash('/start_timer', "presupuesto").get_data(as_text=True)
+    assert text.startswith("No se encontró la tarea 'presupuesto'. ¿Quisiste decir")
+    assert "'Revisar presupuesto anual'" in text and "'Presupuesto 50% descuento'" in text
+
+
+def test_search_tasks_command(migrated, slash_for):
+    slash = slash_for(migrated)
+    assert slash('/search_tasks', "").get_data(as_text=True).startswith("Por favor")
+    text = slash('/search_tasks', "diseño").get_data(as_text=True)
+    assert text.startswith("Tareas que coinciden con 'diseño':\n- Diseño de la página (ID: ")
+    assert slash('/search_tasks', "nada").get_data(as_text=True) == "No se encontraron tareas para 'nada'."
@@ -0,0 +1,92 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Task, Timer
+from modules.stats import user_totals
+from modules.timers import close_open_timer, finish_timer, open_timer
+from modules.write_coalescer import run_write
+
+
+def open_timers(user_id='U1'):
+    return db.session.query(Timer).filter_by(user_id=user_id, end_time=None).count()
+
+
+def test_start_closes_the_previous_timer_in_the_same_write(app):
+    first, previous = open_timer('U1')
+    assert previous is None
+    second, previous = open_timer('U1')
+    assert previous.id == first
+    assert open_timers() == 1
+    assert db.session.get(Timer, first).end_time == previous.end_time
+    assert user_totals('U1')[1] == 1
+
+
+def test_stop_returns_the_closed_interval_once(app):
+    timer_id, _ = open_timer('U1')
+    closed = finish_timer('U1')
+    assert closed.id == timer_id and closed.end_time >= closed.start_time
+    assert finish_timer('U1') is None
+    assert open_timers() == 0
+
+
+def test_database_allows_one_open_timer_per_user(app):
+    db.session.add_all([Timer(user_id='U1'), Timer(user_id='U2')])
+    db.session.commit()
+    db.session.add(Timer(user_id='U1'))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+    db.session.add(Timer(user_id='U1', end_time=datetime.utcnow()))
+    db.session.commit()
+
+
+def test_close_open_timer_is_one_update(app):
+    db.session.add(Timer(user_id='U1', start_time=datetime.utcnow() - timedelta(minutes=5)))
+    db.session.commit()
+    statements = []
+
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, *args):
+        if statement.split()[0] in ('SELECT', 'UPDATE'):
+            statements.append(statement.split()[0])
+
+    closed = run_write(lambda: close_open_timer('U1'))
+    assert 295 <= (closed.end_time - closed.start_time).total_seconds() <= 305
+    # Un UPDATE ... RETURNING para cerrar; el resto son los UPSERT del rollup
+    assert statements.count('SELECT') == 0 and statements[0] == 'UPDATE'
+
+
+def test_concurrent_starts_leave_one_open_timer(app):
+    errors = []
+
+    def start():
+        with app.app_context():
+            try:
+                for _ in range(10):
+                    open_timer('U1')
+            except Exception as e:
+                errors.append(e)
+            db.session.remove()
+
+    threads = [threading.Thread(target=start) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert open_timers() == 1
+    assert db.session.query(Timer).count() == 60
+
+
+def test_timer_commands(app, slash):
+    db.session.add(Task(name="Informe", user_id='U1'))
+    db.session.commit()
+    assert slash('/start_timer', 'Informe').get_data(as_text=True) == "Temporizador iniciado para la tarea 'Informe'."
+    assert "Tienes un temporizador activo" in slash('/timer_status').get_data(as_text=True)
+    assert slash('/stop_timer').get_data(as_text=True).startswith("Temporizador detenido. Tiempo transcurrido:")
+    assert slash('/timer_status').get_data(as_text=True) == "No tienes temporizadores activos."
+    assert slash('/stop_timer').get_data(as_text=True) == "No hay un temporizador en marcha."
@@ -0,0 +1,71 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules.circuit_breaker import CircuitBreaker
+from modules.trello_async import AsyncTrelloClient
+from modules.trello_client import TrelloClient
+
+# Ruta -> (estado, cabeceras, cuerpo); '/truncated' anuncia más bytes de los que envía
+RESPONSES = {
+    '/1/cards/ok': (200, {}, b'{"id": "ok"}'),
+    '/1/cards/bad-json': (200, {}, b'<html>no es json'),
+    '/1/cards/truncated': (200, {'Content-Length': '100'}, b'{"id": "tr'),
+    '/1/cards/missing': (404, {}, b'not found'),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = []
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        Handler.hits.append(path)
+        status, headers, body = RESPONSES[path]
+        self.send_response(status)
+        headers = {'Content-Length': str(len(body)), **headers}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Handler.hits = []
+    yield f"http://127.0.0.1:{server.server_address[1]}/1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    sync = TrelloClient('key', 'token', base_url=server, max_retries=1, backoff=0.01,
+                        breaker=CircuitBreaker(min_calls=100))
+    client = AsyncTrelloClient(sync, concurrency=4)
+    yield client
+    client.close()
+
+
+def test_gather_returns_results_in_order(client):
+    assert client.get_many(['/cards/ok', '/cards/missing', '/cards/ok']) == [{'id': 'ok'}, None, {'id': 'ok'}]
+
+
+def test_invalid_json_in_a_2xx_response_is_a_failed_call(client):
+    assert client.get_many(['/cards/bad-json', '/cards/ok']) == [None, {'id': 'ok'}]
+    assert len(client.client.breaker._calls) == 2
+    assert sum(1 for _, failed, _ in client.client.breaker._calls if failed) == 1
+
+
+def test_truncated_body_is_retried_then_fails(client):
+    assert client.get_many(['/cards/truncated']) == [None]
+    assert Handler.hits == ['/1/cards/truncated'] * 2
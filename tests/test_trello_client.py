@@ -0,0 +1,78 @@
+import pytest
+import requests
+
+from conftest import Responses
+from modules import trello_client, trello_integration
+from modules.trello_client import TrelloClient, get_client
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(trello_client.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def client_for(fake, monkeypatch, **options):
+    client = TrelloClient('key', 'token', board_id='board', **options)
+    monkeypatch.setattr(client.session, 'request', fake.request)
+    return client
+
+
+def test_shared_client_is_created_once(monkeypatch):
+    monkeypatch.setattr(trello_client, '_client', None)
+    monkeypatch.setenv('TRELLO_API_KEY', 'k')
+    monkeypatch.setenv('TRELLO_TOKEN', 't')
+    client = get_client()
+    assert get_client() is client
+    assert client.session.params == {'key': 'k', 'token': 't'}
+    assert client.session.get_adapter('https://api.trello.com')._pool_maxsize == 10
+
+
+def test_integration_functions_use_the_shared_client(trello):
+    trello.routes[('POST', '/lists')] = {'id': 'list-1', 'name': 'Hecho'}
+    assert trello_integration.create_new_list_on_trello('Hecho') == {'id': 'list-1', 'name': 'Hecho'}
+    assert trello.calls == [('POST', '/lists', {'name': 'Hecho', 'idBoard': 'board-test'})]
+
+    trello.routes[('PUT', '/cards/c1')] = (400, {'message': 'invalid'})
+    assert trello_integration.move_card_to_list('c1', 'list-1') is False
+
+
+def test_rate_limited_calls_are_retried_after_retry_after(trello, monkeypatch, sleeps):
+    client = client_for(trello, monkeypatch, max_retries=3)
+    trello.routes[('POST', '/cards')] = Responses([(429, {}, {'Retry-After': '2'}), {'id': 'c1'}])
+    assert client.post('/cards').json() == {'id': 'c1'}
+    assert sleeps == [2.0]
+
+
+def test_server_errors_are_retried_only_for_idempotent_methods(trello, monkeypatch, sleeps):
+    client = client_for(trello, monkeypatch, max_retries=2, backoff=0.1)
+    trello.routes[('GET', '/boards/board')] = Responses([(503, {}), (502, {}), {'id': 'board'}])
+    assert client.get('/boards/board').json() == {'id': 'board'}
+    assert len(sleeps) == 2
+
+    trello.routes[('POST', '/cards')] = Responses([(503, {}), {'id': 'c1'}])
+    assert client.post('/cards').status_code == 503
+
+
+def test_connection_errors_are_raised_after_retries(trello, monkeypatch, sleeps):
+    client = client_for(trello, monkeypatch, max_retries=1)
+    trello.routes[('GET', '/boards/board')] = requests.ConnectionError("sin red")
+    with pytest.raises(requests.ConnectionError):
+        client.get('/boards/board')
+    assert len(trello.calls) == 2
+
+    trello.routes[('POST', '/cards')] = requests.ConnectionError("sin red")
+    with pytest.raises(requests.ConnectionError):
+        client.post('/cards')
+    assert len(trello.calls) == 3
+
+
+def test_exhausted_rate_limit_window_pauses_next_call(trello, monkeypatch, sleeps):
+    client = client_for(trello, monkeypatch)
+    trello.routes[('GET', '/members/me')] = (200, {}, {'x-rate-limit-api-token-remaining': '0',
+                                                     'x-rate-limit-api-token-interval-ms': '1500'})
+    client.get('/members/me')
+    assert sleeps == []
+    client.get('/members/me')
+    assert len(sleeps) == 1 and 1.4 < sleeps[0] <= 1.5
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, TrelloOutbox
+from modules.trello_outbox import TrelloOutboxWorker, enqueue
+from modules.write_coalescer import write_transaction
+
+
+@pytest.fixture
+def worker(app):
+    return TrelloOutboxWorker(app, max_attempts=2, base_backoff=2.0)
+
+
+def queued(card_id, action, value):
+    with write_transaction():
+        enqueue(card_id, action, value)
+
+
+def test_changes_to_the_same_field_are_coalesced(app):
+    queued('c1', 'due', '2026-01-01')
+    queued('c1', 'due', '2026-02-01')
+    queued('c2', 'due', '2026-01-01')
+    queued('c1', 'comment', "uno")
+    queued('c1', 'comment', "dos")
+
+    rows = db.session.query(TrelloOutbox).order_by(TrelloOutbox.id).all()
+    assert [(row.card_id, row.action, row.version) for row in rows] == [
+        ('c1', 'due', 2), ('c2', 'due', 1), ('c1', 'comment', 1), ('c1', 'comment', 1)]
+    assert rows[0].payload == '"2026-02-01"'
+
+
+def test_drain_sends_pending_changes_and_deletes_them(app, worker, trello):
+    trello.routes[('PUT', '/cards/c1')] = {'id': 'c1'}
+    trello.routes[('POST', '/cards/c1/actions/comments')] = {'id': 'a1'}
+    queued('c1', 'due', '2026-01-01')
+    queued('c1', 'comment', "hola")
+
+    assert worker.drain() == 2
+    assert trello.calls == [('PUT', '/cards/c1', {'due': '2026-01-01'}),
+                            ('POST', '/cards/c1/actions/comments', {'text': "hola"})]
+    assert db.session.query(TrelloOutbox).count() == 0
+
+
+def test_change_merged_while_sending_is_sent_again(app, worker, trello):
+    """ La fila se fusionó durante la llamada a Trello: no se borra y el valor nuevo sale en el siguiente lote. """
+    def put(params):
+        if len(trello.calls) == 1:
+            with app.app_context():
+                queued('c1', 'due', '2026-03-01')
+                db.session.remove()
+        return {'id': 'c1'}
+
+    trello.routes[('PUT', '/cards/c1')] = put
+    queued('c1', 'due', '2026-01-01')
+    worker.drain()
+    row = db.session.query(TrelloOutbox).one()
+    assert (row.version, row.payload, row.claimed_until) == (2, '"2026-03-01"', None)
+    db.session.rollback()
+
+    worker.drain()
+    assert trello.calls[-1] == ('PUT', '/cards/c1', {'due': '2026-03-01'})
+    assert db.session.query(TrelloOutbox).count() == 0
+
+
+def test_failed_changes_back_off_and_are_given_up(app, worker, trello):
+    trello.routes[('PUT', '/cards/c1')] = (400, {'message': 'invalid'})
+    queued('c1', 'due', '2026-01-01')
+
+    assert worker.drain() == 1
+    row = db.session.query(TrelloOutbox).one()
+    assert row.attempts == 1 and row.next_attempt_at > datetime.utcnow()
+    assert worker.drain() == 0  # todavía no vence
+
+    db.session.query(TrelloOutbox).update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+    worker.drain()
+    db.session.expire_all()
+    row = db.session.query(TrelloOutbox).one()
+    assert row.next_attempt_at is None and row.last_error
+    assert worker.stats()['failed'] == 1 and worker.stats()['pending'] == 0
@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from conftest import BOARD_ID
+from models import db, Task, TrelloCard, TrelloComment, TrelloLabel
+from modules import trello_sync
+from modules.trello_outbox import enqueue
+from modules.trello_sync import verify_signature
+
+CALLBACK_URL = 'https://bot.example.com/trello/webhook'
+SECRET = 'trello-api-secret'
+
+
+@pytest.fixture
+def webhook(make_app):
+    app = make_app(TRELLO_API_SECRET=SECRET, TRELLO_WEBHOOK_URL=CALLBACK_URL)
+    client = app.test_client()
+
+    def send(action, signature=None):
+        body = json.dumps({'action': action}).encode()
+        digest = hmac.new(SECRET.encode(), body + CALLBACK_URL.encode(), hashlib.sha1).digest()
+        return client.post('/trello/webhook', data=body,
+                           headers={'X-Trello-Webhook': signature or base64.b64encode(digest).decode()})
+
+    with app.app_context():
+        yield send
+
+
+def card_action(action_type, **card):
+    return {'id': f"act-{action_type}", 'type': action_type, 'date': '2026-01-02T10:00:00.000Z',
+            'data': {'card': {'id': 'card-1', **card}}}
+
+
+def test_verify_signature():
+    body = b'{"action": {}}'
+    signature = base64.b64encode(hmac.new(b's', body + b'https://x/cb', hashlib.sha1).digest()).decode()
+    assert verify_signature(body, signature, 'https://x/cb', 's')
+    assert not verify_signature(body + b' ', signature, 'https://x/cb', 's')
+    assert not verify_signature(body, signature, 'https://x/cb', None)
+
+
+def test_webhook_rejects_bad_signatures_and_answers_head(webhook, make_app):
+    assert webhook(card_action('createCard', name="Tarjeta"), signature='falsa').status_code == 403
+    assert db.session.query(TrelloCard).count() == 0
+    assert make_app().test_client().head('/trello/webhook').status_code == 200
+
+
+def test_card_updates_reach_the_mirror_and_linked_tasks(webhook):
+    db.session.add(Task(name="Vieja", user_id='U1', trello_card_id='card-1'))
+    db.session.commit()
+
+    assert webhook(card_action('createCard', name="Nueva", idList='list-1')).status_code == 200
+    assert webhook(card_action('updateCard', due='2026-03-01T12:00:00.000Z')).status_code == 200
+    webhook({**card_action('addLabelToCard'), 'data': {'card': {'id': 'card-1'},
+                                                       'label': {'id': 'l1', 'name': 'Alta', 'color': 'red'}}})
+    webhook({**card_action('addMemberToCard'), 'member': {'id': 'm1', 'username': 'ana', 'fullName': None},
+             'data': {'card': {'id': 'card-1'}, 'idMember': 'm1'}})
+
+    card = db.session.get(TrelloCard, 'card-1')
+    assert (card.name, card.list_id, card.due_date.isoformat()) == ("Nueva", 'list-1', '2026-03-01T12:00:00')
+    task = db.session.query(Task).one()
+    assert (task.name, task.priority, task.assigned_to) == ("Nueva", 'high', '@ana')
+
+
+def test_partial_update_keeps_fields_the_action_did_not_carry(webhook):
+    # La réplica no conoce la tarjeta: el updateCard solo trae el nombre y la nueva fecha
+    db.session.add(Task(name="Tarea", user_id='U1', trello_card_id='card-1', priority='high', assigned_to='@ana'))
+    db.session.commit()
+
+    webhook(card_action('updateCard', name="Tarea", due='2026-03-01T12:00:00.000Z'))
+    db.session.expire_all()
+    task = db.session.query(Task).one()
+    assert (task.priority, task.assigned_to, task.due_date.isoformat()) == ('high', '@ana', '2026-03-01T12:00:00')
+
+
+def test_fields_with_pending_outbox_changes_are_not_overwritten(webhook):
+    db.session.add(Task(name="Tarea", user_id='U1', trello_card_id='card-1', priority='low'))
+    enqueue('card-1', 'priority', 'low')
+    db.session.commit()
+
+    # Trello todavía tiene la etiqueta anterior: el cambio local sigue pendiente de enviarse
+    webhook({**card_action('addLabelToCard', name="Renombrada"),
+             'data': {'card': {'id': 'card-1', 'name': "Renombrada"}, 'label': {'id': 'l1', 'name': 'Alta'}}})
+    db.session.expire_all()
+    task = db.session.query(Task).one()
+    assert (task.name, task.priority) == ("Renombrada", 'low')
+
+
+def test_comments_are_mirrored_edited_and_deleted(webhook):
+    webhook({'id': 'c1', 'type': 'commentCard', 'date': '2026-01-02T10:00:00.000Z',
+             'idMemberCreator': 'm1', 'memberCreator': {'fullName': 'Ana'},
+             'data': {'text': "Hola", 'card': {'id': 'card-1'}}})
+    assert db.session.get(TrelloComment, 'c1').member_name == 'Ana'
+
+    webhook({'id': 'a2', 'type': 'updateComment', 'data': {'action': {'id': 'c1', 'text': "Adiós"}}})
+    db.session.expire_all()
+    assert db.session.get(TrelloComment, 'c1').text == "Adiós"
+
+    webhook({'id': 'a3', 'type': 'deleteComment', 'data': {'action': {'id': 'c1'}}})
+    assert db.session.query(TrelloComment).count() == 0
+
+
+def test_deleted_cards_drop_their_comments(webhook):
+    webhook(card_action('createCard', name="Tarjeta"))
+    webhook({'id': 'c1', 'type': 'commentCard', 'date': '2026-01-02T10:00:00.000Z',
+             'data': {'text': "Hola", 'card': {'id': 'card-1'}}})
+    webhook(card_action('deleteCard'))
+    assert db.session.query(TrelloCard).count() == 0
+    assert db.session.query(TrelloComment).count() == 0
+
+
+def test_backfill_loads_labels_cards_and_comments(app, trello):
+    trello.routes[('GET', f"/boards/{BOARD_ID}/labels")] = [{'id': 'l1', 'name': 'Baja', 'color': 'green'}]
+    trello.routes[('GET', f"/boards/{BOARD_ID}/cards/all")] = [
+        {'id': 'card-1', 'name': "Uno", 'idList': 'list-1', 'due': None, 'closed': False,
+         'labels': [{'id': 'l1', 'name': 'Baja'}], 'members': []},
+    ]
+    trello.routes[('GET', f"/boards/{BOARD_ID}/actions")] = [
+        {'id': f"c{i}", 'type': 'commentCard', 'date': '2026-01-02T10:00:00.000Z',
+         'data': {'text': f"Comentario {i}", 'card': {'id': 'card-1'}}} for i in range(3)]
+
+    assert trello_sync.backfill() == (1, 3)
+    assert db.session.get(TrelloLabel, 'l1').name == 'Baja'
+    assert [label.id for label in db.session.get(TrelloCard, 'card-1').labels] == ['l1']
+    assert db.session.query(TrelloComment).count() == 3